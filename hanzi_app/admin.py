@@ -3,7 +3,7 @@ from .models import Hanzi
 
 @admin.register(Hanzi)
 class HanziAdmin(admin.ModelAdmin):
-    list_display = ['id', 'character', 'pinyin', 'stroke_count', 'level', 'structure']
+    list_display = ['code', 'character', 'pinyin', 'stroke_count', 'level', 'structure']
     list_filter = ['level', 'structure', 'variant']
-    search_fields = ['character', 'pinyin', 'id']
+    search_fields = ['character', 'pinyin', 'code']
     ordering = ['stroke_count', 'character']
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class HanziAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'hanzi_app'
+
+    def ready(self):
+        # 注册模型信号，维护笔画倒排索引等派生数据
+        from . import signals  # noqa: F401
@@ -0,0 +1,214 @@
+"""
+汉字批量操作
+
+选中的记录可以是编号（主键）列表，也可以是列表页的筛选条件。批量修改在一个事务中用 bulk_update 写入，
+结构变化时按新结构一次预留所需的编号；批量删除按批用 DELETE 语句删除汉字记录，图片文件在事务提交后由后台任务删除。
+批量操作不触发 post_save/post_delete 信号，因此由这里统一同步全文索引并递增一次数据版本号。
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .caching import bump_data_version
+from .filters import filter_hanzi, normalize_filters
+from .fulltext import get_search_backend
+from .models import Hanzi, HanziIdSequence, HanziPinyin, HanziStroke
+
+logger = logging.getLogger(__name__)
+
+# 可批量修改的字段 -> 允许的取值（None 表示不限）
+BULK_EDIT_FIELDS = {
+    'structure': [choice for choice, _ in Hanzi.STRUCTURE_CHOICES],
+    'level': [choice for choice, _ in Hanzi.LEVEL_CHOICES],
+    'variant': [choice for choice, _ in Hanzi.VARIANT_CHOICES],
+    'comment': None,
+}
+
+# bulk_update 每批写入的行数
+BULK_BATCH_SIZE = 500
+
+# 用户上传图片所在目录（与 views.UPLOAD_FOLDER 相同）
+UPLOAD_FOLDER = os.path.join(settings.MEDIA_ROOT, 'uploads')
+
+# 提交文件删除任务时连接消息队列的重试策略，消息队列不可用时请求最多等待约 1 秒
+FILE_REMOVAL_RETRY_POLICY = {'max_retries': 3, 'interval_start': 0, 'interval_step': 0.2, 'interval_max': 0.5}
+
+
+class BulkSelectionError(ValueError):
+    """批量操作的选择或修改内容无效"""
+
+
+def bulk_limit():
+    """单次批量操作最多处理的记录数"""
+    return getattr(settings, 'HANZI_BULK_LIMIT', 5000)
+
+
+def resolve_selection(ids=None, filters=None):
+    """
+    将选择转换为主键列表
+    :param ids: 主键列表
+    :param filters: 筛选参数字典，与列表页的请求参数相同
+    :return: (主键列表, 请求中不存在的主键列表)
+    """
+    if ids:
+        requested = list(dict.fromkeys(str(pk).strip() for pk in ids if str(pk).strip()))
+        if len(requested) > bulk_limit():
+            raise BulkSelectionError(f"一次最多选择 {bulk_limit()} 条记录")
+        found = set(Hanzi.objects.filter(pk__in=requested).values_list('pk', flat=True))
+        return [pk for pk in requested if pk in found], [pk for pk in requested if pk not in found]
+
+    if filters is None:
+        raise BulkSelectionError('请提供 ids 或 filters')
+    normalized = normalize_filters(**{name: value for name, value in filters.items() if value is not None})
+    if not normalized:
+        # 防止误操作整张表
+        raise BulkSelectionError('筛选条件不能为空')
+    pks = list(filter_hanzi(normalized).order_by('pk').values_list('pk', flat=True)[:bulk_limit() + 1])
+    if len(pks) > bulk_limit():
+        raise BulkSelectionError(f"符合条件的记录超过 {bulk_limit()} 条，请缩小筛选范围")
+    return pks, []
+
+
+def clean_changes(changes):
+    """校验要修改的字段和取值"""
+    if not changes:
+        raise BulkSelectionError('没有要修改的字段')
+    cleaned = {}
+    for name, value in changes.items():
+        if name not in BULK_EDIT_FIELDS:
+            raise BulkSelectionError(f"不支持批量修改字段: {name}")
+        choices = BULK_EDIT_FIELDS[name]
+        if choices is not None and value not in choices:
+            raise BulkSelectionError(f"字段 {name} 的取值无效: {value}")
+        cleaned[name] = '' if value is None else str(value)
+    return cleaned
+
+
+def bulk_edit(pks, changes):
+    """
+    批量修改汉字
+    :param pks: 主键列表
+    :param changes: 已校验的 {字段: 新值}
+    :return: 每条记录的结果 [{'id', 'code', 'status': 'updated'|'unchanged', 'changed': [字段...]}, ...]
+    """
+    fields = list(changes)
+    results = []
+    with transaction.atomic():
+        rows = list(Hanzi.objects.select_for_update().filter(pk__in=pks).order_by('pk'))
+        changed_rows = []
+        restructured = []
+        now = timezone.now()
+        for hanzi in rows:
+            changed = [name for name, value in changes.items() if getattr(hanzi, name) != value]
+            result = {'id': hanzi.pk, 'code': hanzi.code, 'status': 'unchanged', 'changed': changed}
+            results.append(result)
+            if not changed:
+                continue
+            if 'structure' in changed:
+                restructured.append((hanzi, result))
+            for name in changed:
+                if name != 'structure':
+                    setattr(hanzi, name, changes[name])
+            # bulk_update 不会自动更新 auto_now 字段
+            hanzi.upd_time = now
+            result['status'] = 'updated'
+            changed_rows.append(hanzi)
+
+        if restructured:
+            # 新结构的编号一次预留
+            codes = HanziIdSequence.reserve(changes['structure'], len(restructured))
+            for (hanzi, result), code in zip(restructured, codes):
+                result['old_code'] = hanzi.code
+                hanzi.change_structure(changes['structure'], code=code)
+                result['code'] = hanzi.code
+
+        update_fields = fields + ['upd_time'] + (['code'] if restructured else [])
+        Hanzi.objects.bulk_update(changed_rows, update_fields, batch_size=BULK_BATCH_SIZE)
+
+        # 全文索引包含编号和评语，与修改一起提交
+        if {'code', 'comment'} & set(update_fields):
+            backend = get_search_backend()
+            for hanzi in changed_rows:
+                backend.index(hanzi)
+
+    if changed_rows:
+        bump_data_version()
+        logger.info(f"批量修改 {len(changed_rows)} 条汉字记录: {changes}")
+    return results
+
+
+def bulk_delete(pks):
+    """
+    批量删除汉字
+    索引行按外键批量删除，汉字记录按批直接执行 DELETE（不逐条加载、不发送 post_delete 信号，
+    信号中的全文索引和数据版本号在这里统一处理），事务提交后把不再被引用的图片文件交给后台任务删除
+    :return: (删除的记录数, 待删除的文件数)
+    """
+    if not pks:
+        return 0, 0
+    with transaction.atomic():
+        rows = list(Hanzi.objects.select_for_update().filter(pk__in=pks)
+                    .values_list('pk', 'image_path', 'standard_image'))
+        pks = [pk for pk, _, _ in rows]
+        HanziStroke.objects.filter(hanzi_id__in=pks).delete()
+        HanziPinyin.objects.filter(hanzi_id__in=pks).delete()
+        get_search_backend().remove_many(pks)
+        deleted = delete_rows(pks)
+
+        # 标准图片按汉字共用，仍被其他记录引用的保留
+        standard_images = {standard for _, _, standard in rows if standard}
+        still_used = set(Hanzi.objects.filter(standard_image__in=standard_images)
+                         .values_list('standard_image', flat=True))
+        paths = [os.path.join(UPLOAD_FOLDER, os.path.basename(image)) for _, image, _ in rows if image]
+        paths += [os.path.join(settings.MEDIA_ROOT, standard) for standard in standard_images - still_used]
+
+        transaction.on_commit(lambda: dispatch_file_removal(paths))
+
+    if deleted:
+        bump_data_version()
+        logger.info(f"批量删除 {deleted} 条汉字记录，待删除文件 {len(paths)} 个")
+    return deleted, len(paths)
+
+
+def delete_rows(pks):
+    """按批执行 DELETE 删除汉字记录（调用方已删除引用这些记录的索引行），返回删除的行数"""
+    table = connection.ops.quote_name(Hanzi._meta.db_table)
+    column = connection.ops.quote_name(Hanzi._meta.pk.column)
+    deleted = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(pks), BULK_BATCH_SIZE):
+            batch = pks[start:start + BULK_BATCH_SIZE]
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(batch))})", batch)
+            deleted += cursor.rowcount
+    return deleted
+
+
+def remove_files(paths):
+    """删除文件，不存在的跳过，返回实际删除的个数"""
+    removed = 0
+    for path in paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"删除文件失败: {path}, {e}")
+    return removed
+
+
+def dispatch_file_removal(paths):
+    """
+    把文件删除交给 Celery worker，连接消息队列按 FILE_REMOVAL_RETRY_POLICY 有限重试
+    提交失败时只记录日志，不在 Web 进程中删除文件（残留文件不影响数据，可重新删除）
+    """
+    if not paths:
+        return
+    from .tasks import remove_files_task
+    try:
+        remove_files_task.apply_async((paths,), retry=True, retry_policy=FILE_REMOVAL_RETRY_POLICY)
+    except Exception as e:
+        logger.error(f"提交文件删除任务失败，{len(paths)} 个文件未删除: {e}; 文件: {paths}")
@@ -0,0 +1,263 @@
+"""
+两级缓存后端：进程内 LRU + Redis
+
+每个 gunicorn worker、Celery 进程各有一份容量有限的 LRU，未命中时读 Redis（与 Celery broker 为同一实例），
+多个进程共享 Redis 中的结果。本地副本最多保留 LOCAL_TIMEOUT 秒，数据版本号、命中统计等需要进程间
+实时一致的键不进入本地缓存。Redis 不可用时退化为只使用本地缓存（此时上述键也保存在本地，各进程分别计数），
+并在 RETRY_INTERVAL 秒后重试。
+
+get_or_set 带防击穿（single-flight）：同一个未命中的键，进程内只有一个线程计算，
+进程间通过 Redis 上的 SET NX 锁只有一个进程计算，其余等待其写入结果。
+
+配置示例（settings.CACHES）：
+    'default': {
+        'BACKEND': 'hanzi_app.cache_backends.TwoTierCache',
+        'LOCATION': 'redis://localhost:6379/1',
+        'OPTIONS': {'LOCAL_MAX_ENTRIES': 1000, 'LOCAL_TIMEOUT': 60},
+    }
+"""
+import logging
+import pickle
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# TwoTierCache 自身的配置项，其余 OPTIONS 原样传给 Redis 后端
+LOCAL_OPTIONS = {
+    'REMOTE_BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCAL_MAX_ENTRIES': 1000,
+    'LOCAL_TIMEOUT': 60,
+    # 识别结果缓存（hanzi:ocr:）条目多且每次导入只读一次，不占用进程内缓存
+    'LOCAL_EXCLUDE_PREFIXES': ('hanzi:data_version', 'hanzi:cache_stats:', 'hanzi:ocr:'),
+    'LOCK_TIMEOUT': 10,
+    'LOCK_POLL_INTERVAL': 0.05,
+    'RETRY_INTERVAL': 5,
+}
+
+
+class LocalLRU:
+    """线程安全的进程内 LRU，值以 pickle 形式保存，调用方修改取出的对象不会影响缓存"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, payload = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout):
+        """timeout 为秒数，None 表示不过期"""
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (expires_at, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _KeyLock:
+    """按键分配的线程锁，不再使用时由弱引用字典自动回收"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """进程内 LRU + Redis 的两级缓存，接口与 Django 缓存后端一致"""
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = dict(params.get('OPTIONS') or {})
+        config = {name: options.pop(name, default) for name, default in LOCAL_OPTIONS.items()}
+
+        remote_class = import_string(config['REMOTE_BACKEND'])
+        self._remote = remote_class(server, {**params, 'OPTIONS': options})
+        self._local = LocalLRU(config['LOCAL_MAX_ENTRIES'])
+        self.local_timeout = config['LOCAL_TIMEOUT']
+        self.exclude_prefixes = tuple(config['LOCAL_EXCLUDE_PREFIXES'])
+        self.lock_timeout = config['LOCK_TIMEOUT']
+        self.poll_interval = config['LOCK_POLL_INTERVAL']
+        self.retry_interval = config['RETRY_INTERVAL']
+
+        self._key_locks = weakref.WeakValueDictionary()
+        self._key_locks_guard = threading.Lock()
+        self._remote_down_until = 0
+
+    # ---- Redis 访问：出错时记录并暂时跳过 ----
+
+    def _call_remote(self, method, *args, default=None, **kwargs):
+        if self._remote_down_until > time.monotonic():
+            return default
+        try:
+            return getattr(self._remote, method)(*args, **kwargs)
+        except ValueError:
+            # incr 等操作的键不存在，属于正常结果
+            raise
+        except Exception as e:
+            self._remote_down_until = time.monotonic() + self.retry_interval
+            logger.warning(f"Redis 缓存不可用，{self.retry_interval}秒内只使用进程内缓存: {e}")
+            return default
+
+    # ---- 本地缓存 ----
+
+    def _remote_available(self):
+        return self._remote_down_until <= time.monotonic()
+
+    def _cacheable_locally(self, key):
+        return not self._remote_available() or not str(key).startswith(self.exclude_prefixes)
+
+    def _local_timeout(self, timeout):
+        """本地副本的存活时间：不超过 LOCAL_TIMEOUT，也不超过 Redis 中的过期时间"""
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self.local_timeout
+        return max(min(timeout - time.time(), self.local_timeout), 0)
+
+    def _store_local(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if self._cacheable_locally(key):
+            self._local.set(self.make_and_validate_key(key, version), value, self._local_timeout(timeout))
+
+    def _drop_local(self, key, version=None):
+        self._local.delete(self.make_and_validate_key(key, version))
+
+    # ---- Django 缓存接口 ----
+
+    def get(self, key, default=None, version=None):
+        if self._cacheable_locally(key):
+            value = self._local.get(self.make_and_validate_key(key, version))
+            if value is not _MISSING:
+                return value
+        value = self._call_remote('get', key, _MISSING, version=version, default=_MISSING)
+        if value is _MISSING:
+            return default
+        self._store_local(key, value, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._call_remote('set', key, value, timeout, version=version)
+        self._store_local(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._call_remote('add', key, value, timeout, version=version, default=_MISSING)
+        if added is _MISSING:
+            # Redis 不可用时按本地缓存判断
+            if self._local.get(self.make_and_validate_key(key, version)) is not _MISSING:
+                return False
+            added = True
+        if added:
+            self._store_local(key, value, timeout, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._drop_local(key, version)
+        return bool(self._call_remote('touch', key, timeout, version=version, default=False))
+
+    def delete(self, key, version=None):
+        self._drop_local(key, version)
+        return bool(self._call_remote('delete', key, version=version, default=False))
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        value = self._call_remote('incr', key, delta, version=version, default=_MISSING)
+        if value is not _MISSING:
+            self._drop_local(key, version)
+            return value
+        # Redis 不可用时在本地缓存上递增
+        local_key = self.make_and_validate_key(key, version)
+        current = self._local.get(local_key)
+        if current is _MISSING:
+            raise ValueError(f"Key '{key}' not found")
+        self._local.set(local_key, current + delta, self.local_timeout)
+        return current + delta
+
+    def clear(self):
+        self._local.clear()
+        self._call_remote('clear')
+
+    def close(self, **kwargs):
+        self._call_remote('close', **kwargs)
+
+    # ---- 防击穿 ----
+
+    def _key_lock(self, key):
+        with self._key_locks_guard:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = _KeyLock()
+                self._key_locks[key] = key_lock
+            return key_lock
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        取值，未命中时计算并写入；default 为可调用对象时保证同一时刻只有一个计算者
+        其他进程持有计算锁时轮询等待结果，超过 LOCK_TIMEOUT 仍未得到结果则自行计算
+        """
+        value = self.get(key, _MISSING, version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            self.add(key, default, timeout, version)
+            return self.get(key, default, version)
+
+        key_lock = self._key_lock(self.make_and_validate_key(key, version))
+        with key_lock.lock:
+            # 等锁期间可能已由本进程其他线程写入
+            value = self.get(key, _MISSING, version)
+            if value is not _MISSING:
+                return value
+
+            lock_key = f'{key}:lock'
+            acquired = self._call_remote('add', lock_key, 1, self.lock_timeout, version=version, default=True)
+            if not acquired:
+                value = self._wait_for(key, lock_key, version)
+                if value is not _MISSING:
+                    return value
+            try:
+                value = default()
+                self.set(key, value, timeout, version)
+            finally:
+                if acquired:
+                    self._call_remote('delete', lock_key, version=version)
+            return value
+
+    def _wait_for(self, key, lock_key, version):
+        """等待持锁进程写入结果；锁被释放却没有结果（计算出错）或等待超时时返回 _MISSING"""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            value = self._call_remote('get', key, _MISSING, version=version, default=_MISSING)
+            if value is not _MISSING:
+                self._store_local(key, value, version=version)
+                return value
+            if not self._call_remote('has_key', lock_key, version=version, default=False):
+                break
+        return _MISSING
@@ -0,0 +1,133 @@
+"""
+缓存相关的公共工具
+
+汉字数据的缓存键都带有数据版本号：Hanzi 保存、删除时版本号递增，旧版本的缓存不会再被读取，
+过期后自然淘汰，因此不需要逐个失效。read_through 按命名空间记录命中、未命中次数，供 cache_stats 命令查看。
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# 汉字数据版本号：汉字增删改时递增，依赖汉字数据的内存索引和缓存据此判断是否过期
+DATA_VERSION_KEY = 'hanzi:data_version'
+
+# 命中统计计数器的缓存键
+STATS_KEY = 'hanzi:cache_stats:{namespace}:{field}'
+
+# 使用 read_through 的命名空间，cache_stats 命令按此列出统计
+CACHE_NAMESPACES = {
+    'page': '列表页分页结果',
+    'detail': '汉字详情',
+    'filter_count': '筛选结果计数',
+    'facets': '筛选分面统计',
+}
+
+# 默认缓存时间（秒），数据变化时版本号递增，旧缓存无需等到过期
+DEFAULT_TIMEOUT = 60 * 10
+
+# 命中统计先在进程内累计，每 STATS_FLUSH_INTERVAL 秒或累计 STATS_FLUSH_EVENTS 次写入缓存一次
+STATS_FLUSH_INTERVAL = 5
+STATS_FLUSH_EVENTS = 100
+
+_pending_stats = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_data_version():
+    """获取当前汉字数据版本号"""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, 1, timeout=None)
+        version = cache.get(DATA_VERSION_KEY, 1)
+    return version
+
+
+def bump_data_version():
+    """递增汉字数据版本号，使依赖旧数据的索引和缓存失效"""
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        # 版本号不存在（缓存被清空或已过期），重新初始化为 2，保证与默认值 1 不同
+        cache.add(DATA_VERSION_KEY, 2, timeout=None)
+        return get_data_version()
+
+
+def versioned_key(namespace, parts):
+    """由命名空间、当前数据版本号和键内容（可 repr 的元组）组成缓存键"""
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return f"hanzi:{namespace}:{get_data_version()}:{digest}"
+
+
+def _flush_stats():
+    """将进程内累计的命中统计写入缓存"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+        _last_flush = time.monotonic()
+    for key, count in pending.items():
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            if not cache.add(key, count, timeout=None):
+                cache.incr(key, count)
+
+
+def _record(namespace, field):
+    with _pending_lock:
+        _pending_stats[STATS_KEY.format(namespace=namespace, field=field)] += 1
+        due = (sum(_pending_stats.values()) >= STATS_FLUSH_EVENTS
+               or time.monotonic() - _last_flush >= STATS_FLUSH_INTERVAL)
+    if due:
+        _flush_stats()
+
+
+def read_through(namespace, parts, loader, timeout=DEFAULT_TIMEOUT):
+    """
+    读穿缓存：命中时直接返回，未命中时调用 loader 取值并写入缓存
+    通过 cache.get_or_set 取值，两级缓存后端下同一个键同时只有一个计算者
+    :param namespace: 命名空间，用于区分缓存内容和统计命中率
+    :param parts: 键内容，需包含影响结果的全部参数
+    :param loader: 无参函数，返回可序列化的结果；抛出异常时不写缓存
+    """
+    computed = []
+
+    def load():
+        computed.append(True)
+        return loader()
+
+    value = cache.get_or_set(versioned_key(namespace, parts), load, timeout)
+    _record(namespace, 'misses' if computed else 'hits')
+    return value
+
+
+def cache_stats():
+    """
+    各命名空间的命中统计
+    :return: {命名空间: {'hits': 命中次数, 'misses': 未命中次数, 'hit_rate': 命中率}}
+    """
+    _flush_stats()
+    stats = {}
+    for namespace in CACHE_NAMESPACES:
+        hits = cache.get(STATS_KEY.format(namespace=namespace, field='hits'), 0)
+        misses = cache.get(STATS_KEY.format(namespace=namespace, field='misses'), 0)
+        total = hits + misses
+        stats[namespace] = {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+    return stats
+
+
+def reset_cache_stats():
+    """清零命中统计"""
+    with _pending_lock:
+        _pending_stats.clear()
+    cache.delete_many([
+        STATS_KEY.format(namespace=namespace, field=field)
+        for namespace in CACHE_NAMESPACES for field in ('hits', 'misses')
+    ])
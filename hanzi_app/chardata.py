@@ -0,0 +1,347 @@
+"""
+汉字字符元数据的预编译存储（笔顺、笔画数、部首、拼音）
+
+原先这些数据分散在三处：Strokes.txt（笔顺、部首）、data/ch_match/stoke.txt（笔画数）
+以及每次请求都调用的 pypinyin。现在统一编译成一个按码位索引的二进制文件，
+各进程（gunicorn worker、Celery worker）以只读方式 mmap 同一个文件，
+由操作系统页缓存共享内存。
+
+二进制文件布局（本机字节序）：
+    头部    HEADER_FORMAT：魔数、格式版本、起始码位、槽位数
+    槽位表  size 个定长记录 RECORD，第 i 个槽位对应码位 base+i
+    数据区  笔顺文本与拼音读音的 UTF-8 字节
+
+查询时直接由码位计算槽位偏移，O(1) 定位，整数字段无需解析，
+字符串字段只解码所需的那一段。
+
+编译文件名中带有源文件指纹，源文件变化后会生成新文件并重新映射，
+可用 ``python manage.py compile_chardata`` 预先编译。
+"""
+import os
+import mmap
+import time
+import glob
+import struct
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HZCD'
+FORMAT_VERSION = 2
+# 魔数、格式版本、起始码位、槽位数
+HEADER_FORMAT = '=4sIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+# 笔顺偏移、笔顺长度、笔画数、标志位、部首码位、拼音偏移、拼音长度
+RECORD = struct.Struct('=IHBBIIH')
+FLAG_PRESENT = 1
+
+# 检查源文件是否变化的最小间隔（秒），避免每次查询都 stat 一次
+CHECK_INTERVAL = 2.0
+
+CharInfo = namedtuple('CharInfo', ['character', 'stroke_order', 'stroke_count', 'radical', 'pinyin'])
+
+
+def get_strokes_path():
+    """笔顺源文件路径（Strokes.txt：序号、汉字、部首、笔画数、笔顺）"""
+    return getattr(settings, 'HANZI_STROKES_FILE', os.path.join(settings.BASE_DIR, 'Strokes.txt'))
+
+
+def get_stroke_count_path():
+    """笔画数源文件路径（stoke.txt：码位|汉字|笔画数）"""
+    return getattr(settings, 'HANZI_STROKE_COUNT_FILE',
+                   os.path.join(settings.BASE_DIR, 'data', 'ch_match', 'stoke.txt'))
+
+
+def get_cache_dir():
+    """编译后二进制文件的存放目录"""
+    return getattr(settings, 'HANZI_CHARDATA_DIR', os.path.join(settings.BASE_DIR, 'data', 'cache'))
+
+
+def _pypinyin_version():
+    try:
+        import pypinyin
+        return pypinyin.__version__
+    except ImportError:
+        return ''
+
+
+def source_fingerprint(strokes_path=None, stroke_count_path=None):
+    """
+    由各源文件的 mtime、大小以及 pypinyin 版本计算指纹
+    :return: 16位十六进制字符串
+    """
+    parts = [str(FORMAT_VERSION), _pypinyin_version()]
+    for path in (strokes_path or get_strokes_path(), stroke_count_path or get_stroke_count_path()):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_mtime_ns}:{stat.st_size}")
+        else:
+            parts.append(f"{path}:missing")
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def load_sources(strokes_path=None, stroke_count_path=None):
+    """
+    读取所有源数据
+    :return: {码位: [笔顺, 笔画数, 部首码位, 拼音读音]} 字典
+    """
+    entries = {}
+
+    with open(strokes_path or get_strokes_path(), 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) < 2 or len(parts[1]) != 1:
+                continue
+            radical = parts[2] if len(parts) > 2 else ''
+            count = parts[3] if len(parts) > 3 else ''
+            entries[ord(parts[1])] = [
+                parts[4] if len(parts) > 4 else '',
+                int(count) if count.isdigit() else 0,
+                ord(radical) if len(radical) == 1 else 0,
+                '',
+            ]
+
+    # 笔画数以 stoke.txt 为准，与原先 views.stroke_dict 的取值保持一致
+    stroke_count_path = stroke_count_path or get_stroke_count_path()
+    if os.path.exists(stroke_count_path):
+        with open(stroke_count_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.strip().split('|')
+                if len(parts) >= 3 and len(parts[1]) == 1 and parts[2].isdigit():
+                    entry = entries.setdefault(ord(parts[1]), ['', 0, 0, ''])
+                    entry[1] = int(parts[2])
+    else:
+        logger.warning(f"笔画数文件不存在: {stroke_count_path}，改用笔顺文件中的笔画数")
+
+    try:
+        from pypinyin import pinyin
+        for code, entry in entries.items():
+            readings = pinyin(chr(code), heteronym=True)
+            if readings and readings[0] and readings[0][0] != chr(code):
+                entry[3] = ','.join(readings[0])
+    except ImportError:
+        logger.warning("未安装 pypinyin，编译结果中不包含拼音")
+
+    return entries
+
+
+def compile_chardata(target_path, strokes_path=None, stroke_count_path=None):
+    """
+    将所有源数据编译为二进制文件，先写临时文件再原子替换
+    :return: 写入的字符数
+    """
+    entries = load_sources(strokes_path, stroke_count_path)
+    if not entries:
+        raise ValueError("没有可编译的字符数据")
+
+    base = min(entries)
+    size = max(entries) - base + 1
+    table = bytearray(RECORD.size * size)
+    blob = bytearray()
+
+    for code, (strokes, count, radical, readings) in entries.items():
+        strokes_bytes = strokes.encode('utf-8')
+        strokes_off = len(blob)
+        blob += strokes_bytes
+        pinyin_bytes = readings.encode('utf-8')
+        pinyin_off = len(blob)
+        blob += pinyin_bytes
+        RECORD.pack_into(table, (code - base) * RECORD.size,
+                         strokes_off, len(strokes_bytes), min(count, 255), FLAG_PRESENT,
+                         radical, pinyin_off, len(pinyin_bytes))
+
+    header = struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, base, size)
+
+    target_dir = os.path.dirname(target_path)
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(table)
+            f.write(blob)
+        try:
+            os.replace(tmp_path, target_path)
+        except OSError:
+            # Windows下目标文件可能正被其他进程映射，此时它已由其他进程编译完成
+            if not os.path.exists(target_path):
+                raise
+            os.remove(tmp_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logger.info(f"已编译字符数据: {target_path}，共 {len(entries)} 个字符")
+    return len(entries)
+
+
+class CharacterStore:
+    """
+    基于 mmap 的只读字符元数据存储，按码位直接寻址
+    """
+
+    def __init__(self, strokes_path=None, stroke_count_path=None, cache_dir=None):
+        self.strokes_path = strokes_path or get_strokes_path()
+        self.stroke_count_path = stroke_count_path or get_stroke_count_path()
+        self.cache_dir = cache_dir or get_cache_dir()
+        self._lock = threading.Lock()
+        # (mmap, 起始码位, 槽位数, 数据区起点)，重新加载时整体替换，读取方无需加锁
+        self._state = None
+        self._fingerprint = None
+        self._last_check = 0.0
+
+    def compiled_path(self, fingerprint=None):
+        fingerprint = fingerprint or source_fingerprint(self.strokes_path, self.stroke_count_path)
+        return os.path.join(self.cache_dir, f"chardata-v{FORMAT_VERSION}-{fingerprint}.bin")
+
+    def _cleanup_stale(self, keep_path):
+        """删除旧的编译文件，仍被其他进程映射的文件删除失败时忽略"""
+        for path in glob.glob(os.path.join(self.cache_dir, 'chardata-v*.bin')):
+            if os.path.abspath(path) != os.path.abspath(keep_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def compile(self, force=False):
+        """
+        按当前源文件编译，已有同指纹文件时跳过（force=True 时强制重新编译）
+        :return: (编译文件路径, 是否重新编译)
+        """
+        path = self.compiled_path()
+        if force or not os.path.exists(path):
+            compile_chardata(path, self.strokes_path, self.stroke_count_path)
+            self._cleanup_stale(path)
+            self._fingerprint = None
+            return path, True
+        return path, False
+
+    def _load(self, fingerprint):
+        path = self.compiled_path(fingerprint)
+        if not os.path.exists(path):
+            compile_chardata(path, self.strokes_path, self.stroke_count_path)
+            self._cleanup_stale(path)
+
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, base, size = struct.unpack_from(HEADER_FORMAT, mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            mm.close()
+            raise ValueError(f"字符数据文件格式不正确: {path}")
+
+        # 旧的映射不主动关闭，可能仍有线程在读取，引用释放后自动回收
+        self._state = (mm, base, size, HEADER_SIZE + RECORD.size * size)
+        self._fingerprint = fingerprint
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._state is not None and now - self._last_check < CHECK_INTERVAL:
+            return self._state
+        with self._lock:
+            if self._state is None or now - self._last_check >= CHECK_INTERVAL:
+                fingerprint = source_fingerprint(self.strokes_path, self.stroke_count_path)
+                if fingerprint != self._fingerprint:
+                    self._load(fingerprint)
+                self._last_check = now
+        return self._state
+
+    @property
+    def fingerprint(self):
+        """当前加载的编译文件对应的源文件指纹，源文件变化后随之变化"""
+        self._ensure_loaded()
+        return self._fingerprint
+
+    def _record(self, char):
+        """返回 (mmap, 数据区起点, 记录元组)，未收录时返回 None"""
+        if not char or len(char) != 1:
+            return None
+        mm, base, size, data_start = self._ensure_loaded()
+        slot = ord(char) - base
+        if slot < 0 or slot >= size:
+            return None
+        record = RECORD.unpack_from(mm, HEADER_SIZE + slot * RECORD.size)
+        if not record[3] & FLAG_PRESENT:
+            return None
+        return mm, data_start, record
+
+    def stroke_order(self, char, default=''):
+        """笔顺文本（逗号分隔），未收录时返回 default"""
+        found = self._record(char)
+        if found is None:
+            return default
+        mm, data_start, record = found
+        start = data_start + record[0]
+        return mm[start:start + record[1]].decode('utf-8')
+
+    def stroke_count(self, char, default=0):
+        """笔画数，未收录时返回 default"""
+        found = self._record(char)
+        return default if found is None else found[2][2]
+
+    def radical(self, char, default=''):
+        """部首，未收录或难检字时返回 default"""
+        found = self._record(char)
+        if found is None or not found[2][4]:
+            return default
+        return chr(found[2][4])
+
+    def pinyin(self, char):
+        """带声调的全部读音（多音字按常用程度排列），未收录时返回空元组"""
+        found = self._record(char)
+        if found is None or not found[2][6]:
+            return ()
+        mm, data_start, record = found
+        start = data_start + record[5]
+        return tuple(mm[start:start + record[6]].decode('utf-8').split(','))
+
+    def lookup(self, char):
+        """
+        一次取出字符的全部元数据
+        :return: CharInfo，未收录时返回 None
+        """
+        found = self._record(char)
+        if found is None:
+            return None
+        mm, data_start, record = found
+        strokes_start = data_start + record[0]
+        pinyin_start = data_start + record[5]
+        readings = mm[pinyin_start:pinyin_start + record[6]].decode('utf-8')
+        return CharInfo(
+            character=char,
+            stroke_order=mm[strokes_start:strokes_start + record[1]].decode('utf-8'),
+            stroke_count=record[2],
+            radical=chr(record[4]) if record[4] else '',
+            pinyin=tuple(readings.split(',')) if readings else (),
+        )
+
+    def __contains__(self, char):
+        return self._record(char) is not None
+
+    def characters(self):
+        """按码位顺序遍历全部已收录字符"""
+        mm, base, size, _ = self._ensure_loaded()
+        for slot in range(size):
+            if RECORD.unpack_from(mm, HEADER_SIZE + slot * RECORD.size)[3] & FLAG_PRESENT:
+                yield chr(base + slot)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_char_store():
+    """获取进程内唯一的字符元数据存储实例"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CharacterStore()
+    return _store
@@ -10,7 +10,7 @@ from typing import Dict, Optional, Union, List, Tuple, Any
 from datetime import datetime
 import time
 
-from hanzi_app.recognition import recognize_hanzi
+from hanzi_app.ocr_pool import iter_recognitions
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -130,7 +130,9 @@ def import_hanzi_data(
     json_comment_path: str = None,
     output_dir: str = "media/import_results",
     test_mode: bool = False,
-    status_callback = None
+    status_callback = None,
+    ocr_mode: str = None,
+    ocr_workers: int = None
 ) -> dict:
     """
     导入汉字图片数据并与JSON答案进行匹配，生成Excel文件
@@ -142,6 +144,8 @@ def import_hanzi_data(
         output_dir: 输出目录，默认为media/import_results
         test_mode: 是否为测试模式（只处理少量图片）
         status_callback: 状态更新回调函数，格式为 fn(progress, message)
+        ocr_mode: 识别方式，detect（检测+识别）或 recognize（跳过检测，整张图作为一个字识别），默认见 settings.HANZI_OCR_MODE
+        ocr_workers: 识别进程数，大于 1 时多进程并行识别，默认见 settings.HANZI_OCR_WORKERS
         
     Returns:
         包含更多信息的结果字典
@@ -224,75 +228,57 @@ def import_hanzi_data(
         log_file.write(f"总图片数量: {total_count}\n\n")
         log_file.write("===== 处理失败的图片 =====\n\n")
     
-    # 进度计算变量
-    last_progress_update = 0
-    update_interval = max(1, min(total_count // 20, 5))  # 至少有20个进度更新点
-    
-    # 处理每个图片
-    for index, image_file in enumerate(image_files):
-        # 更新进度（约每5%更新一次）
-        current_progress = int(25 + (index / total_count) * 70)  # 进度从25%到95%
-        if current_progress >= last_progress_update + 2 or index % update_interval == 0:
-            update_status(current_progress, f"正在处理第 {index+1}/{total_count} 个图片 ({(index/total_count*100):.1f}%)...")
-            last_progress_update = current_progress
-        
-        img_path = os.path.join(image_folder_path, image_file)
-        file_name_without_ext = os.path.splitext(image_file)[0]
-        
-        # 识别文字
-        try:
-            # 使用recognition.py中的recognize_hanzi函数进行识别
-            recognition_result = recognize_hanzi(img_path)
-            
-            # 处理返回结果
-            if isinstance(recognition_result, tuple) and len(recognition_result) >= 2:
-                recognized_char = recognition_result[0]
-                variant = recognition_result[1]
-            else:
-                recognized_char = str(recognition_result)
-                variant = "简体"  # 默认变体类型
-            
-            # 验证识别结果
-            if not recognized_char or recognized_char == "识别失败" :
-                logger.warning(f"图片识别结果无效: {image_file}")
-                failed_count += 1
-                failed_files.append((image_file, "汉字识别失败"))
-                
-            else:
-                # 成功识别，创建结果行
-                result_row = {
-                    'character': recognized_char,
-                    'structure': "未知结构",  # 默认结构
-                    'variant': variant,
-                    'level': "D",  # 默认等级
-                    'comment': "无",  # 默认评论
-                    'image_path': file_name_without_ext,
-                    'file_name': file_name_without_ext
-                }
-                success_count += 1
-            
-            # 获取level数据
-            level_value = get_json_value(level_data, image_file)
-            if level_value:
-                logger.info(f"文件 {image_file} 的等级值: {level_value}")
-                result_row['level'] = level_value
-            
-            # 获取comment数据
-            comment_value = get_json_value(comment_data, image_file)
-            if comment_value:
-                logger.info(f"文件 {image_file} 的评论值: {comment_value}")
-                result_row['comment'] = comment_value
-            
-            results.append(result_row)
-            
-        except Exception as e:
-            logger.error(f"图片识别异常: {image_file}, 错误: {str(e)}")
+    # 按批识别：每完成一批更新一次进度；缓存命中的图片最先返回，多进程时各批按完成顺序返回，按下标放回原位置
+    recognitions = [None] * total_count
+    done_count = 0
+    image_paths = [os.path.join(image_folder_path, f) for f in image_files]
+    for indexes, batch in iter_recognitions(image_paths, mode=ocr_mode, workers=ocr_workers):
+        for index, recognition in zip(indexes, batch):
+            recognitions[index] = recognition
+        done_count += len(batch)
+        current_progress = int(25 + (done_count / total_count) * 70)  # 进度从25%到95%
+        update_status(current_progress, f"已识别 {done_count}/{total_count} 个图片 ({(done_count/total_count*100):.1f}%)...")
+
+    for image_file, recognition in zip(image_files, recognitions):
+        if recognition.error:
+            logger.error(f"图片识别异常: {image_file}, 错误: {str(recognition.error)}")
             failed_count += 1
-            failed_files.append((image_file, str(e)))
-            
-            # 如果识别失败，跳过当前图片
+            failed_files.append((image_file, str(recognition.error)))
             continue
-    
+
+        # 验证识别结果
+        if not recognition.character or recognition.character == "识别失败":
+            logger.warning(f"图片识别结果无效: {image_file}")
+            failed_count += 1
+            failed_files.append((image_file, "汉字识别失败"))
+            continue
+
+        file_name_without_ext = os.path.splitext(image_file)[0]
+        result_row = {
+            'character': recognition.character,
+            'structure': "未知结构",  # 默认结构
+            'variant': recognition.variant,
+            'level': "D",  # 默认等级
+            'comment': "无",  # 默认评论
+            'image_path': file_name_without_ext,
+            'file_name': file_name_without_ext
+        }
+        success_count += 1
+
+        # 获取level数据
+        level_value = get_json_value(level_data, image_file)
+        if level_value:
+            logger.info(f"文件 {image_file} 的等级值: {level_value}")
+            result_row['level'] = level_value
+
+        # 获取comment数据
+        comment_value = get_json_value(comment_data, image_file)
+        if comment_value:
+            logger.info(f"文件 {image_file} 的评论值: {comment_value}")
+            result_row['comment'] = comment_value
+
+        results.append(result_row)
+
     update_status(95, "正在生成Excel结果文件...")
        
     logger.info(f"处理完成：共 {total_count} 张图片，成功 {success_count} 张，失败 {failed_count} 张")
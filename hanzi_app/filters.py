@@ -0,0 +1,127 @@
+"""
+汉字列表的筛选条件、筛选结果计数缓存与分面统计
+
+列表页、导出页使用同一组筛选条件。条件先规范化为有序元组（去掉空值和“所有”，数字转为整数），
+计数和分面统计按 (数据版本号, 规范化条件) 缓存，汉字增删改时版本号递增，旧缓存自然失效。
+"""
+import logging
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .caching import read_through, versioned_key
+from .fulltext import search_hanzi
+from .models import Hanzi
+
+logger = logging.getLogger(__name__)
+
+# 计数和分面统计的缓存时间（秒）
+FILTER_CACHE_TIMEOUT = 60 * 10
+
+# 分面统计的维度，筛选下拉框显示各取值对应的记录数
+FACET_FIELDS = ('structure', 'level', 'variant', 'stroke_count')
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_filters(search='', structure='', level='', variant='', stroke_count='', ids='',
+                      stroke_count_min='', stroke_count_max='', radical=''):
+    """
+    将请求中的筛选参数规范化为元组 ((名称, 值), ...)
+    与原先的筛选逻辑一致：指定 ids 时忽略其他条件；无法解析的笔画数忽略；笔画区间需同时给出上下限
+    """
+    if ids:
+        id_list = sorted({pk.strip() for pk in str(ids).split(',') if pk.strip()})
+        return (('ids', tuple(id_list)),)
+
+    filters = []
+    search = ' '.join(str(search or '').split())
+    if search:
+        filters.append(('search', search))
+    for name, value in (('structure', structure), ('level', level), ('variant', variant)):
+        if value and value != '所有':
+            filters.append((name, value))
+    if stroke_count and stroke_count != '所有':
+        count = _int_or_none(stroke_count)
+        if count is not None:
+            filters.append(('stroke_count', count))
+    if stroke_count_min and stroke_count_max:
+        low, high = _int_or_none(stroke_count_min), _int_or_none(stroke_count_max)
+        if low is not None and high is not None:
+            filters.append(('stroke_count_range', (low, high)))
+    if radical and radical != '所有':
+        filters.append(('radical', radical))
+    return tuple(filters)
+
+
+def filter_hanzi(filters):
+    """
+    按规范化的筛选条件构建查询集
+    有搜索词时结果按相关度排序，否则不指定排序
+    """
+    conditions = dict(filters)
+    queryset = Hanzi.objects.all()
+
+    if 'ids' in conditions:
+        return queryset.filter(id__in=conditions['ids'])
+
+    for name in ('structure', 'level', 'variant', 'stroke_count', 'radical'):
+        if name in conditions:
+            queryset = queryset.filter(**{name: conditions[name]})
+    if 'stroke_count_range' in conditions:
+        queryset = queryset.filter(stroke_count__range=conditions['stroke_count_range'])
+
+    # 全文检索放在最后，保证结构化条件先缩小范围
+    if 'search' in conditions:
+        queryset = search_hanzi(queryset, conditions['search'])
+    return queryset
+
+
+def count_hanzi(filters):
+    """符合筛选条件的记录数，按数据版本号和规范化条件缓存"""
+    return read_through('filter_count', filters, lambda: filter_hanzi(filters).count(), FILTER_CACHE_TIMEOUT)
+
+
+def facet_counts(filters):
+    """
+    分面统计：结构、等级、简繁体、笔画数各取值对应的记录数
+    按四个维度 GROUP BY 一次取出组合计数，再在内存中汇总：
+    每个维度的计数只应用其他维度的已选条件（选中“左右结构”后仍能看到其他结构的数量）
+    :return: {'total': 总数, 'structure': {取值: 数量}, 'level': {...}, 'variant': {...}, 'stroke_count': {...}}
+    """
+    def load():
+        facets = _facet_counts(filters)
+        # 分面统计已得到总数，顺带写入计数缓存
+        cache.set(versioned_key('filter_count', filters), facets['total'], FILTER_CACHE_TIMEOUT)
+        return facets
+
+    return read_through('facets', filters, load, FILTER_CACHE_TIMEOUT)
+
+
+def _facet_counts(filters):
+    selected = {name: value for name, value in filters if name in FACET_FIELDS}
+    base_filters = tuple((name, value) for name, value in filters if name not in FACET_FIELDS)
+    rows = (filter_hanzi(base_filters).order_by()
+            .values_list(*FACET_FIELDS)
+            .annotate(count=Count('pk')))
+
+    facets = {name: {} for name in FACET_FIELDS}
+    total = 0
+    for row in rows:
+        values, count = dict(zip(FACET_FIELDS, row[:-1])), row[-1]
+        mismatched = [name for name in selected if values[name] != selected[name]]
+        if not mismatched:
+            total += count
+        for name in FACET_FIELDS:
+            # 只有本维度不符合（或全部符合）时计入本维度
+            if not mismatched or mismatched == [name]:
+                facets[name][values[name]] = facets[name].get(values[name], 0) + count
+
+    facets = {name: dict(sorted(counts.items())) for name, counts in facets.items()}
+    facets['total'] = total
+    return facets
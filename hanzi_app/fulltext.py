@@ -0,0 +1,277 @@
+"""
+汉字全文检索
+
+搜索框按子串匹配编号（code）、汉字、拼音和评语。LIKE '%词%' 无法使用索引，评语增多后越来越慢，
+因此按数据库选择全文检索后端：
+- mysql：InnoDB FULLTEXT 索引 + ngram 分词器，MATCH ... AGAINST 布尔模式短语查询
+- sqlite：FTS5 虚拟表 hanzi_fts，内容逐字切分，短语查询即子串匹配（任意长度）
+- like：退回 LIKE 查询，用于不支持上述功能的数据库
+可通过 settings.HANZI_SEARCH_BACKEND 指定后端，默认 'auto' 按数据库类型选择。
+检索结果带 search_rank 相关度（越大越相关），按相关度、编号排序。
+拼音检索词（guo、guō、guo1、gu*）不区分声调，通过 HanziPinyin 拼音索引匹配全部读音（含多音字）。
+"""
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Hanzi, HanziPinyin
+from .pinyin import parse_pinyin_query
+
+logger = logging.getLogger(__name__)
+
+# 已提示过不可用的后端，避免每次检索都写日志
+_unavailable_logged = set()
+
+
+def split_terms(text):
+    """按空白拆分搜索词，多个词之间为“与”的关系"""
+    return (text or '').split()
+
+
+class LikeSearchBackend:
+    """LIKE 子串匹配，不需要额外索引"""
+    name = 'like'
+
+    def available(self):
+        return True
+
+    @staticmethod
+    def like_q(term):
+        return (
+            Q(code__icontains=term) |
+            Q(character__icontains=term) |
+            Q(pinyin__icontains=term) |
+            Q(comment__icontains=term)
+        )
+
+    @classmethod
+    def like_filter(cls, queryset, term):
+        return queryset.filter(cls.like_q(term))
+
+    def match_q(self, term):
+        """单个检索词的匹配条件（不计算相关度），可与其他条件用“或”组合"""
+        return self.like_q(term)
+
+    def search(self, queryset, text):
+        for term in split_terms(text):
+            queryset = self.like_filter(queryset, term)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by('-search_rank', 'pk')
+
+    def index(self, hanzi):
+        """汉字保存后更新其索引内容"""
+
+    def remove(self, pk):
+        """汉字删除后移除其索引内容"""
+
+    def remove_many(self, pks):
+        """批量删除汉字后移除其索引内容"""
+        for pk in pks:
+            self.remove(pk)
+
+    def rebuild(self):
+        """重建全部索引内容，返回处理的记录数"""
+        return 0
+
+
+class MySQLFulltextBackend(LikeSearchBackend):
+    """
+    MySQL FULLTEXT + ngram 分词器
+    索引由 InnoDB 随写入自动维护；短于 ngram_token_size 的词无法命中 ngram 索引，退回 LIKE。
+    """
+    name = 'mysql'
+    MATCH_SQL = 'MATCH(`hanzi`.`code`, `hanzi`.`character`, `hanzi`.`pinyin`, `hanzi`.`comment`) AGAINST (%s IN BOOLEAN MODE)'
+
+    @staticmethod
+    def token_size():
+        """与 MySQL 服务器的 ngram_token_size 保持一致（默认 2，单字检索较多时建议服务器设为 1）"""
+        return getattr(settings, 'HANZI_NGRAM_TOKEN_SIZE', 2)
+
+    def search(self, queryset, text):
+        terms = split_terms(text)
+        indexed = [term for term in terms if len(term) >= self.token_size()]
+        if not indexed:
+            return super().search(queryset, text)
+
+        # 每个词作为必须出现的短语：+"词"，短语内的双引号无法转义，替换为空格
+        query = ' '.join('+"{}"'.format(term.replace('"', ' ')) for term in indexed)
+        queryset = queryset.extra(
+            select={'search_rank': self.MATCH_SQL},
+            select_params=[query],
+            where=[self.MATCH_SQL],
+            params=[query],
+        )
+        for term in terms:
+            if term not in indexed or '"' in term:
+                queryset = self.like_filter(queryset, term)
+        return queryset.order_by('-search_rank', 'pk')
+
+    def match_q(self, term):
+        if len(term) < self.token_size() or '"' in term:
+            return self.like_q(term)
+        return Q(pk__in=RawSQL(f'SELECT `hanzi`.`id` FROM `hanzi` WHERE {self.MATCH_SQL}', ['+"{}"'.format(term)]))
+
+
+class SQLiteFTS5Backend(LikeSearchBackend):
+    """
+    SQLite FTS5 全文索引
+    各字段逐字切分后写入 hanzi_fts（"shui" -> "s h u i"），短语查询 "h u" 即子串匹配；
+    原文中的空白写为占位字符，避免跨词匹配。hanzi_id（主键）整体作为一个词元，用于定位索引行。
+    """
+    name = 'sqlite'
+    TABLE = 'hanzi_fts'
+    FIELDS = ('id', 'code', 'character', 'pinyin', 'comment')
+    COLUMNS = ('code', 'character', 'pinyin', 'comment')
+    # bm25 权重，依次对应 hanzi_id 和 COLUMNS：汉字本身命中最相关，评语最弱
+    RANK_SQL = '-bm25(hanzi_fts, 0.0, 2.0, 10.0, 5.0, 1.0)'
+    # 空白占位字符（私用区），属于词元字符但不会出现在搜索词中
+    GAP = '\ue000'
+
+    def available(self):
+        return self.TABLE in connection.introspection.table_names()
+
+    @classmethod
+    def tokens(cls, value):
+        """将字段值切分为逐字词元，空白替换为占位字符"""
+        return ' '.join(cls.GAP if ch.isspace() else ch for ch in str(value or '').strip())
+
+    @staticmethod
+    def phrase(term):
+        """搜索词转为 FTS5 短语；标点等非词元字符会被分词器忽略，因此只保留字母、数字和汉字"""
+        return '"{}"'.format(' '.join(ch for ch in term if ch.isalnum()))
+
+    def search(self, queryset, text):
+        terms = split_terms(text)
+        indexed = [term for term in terms if any(ch.isalnum() for ch in term)]
+        if not indexed:
+            return super().search(queryset, text)
+
+        columns = ' '.join(self.COLUMNS)
+        query = ' AND '.join('{%s} : %s' % (columns, self.phrase(term)) for term in indexed)
+        queryset = queryset.extra(
+            select={'search_rank': self.RANK_SQL},
+            tables=[self.TABLE],
+            where=[f'{self.TABLE}.hanzi_id = hanzi.id', f'{self.TABLE} MATCH %s'],
+            params=[query],
+        )
+        # 含标点的词在索引中只能近似匹配，再用 LIKE 精确过滤
+        for term in terms:
+            if term not in indexed or not term.isalnum():
+                queryset = self.like_filter(queryset, term)
+        return queryset.order_by('-search_rank', 'pk')
+
+    def match_q(self, term):
+        if not any(ch.isalnum() for ch in term):
+            return self.like_q(term)
+        query = '{%s} : %s' % (' '.join(self.COLUMNS), self.phrase(term))
+        condition = Q(pk__in=RawSQL(f'SELECT hanzi_id FROM {self.TABLE} WHERE {self.TABLE} MATCH %s', [query]))
+        # 含标点的词在索引中只能近似匹配，再用 LIKE 精确过滤
+        return condition if term.isalnum() else condition & self.like_q(term)
+
+    def _row(self, values):
+        return [values[0]] + [self.tokens(value) for value in values[1:]]
+
+    def _delete(self, cursor, pk):
+        cursor.execute(
+            f'DELETE FROM {self.TABLE} WHERE rowid IN '
+            f'(SELECT rowid FROM {self.TABLE} WHERE {self.TABLE} MATCH %s) AND hanzi_id = %s',
+            ['hanzi_id : "{}"'.format(str(pk).replace('"', '""')), str(pk)],
+        )
+
+    def index(self, hanzi):
+        values = [getattr(hanzi, field) for field in self.FIELDS]
+        placeholders = ', '.join(['%s'] * (len(self.COLUMNS) + 1))
+        with connection.cursor() as cursor:
+            self._delete(cursor, hanzi.pk)
+            cursor.execute(
+                f"INSERT INTO {self.TABLE} (hanzi_id, {', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                self._row(values),
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            self._delete(cursor, pk)
+
+    def remove_many(self, pks):
+        # 记录较多时逐条 MATCH 定位不如按批扫描一次
+        pks = [str(pk) for pk in pks]
+        with connection.cursor() as cursor:
+            for start in range(0, len(pks), 500):
+                batch = pks[start:start + 500]
+                cursor.execute(
+                    f"DELETE FROM {self.TABLE} WHERE hanzi_id IN ({', '.join(['%s'] * len(batch))})",
+                    batch,
+                )
+
+    def rebuild(self):
+        placeholders = ', '.join(['%s'] * (len(self.COLUMNS) + 1))
+        insert_sql = f"INSERT INTO {self.TABLE} (hanzi_id, {', '.join(self.COLUMNS)}) VALUES ({placeholders})"
+        total = 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.TABLE}')
+            batch = []
+            for values in Hanzi.objects.values_list(*self.FIELDS).iterator(chunk_size=2000):
+                batch.append(self._row(values))
+                if len(batch) >= 2000:
+                    cursor.executemany(insert_sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(insert_sql, batch)
+                total += len(batch)
+            cursor.execute(f"INSERT INTO {self.TABLE} ({self.TABLE}) VALUES ('optimize')")
+        return total
+
+
+SEARCH_BACKENDS = {
+    'mysql': MySQLFulltextBackend,
+    'sqlite': SQLiteFTS5Backend,
+    'like': LikeSearchBackend,
+}
+
+
+def backend_for_vendor(vendor):
+    """数据库类型对应的全文检索后端，没有对应实现时使用 LIKE"""
+    return SEARCH_BACKENDS.get(vendor, LikeSearchBackend)()
+
+
+def get_search_backend():
+    """
+    获取当前使用的全文检索后端
+    指定的后端不可用（如 FTS5 表尚未创建）时退回 LIKE 查询
+    """
+    name = getattr(settings, 'HANZI_SEARCH_BACKEND', 'auto')
+    backend = backend_for_vendor(connection.vendor) if name == 'auto' else SEARCH_BACKENDS[name]()
+    if not backend.available():
+        if backend.name not in _unavailable_logged:
+            _unavailable_logged.add(backend.name)
+            logger.warning(f"全文检索后端 {backend.name} 不可用，使用 LIKE 查询")
+        return LikeSearchBackend()
+    return backend
+
+
+def search_hanzi(queryset, text):
+    """
+    在查询集中全文检索，结果按相关度排序并带 search_rank 字段
+    拼音检索词匹配拼音索引（含多音字读音），或者与其他检索词一样在编号、汉字、评语中全文匹配（如评语中的“an”）；
+    其余检索词交给全文检索后端
+    """
+    terms = split_terms(text)
+    if not terms:
+        return queryset
+
+    backend = get_search_backend()
+    other_terms = []
+    for term in terms:
+        query = parse_pinyin_query(term)
+        if query is None:
+            other_terms.append(term)
+            continue
+        pinyin_pks = HanziPinyin.matching(*query).values('hanzi_id')
+        queryset = queryset.filter(Q(pk__in=pinyin_pks) | backend.match_q(term))
+
+    if other_terms:
+        return backend.search(queryset, ' '.join(other_terms))
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by('-search_rank', 'pk')
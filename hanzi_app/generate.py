@@ -10,6 +10,7 @@ from django.conf import settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hanzi_project.settings')
 import django
 django.setup()
+from hanzi_app.chardata import get_char_store
 
 def generate_hanzi_image(char, size=224):
     """
@@ -39,37 +40,33 @@ def generate_hanzi_image(char, size=224):
 
 def get_pinyin(hanzi):
     """
-    获取汉字的拼音
+    获取汉字的拼音，优先使用预编译的字符数据，未收录的字符再交给 pypinyin
     :param hanzi: 输入的汉字
     :return: 汉字对应的拼音列表
     """
-    pinyin_list = pinyin(hanzi)
-    result = [p[0] for p in pinyin_list]
+    store = get_char_store()
+    result = []
+    for char in hanzi:
+        readings = store.pinyin(char)
+        if readings:
+            result.append(readings[0])
+        else:
+            result.extend(p[0] for p in pinyin(char))
     return result
 
 
 def get_stroke_order(hanzi):
     """
-    从本地文件获取汉字笔顺
+    从预编译的字符数据获取汉字笔顺
     :param hanzi: 输入的汉字
     :return: 各字符对应的笔顺列表
     """
-    stroke_data = {}
     try:
-        stroke_file_path = "Strokes.txt"  # 相对路径
-            
-        with open(stroke_file_path, "r", encoding="utf-8") as f:
-            for line in f:
-                parts = line.strip().split('\t')
-                if len(parts) >= 5:
-                    character = parts[1]
-                    strokes = parts[4]  
-                    stroke_data[character] = strokes
+        store = get_char_store()
+        return [store.stroke_order(char) for char in hanzi]
     except Exception as e:
         print(f"读取笔顺文件出错: {str(e)}")
-    
-    # 直接返回笔顺数据，无需转换
-    return [stroke_data.get(char, '') for char in hanzi]
+        return ['' for _ in hanzi]
 
 
 def get_pinyin_and_stroke(hanzi):
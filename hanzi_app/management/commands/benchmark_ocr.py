@@ -0,0 +1,92 @@
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from hanzi_app.ocr_models import registry
+from hanzi_app.recognition import DETECT, RECOGNITION_MODES, get_batch_size, load_image, recognize_batch
+
+DEFAULT_DATASET = os.path.join(settings.BASE_DIR, 'data', '提交数据集含答案')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def find_images(path, limit):
+    """递归查找图片，按路径排序后取前 limit 张"""
+    images = []
+    for root, _, files in os.walk(path):
+        images.extend(os.path.join(root, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(images)[:limit]
+
+
+class Command(BaseCommand):
+    help = '对比识别方式（检测+识别 / 仅识别）在单字图片数据集上的速度和识别结果'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=DEFAULT_DATASET, help='图片目录（递归查找 png/jpg）')
+        parser.add_argument('--limit', type=int, default=500, help='最多识别的图片数')
+        parser.add_argument('--batch-size', type=int, default=None, help='每批图片数，默认 HANZI_OCR_BATCH_SIZE')
+        parser.add_argument('--answers', help=(
+            '汉字标注 JSON，格式 {"文件名": "汉字"}，提供时计算准确率。'
+            '数据集中的 answer.json 是 A/B/C 等级而不是汉字标注，不能用于此参数；'
+            '数据集没有汉字标注，不提供时只报告各识别方式与检测+识别结果的一致率'))
+
+    def handle(self, *args, **options):
+        paths = find_images(options['path'], options['limit'])
+        if not paths:
+            raise CommandError(f"没有找到图片: {options['path']}")
+        answers = {}
+        if options['answers']:
+            with open(options['answers'], encoding='utf-8') as f:
+                answers = json.load(f)
+            if not isinstance(answers, dict) or any(not isinstance(value, str) or len(value) != 1 or value.isascii()
+                                                     for value in answers.values()):
+                raise CommandError('--answers 的取值必须是单个汉字（数据集的 answer.json 是等级，不是汉字标注）')
+
+        # 图片预先读入内存、模型预先加载、不使用识别缓存，计时只包含识别本身
+        images = [load_image(path) for path in paths]
+        registry.preload()
+        recognize_batch(images[:1], mode=DETECT, use_cache=False)
+        self.stdout.write(f"图片: {len(images)} 张，目录: {options['path']}\n")
+
+        batch_size = options['batch_size'] or get_batch_size()
+        outputs = {}
+        for mode in RECOGNITION_MODES:
+            start = time.perf_counter()
+            timings = []
+            results = []
+            for offset in range(0, len(images), batch_size):
+                batch = images[offset:offset + batch_size]
+                batch_start = time.perf_counter()
+                results.extend(recognize_batch(batch, batch_size, mode, use_cache=False))
+                timings.append((time.perf_counter() - batch_start) * 1000 / len(batch))
+            outputs[mode] = results
+            self.report(mode, paths, results, time.perf_counter() - start, timings, answers)
+
+        self.compare(outputs)
+
+    def report(self, mode, paths, results, seconds, timings, answers):
+        failed = sum(1 for result in results if result.error)
+        confidences = [result.confidence for result in results if not result.error]
+        self.stdout.write(self.style.MIGRATE_HEADING(mode))
+        self.stdout.write(f"  总耗时: {seconds:.2f}秒, {len(results) / seconds:.1f} 张/秒, "
+                          f"每张中位数 {statistics.median(timings):.1f}ms")
+        self.stdout.write(f"  未识别: {failed} 张, 平均可信度: {statistics.mean(confidences) if confidences else 0:.3f}, "
+                          f"繁体: {sum(1 for result in results if result.variant == '繁体')} 张")
+        if answers:
+            labelled = [(answers[os.path.basename(path)], result) for path, result in zip(paths, results)
+                        if os.path.basename(path) in answers]
+            correct = sum(1 for answer, result in labelled if result.character == answer)
+            self.stdout.write(f"  准确率: {correct}/{len(labelled)} ({correct / max(len(labelled), 1):.1%})")
+        self.stdout.write('')
+
+    def compare(self, outputs):
+        """以检测+识别的结果为参照，统计其他方式结果一致的比例"""
+        reference = outputs[DETECT]
+        for mode, results in outputs.items():
+            if mode == DETECT:
+                continue
+            same = sum(1 for a, b in zip(reference, results) if a.character == b.character)
+            self.stdout.write(f"{mode} 与 {DETECT} 识别结果一致: {same}/{len(results)} ({same / len(results):.1%})")
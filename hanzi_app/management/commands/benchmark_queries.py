@@ -0,0 +1,104 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from hanzi_app.models import Hanzi
+
+STRUCTURES = [choice for choice, _ in Hanzi.STRUCTURE_CHOICES]
+LEVELS = [choice for choice, _ in Hanzi.LEVEL_CHOICES]
+VARIANTS = [choice for choice, _ in Hanzi.VARIANT_CHOICES]
+RADICALS = ['氵', '木', '艹', '口', '扌', '亻', '女', '心']
+
+
+def query_shapes():
+    """
+    需要关注的查询形态：(名称, 查询集, 执行方式)
+    与 views.index（游标分页）、filters.filter_hanzi、导出以及按字查找保持一致
+    """
+    page = 21  # 每页 20 条，多取 1 条判断是否有下一页
+    return [
+        ('列表首页', Hanzi.objects.order_by('pk')[:page], list),
+        ('结构+等级 游标翻页', Hanzi.objects.filter(structure='左右结构', level='B', pk__gt='10500').order_by('pk')[:page], list),
+        ('等级+简繁体', Hanzi.objects.filter(level='A', variant='繁体').order_by('pk')[:page], list),
+        ('笔画数', Hanzi.objects.filter(stroke_count=12).order_by('pk')[:page], list),
+        ('部首', Hanzi.objects.filter(radical='氵').order_by('pk')[:page], list),
+        ('结构计数', Hanzi.objects.filter(structure='上下结构'), lambda qs: qs.count()),
+        ('导出 笔画区间计数', Hanzi.objects.filter(stroke_count__range=(5, 8)), lambda qs: qs.count()),
+        ('按字查找', Hanzi.objects.filter(character='水'), list),
+        ('批量字样本数', Hanzi.objects.filter(character__in=list('水木火土金日月山石田'))
+            .values_list('character').annotate(count=Count('id')).order_by(), list),
+    ]
+
+
+class Command(BaseCommand):
+    help = '在临时测试库中生成大量汉字数据，输出常用筛选查询的执行计划和耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help='生成的汉字记录数（最多 70000）')
+        parser.add_argument('--repeat', type=int, default=20, help='每个查询重复执行的次数')
+        parser.add_argument('--seed', type=int, default=42, help='随机数种子')
+
+    def handle(self, *args, **options):
+        rows = min(options['rows'], 70000)
+        repeat = max(options['repeat'], 1)
+
+        # 在独立的测试库中进行，避免写入正式数据
+        old_name = connection.settings_dict['NAME']
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        self.stdout.write(f"测试库: {test_name}")
+        try:
+            self.seed(rows, options['seed'])
+            for name, queryset, execute in query_shapes():
+                self.report(name, queryset, execute, repeat)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, rows, seed):
+        """按结构分配编号（结构前缀 + 4 位序号），其余字段随机生成"""
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        batch = []
+        for n in range(rows):
+            structure_index = n % len(STRUCTURES)
+            hanzi_id = f"{structure_index}{n // len(STRUCTURES):04d}"
+            batch.append(Hanzi(
+                id=hanzi_id,
+                code=hanzi_id,
+                character=chr(0x4E00 + rng.randrange(20902)),
+                image_path='',
+                stroke_count=rng.randint(1, 30),
+                structure=STRUCTURES[structure_index],
+                level=rng.choice(LEVELS),
+                variant=rng.choice(VARIANTS),
+                radical=rng.choice(RADICALS),
+            ))
+            if len(batch) >= 5000:
+                Hanzi.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Hanzi.objects.bulk_create(batch)
+
+        # 更新统计信息，让优化器按真实数据分布选择索引
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute('ANALYZE TABLE hanzi')
+            else:
+                cursor.execute('ANALYZE')
+        self.stdout.write(f"已生成 {rows} 条记录，耗时 {time.perf_counter() - start:.2f}秒\n")
+
+    def report(self, name, queryset, execute, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            execute(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(f"  SQL: {queryset.query}")
+        for line in queryset.explain().splitlines():
+            self.stdout.write(f"  {line}")
+        self.stdout.write(f"  耗时: 中位数 {statistics.median(timings):.2f}ms, 最小 {min(timings):.2f}ms\n")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from hanzi_app.caching import CACHE_NAMESPACES, cache_stats, get_data_version, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = '查看读穿缓存各命名空间的命中次数和命中率'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='输出后清零统计')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"数据版本号: {get_data_version()}")
+        for namespace, stats in cache_stats().items():
+            self.stdout.write(
+                f"{CACHE_NAMESPACES[namespace]}({namespace}): 命中 {stats['hits']}，未命中 {stats['misses']}，"
+                f"命中率 {stats['hit_rate']:.1%}"
+            )
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('已清零命中统计'))
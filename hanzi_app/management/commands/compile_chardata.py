@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hanzi_app.chardata import CharacterStore
+
+
+class Command(BaseCommand):
+    help = '将笔顺、笔画数、部首和拼音编译为按码位索引的字符数据文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='即使源文件未变化也重新编译')
+
+    def handle(self, *args, **options):
+        store = CharacterStore()
+        start = time.time()
+        path, compiled = store.compile(force=options['force'])
+
+        if not compiled:
+            self.stdout.write(f"字符数据已是最新: {path}")
+            return
+
+        count = sum(1 for _ in store.characters())
+        self.stdout.write(self.style.SUCCESS(
+            f"已编译 {count} 个字符到 {path}，耗时 {time.time() - start:.2f} 秒"
+        ))
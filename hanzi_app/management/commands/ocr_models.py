@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from hanzi_app.ocr_models import OCR_LANGUAGES, current_rss, registry
+
+
+def format_bytes(value):
+    return '未知' if value is None else f"{value / 1024 / 1024:.1f}MB"
+
+
+class Command(BaseCommand):
+    help = '在当前进程中加载 OCR 识别模型，输出每个模型的加载耗时和常驻内存增量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('languages', nargs='*', default=list(OCR_LANGUAGES),
+                            help=f"要加载的语言模型，默认 {' '.join(OCR_LANGUAGES)}")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"加载前 RSS: {format_bytes(current_rss())}")
+        # 命令行中加载属于预期用途，不提示“worker 之外加载”
+        registry.in_worker = True
+        registry.preload(options['languages'])
+        for language, stats in registry.stats().items():
+            self.stdout.write(
+                f"{language}: 耗时 {stats['load_seconds']:.2f}秒，"
+                f"RSS 增加 {format_bytes(stats['rss_delta_bytes'])}，加载后 RSS {format_bytes(stats['rss_bytes'])}"
+            )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hanzi_app.caching import bump_data_version
+from hanzi_app.fulltext import get_search_backend
+from hanzi_app.models import Hanzi, HanziPinyin, HanziStroke
+
+
+class Command(BaseCommand):
+    help = '重建汉字的派生检索数据（笔画倒排索引、笔画编码、拼音索引、全文索引），用于批量写入绕过了模型信号的场景'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批处理的汉字数量')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+
+        with transaction.atomic():
+            HanziStroke.objects.all().delete()
+            HanziPinyin.objects.all().delete()
+            postings = []
+            readings = []
+            packed = []
+            fields = ('id', 'character', 'pinyin', 'stroke_order', 'stroke_codes')
+            for hanzi in Hanzi.objects.only(*fields).iterator(chunk_size=batch_size):
+                postings.extend(HanziStroke.build_postings(hanzi))
+                readings.extend(HanziPinyin.build_postings(hanzi))
+                stroke_codes = Hanzi.pack_stroke_order(hanzi.stroke_order)
+                if bytes(hanzi.stroke_codes or b'') != stroke_codes:
+                    hanzi.stroke_codes = stroke_codes
+                    packed.append(hanzi)
+                total += 1
+                if len(postings) >= batch_size:
+                    HanziStroke.objects.bulk_create(postings)
+                    postings = []
+                if len(readings) >= batch_size:
+                    HanziPinyin.objects.bulk_create(readings)
+                    readings = []
+                if len(packed) >= batch_size:
+                    Hanzi.objects.bulk_update(packed, ['stroke_codes'])
+                    packed = []
+            if postings:
+                HanziStroke.objects.bulk_create(postings)
+            if readings:
+                HanziPinyin.objects.bulk_create(readings)
+            if packed:
+                Hanzi.objects.bulk_update(packed, ['stroke_codes'])
+            get_search_backend().rebuild()
+
+        # 通知各进程重建依赖汉字数据的内存索引
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"已重建 {total} 个汉字的检索数据"))
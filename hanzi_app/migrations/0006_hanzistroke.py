@@ -0,0 +1,54 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:00
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_stroke_index(apps, schema_editor):
+    """为已有汉字记录生成笔画倒排索引"""
+    Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+    HanziStroke = apps.get_model('hanzi_app', 'HanziStroke')
+    separators = re.compile(r'[,，、\s]+')
+
+    batch = []
+    for hanzi_id, stroke_order in Hanzi.objects.values_list('id', 'stroke_order').iterator(chunk_size=2000):
+        if not stroke_order:
+            continue
+        tokens = [t.strip('\'"') for t in separators.split(stroke_order.strip().strip('[]')) if t.strip('\'"')]
+        for stroke, count in Counter(tokens).items():
+            batch.append(HanziStroke(hanzi_id=hanzi_id, stroke=stroke, count=count))
+        if len(batch) >= 5000:
+            HanziStroke.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        HanziStroke.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0005_fix_hanzi_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HanziStroke',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stroke', models.CharField(max_length=20, verbose_name='笔画')),
+                ('count', models.PositiveSmallIntegerField(default=1, verbose_name='出现次数')),
+                ('hanzi', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stroke_postings', to='hanzi_app.hanzi', verbose_name='汉字')),
+            ],
+            options={
+                'verbose_name': '笔画索引',
+                'verbose_name_plural': '笔画索引',
+                'db_table': 'hanzi_stroke',
+                'unique_together': {('hanzi', 'stroke')},
+                'indexes': [models.Index(fields=['stroke', 'count', 'hanzi'], name='hanzi_stroke_posting_idx')],
+            },
+        ),
+        migrations.RunPython(build_stroke_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:00
+
+import re
+
+from django.db import migrations, models
+
+
+# 迁移时的笔画编码表，与 hanzi_app.strokes.STROKE_TYPES 一致，固定在迁移中避免后续修改影响历史迁移
+STROKE_TYPES = ['横', '竖', '点', '撇', '横折',
+                '捺', '横撇/横钩', '提', '横折钩', '撇折',
+                '竖钩', '竖弯钩', '竖折/竖弯', '竖提', '斜钩',
+                '撇点', '竖折折钩', '横折弯钩/横斜钩', '横折折折钩/横撇弯钩', '横折折撇',
+                '弯钩', '横折折/横折弯', '横折提', '竖折撇/竖折折', '横折折折']
+
+
+def pack_existing_stroke_orders(apps, schema_editor):
+    """将已有记录的笔顺规范为 "横,竖" 形式并写入笔画编码"""
+    Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+    codes = {name: code for code, name in enumerate(STROKE_TYPES, start=1)}
+    separators = re.compile(r'[,，、\s]+')
+
+    batch = []
+    for hanzi in Hanzi.objects.only('id', 'stroke_order').iterator(chunk_size=2000):
+        if not hanzi.stroke_order:
+            continue
+        strokes = [t.strip('\'"') for t in separators.split(hanzi.stroke_order.strip().strip('[]')) if t.strip('\'"')]
+        if not strokes or any(stroke not in codes for stroke in strokes):
+            continue
+        hanzi.stroke_order = ','.join(strokes)
+        hanzi.stroke_codes = bytes(codes[stroke] for stroke in strokes)
+        batch.append(hanzi)
+        if len(batch) >= 2000:
+            Hanzi.objects.bulk_update(batch, ['stroke_order', 'stroke_codes'])
+            batch = []
+    if batch:
+        Hanzi.objects.bulk_update(batch, ['stroke_order', 'stroke_codes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0006_hanzistroke'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hanzi',
+            name='stroke_codes',
+            field=models.BinaryField(blank=True, default=b'', editable=False, verbose_name='笔顺编码'),
+        ),
+        migrations.RunPython(pack_existing_stroke_orders, migrations.RunPython.noop),
+    ]
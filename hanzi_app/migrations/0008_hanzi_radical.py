@@ -0,0 +1,59 @@
+# Generated by Django 4.2.11 on 2026-10-18 12:00
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def load_radicals():
+    """
+    读取 Strokes.txt（序号、汉字、部首、笔画数、笔顺，制表符分隔）中的部首
+    解析逻辑固定在迁移中，不依赖以后可能变化的 chardata 模块
+    :return: {汉字: 部首}
+    """
+    path = getattr(settings, 'HANZI_STROKES_FILE', os.path.join(settings.BASE_DIR, 'Strokes.txt'))
+    radicals = {}
+    if not os.path.exists(path):
+        return radicals
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) > 2 and len(parts[1]) == 1 and len(parts[2]) == 1:
+                radicals[parts[1]] = parts[2]
+    return radicals
+
+
+def fill_radicals(apps, schema_editor):
+    """按字符字典（Strokes.txt 第三列）为已有记录填写部首"""
+    Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+    radicals = load_radicals()
+
+    batch = []
+    for hanzi in Hanzi.objects.only('id', 'character').iterator(chunk_size=2000):
+        radical = radicals.get(hanzi.character)
+        if not radical:
+            continue
+        hanzi.radical = radical
+        batch.append(hanzi)
+        if len(batch) >= 2000:
+            Hanzi.objects.bulk_update(batch, ['radical'])
+            batch = []
+    if batch:
+        Hanzi.objects.bulk_update(batch, ['radical'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0007_hanzi_stroke_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hanzi',
+            name='radical',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=10, verbose_name='部首'),
+        ),
+        migrations.RunPython(fill_radicals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0008_hanzi_radical'),
+    ]
+
+    operations = [
+        # 部首单列索引改为 (radical, id) 组合索引，按部首筛选时可直接按主键顺序读取
+        migrations.AlterField(
+            model_name='hanzi',
+            name='radical',
+            field=models.CharField(blank=True, default='', max_length=10, verbose_name='部首'),
+        ),
+        migrations.AddIndex(
+            model_name='hanzi',
+            index=models.Index(fields=['character'], name='hanzi_character_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hanzi',
+            index=models.Index(fields=['structure', 'level', 'id'], name='hanzi_structure_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hanzi',
+            index=models.Index(fields=['level', 'variant', 'id'], name='hanzi_level_variant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hanzi',
+            index=models.Index(fields=['stroke_count', 'id'], name='hanzi_stroke_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hanzi',
+            index=models.Index(fields=['radical', 'id'], name='hanzi_radical_idx'),
+        ),
+    ]
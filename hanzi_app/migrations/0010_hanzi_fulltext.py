@@ -0,0 +1,67 @@
+# Generated by Django 4.2.11 on 2026-10-18 14:00
+
+from django.db import migrations
+
+
+# 以下建表语句和切分逻辑固定在迁移中（与迁移时的 hanzi_app.fulltext 相同），不随该模块以后的变化而变化
+MYSQL_INDEX_NAME = 'hanzi_fulltext_idx'
+FTS_TABLE = 'hanzi_fts'
+FTS_COLUMNS = ('code', 'character', 'pinyin', 'comment')
+# 空白占位字符（私用区）
+FTS_GAP = '\ue000'
+
+
+def fts_tokens(value):
+    """将字段值切分为逐字词元，空白替换为占位字符"""
+    return ' '.join(FTS_GAP if ch.isspace() else ch for ch in str(value or '').strip())
+
+
+def create_fulltext_index(apps, schema_editor):
+    """按数据库类型创建全文索引：MySQL 为 ngram FULLTEXT 索引，SQLite 为 FTS5 虚拟表（此时编号即主键）"""
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        with connection.cursor() as cursor:
+            # ngram 分词器会丢弃包含停用词的词元（如包含 a 的拼音），建索引时关闭停用词
+            cursor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+            cursor.execute(
+                f'ALTER TABLE `hanzi` ADD FULLTEXT INDEX `{MYSQL_INDEX_NAME}` '
+                f'(`id`, `character`, `pinyin`, `comment`) WITH PARSER ngram'
+            )
+    elif connection.vendor == 'sqlite':
+        Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+        placeholders = ', '.join(['%s'] * (len(FTS_COLUMNS) + 1))
+        insert_sql = f"INSERT INTO {FTS_TABLE} (hanzi_id, {', '.join(FTS_COLUMNS)}) VALUES ({placeholders})"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"hanzi_id, {', '.join(FTS_COLUMNS)}, tokenize='unicode61 remove_diacritics 0')"
+            )
+            batch = []
+            rows = Hanzi.objects.values_list('id', 'id', 'character', 'pinyin', 'comment').iterator(chunk_size=2000)
+            for values in rows:
+                batch.append([values[0]] + [fts_tokens(value) for value in values[1:]])
+                if len(batch) >= 2000:
+                    cursor.executemany(insert_sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(insert_sql, batch)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'ALTER TABLE `hanzi` DROP INDEX `{MYSQL_INDEX_NAME}`')
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0009_hanzi_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 4.2.11 on 2026-10-18 15:00
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# 以下读音解析逻辑固定在迁移中（与迁移时的 hanzi_app.pinyin 相同），不随该模块以后的变化而变化
+# 组合调号 -> 声调
+TONE_MARKS = {'\u0304': 1, '\u0301': 2, '\u030c': 3, '\u0300': 4}
+SEPARATORS = re.compile(r'[,，、;；/\s]+')
+READING = re.compile(r'^([a-z]+)([0-5]?)$')
+
+
+def split_reading(reading):
+    """将单个读音拆为 (无声调拼音, 声调)，未标声调时声调为 None；无法识别时返回 None"""
+    text = unicodedata.normalize('NFD', reading.strip().lower())
+    tone = None
+    letters = []
+    for ch in text:
+        if ch in TONE_MARKS:
+            tone = TONE_MARKS[ch]
+        elif ch == '\u0308':
+            if letters and letters[-1] == 'u':
+                letters[-1] = 'v'
+        else:
+            letters.append(ch)
+    match = READING.match(''.join(letters).replace('u:', 'v'))
+    if not match:
+        return None
+    if match.group(2):
+        tone = int(match.group(2)) % 5
+    return match.group(1), tone
+
+
+def parse_readings(text):
+    """解析拼音文本中的全部读音，去重并保持顺序：[(拼音, 声调), ...]"""
+    readings = []
+    for token in SEPARATORS.split(text or ''):
+        parsed = split_reading(token) if token else None
+        if not parsed:
+            continue
+        reading = (parsed[0], parsed[1] or 0)
+        if reading not in readings:
+            readings.append(reading)
+    return readings
+
+
+def dictionary_readings(character):
+    """pypinyin 给出的全部读音（多音字），未安装 pypinyin 时为空"""
+    try:
+        from pypinyin import pinyin
+    except ImportError:
+        return []
+    readings = pinyin(character, heteronym=True)
+    if not readings or not readings[0] or readings[0][0] == character:
+        return []
+    return parse_readings(','.join(readings[0]))
+
+
+def hanzi_readings(character, pinyin_text):
+    """录入的读音 + 字典中的多音字读音"""
+    readings = parse_readings(pinyin_text)
+    if character:
+        for reading in dictionary_readings(character):
+            if reading not in readings:
+                readings.append(reading)
+    return readings
+
+
+def build_pinyin_index(apps, schema_editor):
+    """为已有汉字记录生成拼音索引（录入的读音 + 字符字典中的多音字读音）"""
+    Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+    HanziPinyin = apps.get_model('hanzi_app', 'HanziPinyin')
+
+    batch = []
+    for hanzi_id, character, pinyin in Hanzi.objects.values_list('id', 'character', 'pinyin').iterator(chunk_size=2000):
+        for syllable, tone in hanzi_readings(character, pinyin):
+            batch.append(HanziPinyin(hanzi_id=hanzi_id, syllable=syllable[:10], tone=tone))
+        if len(batch) >= 5000:
+            HanziPinyin.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        HanziPinyin.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0010_hanzi_fulltext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HanziPinyin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('syllable', models.CharField(max_length=10, verbose_name='拼音')),
+                ('tone', models.PositiveSmallIntegerField(default=0, verbose_name='声调')),
+                ('hanzi', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pinyin_postings', to='hanzi_app.hanzi', verbose_name='汉字')),
+            ],
+            options={
+                'verbose_name': '拼音索引',
+                'verbose_name_plural': '拼音索引',
+                'db_table': 'hanzi_pinyin',
+                'unique_together': {('hanzi', 'syllable', 'tone')},
+                'indexes': [models.Index(fields=['syllable', 'tone', 'hanzi'], name='hanzi_pinyin_syllable_idx')],
+            },
+        ),
+        migrations.RunPython(build_pinyin_index, migrations.RunPython.noop),
+    ]
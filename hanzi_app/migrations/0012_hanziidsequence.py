@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+# 迁移时的结构前缀，与模型解耦，模型以后变化不影响本迁移
+STRUCTURE_PREFIXES = ('0', '1', '2', '3', '4', '5', '6')
+
+
+def current_max(Hanzi, prefix):
+    """该前缀下已使用的最大序号，只计入“前缀 + 4 位数字”格式的编号"""
+    for value in Hanzi.objects.filter(id__startswith=prefix).order_by('-id').values_list('id', flat=True):
+        if len(value) == 5 and value.isdigit():
+            return int(value[1:])
+    return 0
+
+
+def create_sequences(apps, schema_editor):
+    """按已有汉字的最大编号初始化各结构的序列"""
+    Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+    HanziIdSequence = apps.get_model('hanzi_app', 'HanziIdSequence')
+    HanziIdSequence.objects.bulk_create([
+        HanziIdSequence(prefix=prefix, last_value=current_max(Hanzi, prefix))
+        for prefix in STRUCTURE_PREFIXES
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0011_hanzipinyin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HanziIdSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=1, primary_key=True, serialize=False, verbose_name='编号前缀')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='已分配的最大序号')),
+            ],
+            options={
+                'verbose_name': '编号序列',
+                'verbose_name_plural': '编号序列',
+                'db_table': 'hanzi_id_sequence',
+            },
+        ),
+        migrations.RunPython(create_sequences, migrations.RunPython.noop),
+    ]
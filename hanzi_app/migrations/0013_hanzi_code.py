@@ -0,0 +1,58 @@
+# Generated by Django 4.2.11 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+def copy_ids_to_codes(apps, schema_editor):
+    """已有记录的编号沿用原主键"""
+    Hanzi = apps.get_model('hanzi_app', 'Hanzi')
+    Hanzi.objects.update(code=models.F('id'))
+
+
+def _reinstall_mysql_fulltext(schema_editor, code_column):
+    """重建 MySQL 全文索引（语句固定在迁移中，与 0010 相同）"""
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE `hanzi` DROP INDEX `hanzi_fulltext_idx`')
+        cursor.execute('SET SESSION innodb_ft_enable_stopword = OFF')
+        cursor.execute(
+            f'ALTER TABLE `hanzi` ADD FULLTEXT INDEX `hanzi_fulltext_idx` '
+            f'(`{code_column}`, `character`, `pinyin`, `comment`) WITH PARSER ngram'
+        )
+
+
+def index_codes(apps, schema_editor):
+    """MySQL 全文索引改为覆盖 code 列（SQLite FTS5 的内容此时与原来相同，无需重建）"""
+    _reinstall_mysql_fulltext(schema_editor, 'code')
+
+
+def index_ids(apps, schema_editor):
+    _reinstall_mysql_fulltext(schema_editor, 'id')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hanzi_app', '0012_hanziidsequence'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hanzi',
+            name='id',
+            field=models.CharField(max_length=5, primary_key=True, serialize=False, verbose_name='记录ID'),
+        ),
+        migrations.AddField(
+            model_name='hanzi',
+            name='code',
+            field=models.CharField(max_length=5, null=True, verbose_name='编号'),
+        ),
+        migrations.RunPython(copy_ids_to_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='hanzi',
+            name='code',
+            field=models.CharField(max_length=5, unique=True, verbose_name='编号'),
+        ),
+        migrations.RunPython(index_codes, index_ids),
+    ]
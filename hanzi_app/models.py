@@ -1,4 +1,11 @@
-from django.db import models
+from collections import Counter
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+
+from .chardata import get_char_store
+from .pinyin import hanzi_readings
+from .strokes import STROKE_TYPES, normalize_stroke_order, pack_strokes, parse_stroke_order, parse_stroke_pattern, stroke_counter
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -33,12 +40,17 @@ class Hanzi(models.Model):
         ('D', 'D'),
     ]
 
-    id = models.CharField('编号', primary_key=True, max_length=5)
+    # 主键创建后不再改变，外键、图片文件名和链接都使用主键；界面上显示的编号为 code，
+    # 结构变化时只重新分配 code，不再删除重建记录
+    id = models.CharField('记录ID', primary_key=True, max_length=5)
+    code = models.CharField('编号', max_length=5, unique=True)
     character = models.CharField('汉字', max_length=1)  
     image_path = models.CharField('图片路径', max_length=255)
     stroke_count = models.IntegerField('笔画数')
     structure = models.CharField('结构类型', max_length=20, choices=STRUCTURE_CHOICES, default='未知结构')
     stroke_order = models.CharField('笔顺', max_length=100, blank=True, null=True)
+    stroke_codes = models.BinaryField('笔顺编码', blank=True, default=b'', editable=False)
+    radical = models.CharField('部首', max_length=10, blank=True, default='')
     pinyin = models.CharField('拼音', max_length=50, blank=True, null=True)
     level = models.CharField('等级', max_length=1, choices=LEVEL_CHOICES)
     comment = models.TextField('评语', blank=True, null=True)
@@ -52,30 +64,303 @@ class Hanzi(models.Model):
         db_table = 'hanzi'
         verbose_name = '汉字数据'
         verbose_name_plural = '汉字数据'
+        # 与列表页、导出和批量查询的筛选方式对应；末尾带 id 以便按主键游标分页时直接顺序读取
+        indexes = [
+            models.Index(fields=['character'], name='hanzi_character_idx'),
+            models.Index(fields=['structure', 'level', 'id'], name='hanzi_structure_level_idx'),
+            models.Index(fields=['level', 'variant', 'id'], name='hanzi_level_variant_idx'),
+            models.Index(fields=['stroke_count', 'id'], name='hanzi_stroke_count_idx'),
+            models.Index(fields=['radical', 'id'], name='hanzi_radical_idx'),
+        ]
         
     def __str__(self):
-        return f'{self.character}({self.id})'
+        return f'{self.character}({self.code or self.id})'
+
+    def save(self, *args, **kwargs):
+        # 新建记录的编号与主键相同
+        if not self.code:
+            self.code = self.pk
+        # 笔顺文本统一为 "横,竖" 形式，并同步打包后的笔画编码
+        self.stroke_order = normalize_stroke_order(self.stroke_order)
+        self.stroke_codes = self.pack_stroke_order(self.stroke_order)
+        # 部首按字符字典取得，字典未收录的字符保留原值
+        if self.character:
+            self.radical = get_char_store().radical(self.character) or self.radical
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'stroke_order' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'stroke_codes'}
+        if update_fields is not None and 'character' in update_fields:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'radical'}
+        super().save(*args, **kwargs)
+
+    def insert(self):
+        """
+        插入新记录，主键默认与编号相同
+        主键已被其他记录占用（该记录改过结构，主键仍是旧编号）时插入失败，改用 HanziIdSequence.reserve_record_id
+        分配的主键；不预先查询主键是否存在，由插入时的主键约束判断，避免查询与插入之间被并发插入
+        """
+        self.pk = self.pk or self.code
+        try:
+            with transaction.atomic():
+                self.save(force_insert=True)
+        except IntegrityError:
+            if not Hanzi.objects.filter(pk=self.pk).exists():
+                # 不是主键冲突（如编号重复），交给调用方处理
+                raise
+            self.pk = HanziIdSequence.reserve_record_id()
+            self.save(force_insert=True)
+        return self
+
+    def change_structure(self, structure, previous=None, code=None):
+        """
+        修改结构，结构变化时按新结构重新分配编号（未保存），主键、图片文件和索引行都不变
+        :param previous: 修改前的结构；表单校验已把新结构写入实例时由调用方传入，默认取当前结构
+        :param code: 已预留的新编号（批量修改时一次预留），默认从编号序列分配
+        :return: 编号是否改变
+        """
+        previous = self.structure if previous is None else previous
+        self.structure = structure
+        if structure == previous and self.code:
+            return False
+        self.code = code or HanziIdSequence.reserve(structure)[0]
+        return True
+
+    @staticmethod
+    def pack_stroke_order(stroke_order):
+        """笔顺文本对应的笔画编码字节串，无法识别时为空"""
+        return pack_strokes(parse_stroke_order(stroke_order)) or b''
+
+    @property
+    def strokes(self):
+        """笔画名称列表"""
+        return parse_stroke_order(self.stroke_order)
 
     @classmethod
     def search_by_stroke_order(cls, stroke_pattern):
         """
         根据笔顺模式搜索汉字
-        :param stroke_pattern: 笔顺模式，如"横,竖"
+        通过 HanziStroke 倒排索引按笔画求交集，笔画重复出现时要求汉字中至少包含相应次数
+        :param stroke_pattern: 笔顺模式，如"横 竖"
         :return: 匹配的汉字QuerySet
         """
-        if not stroke_pattern:
+        pattern = Counter(parse_stroke_pattern(stroke_pattern))
+        if not pattern:
             return cls.objects.none()
-            
-        # 将搜索模式转换为列表
-        pattern_list = [p.strip() for p in stroke_pattern.split(' ')]
-        
-        # 构建查询
+
         query = cls.objects.all()
-        
-        # 对每个笔画进行过滤
-        for stroke in pattern_list:
-            if stroke:
-                # 使用包含查询，考虑到数据格式包含中括号和引号
-                query = query.filter(stroke_order__contains=stroke)
-                
-        return query
\ No newline at end of file
+
+        # 每个笔画对应一个倒排列表，逐个求交集；先用最罕见的笔画缩小范围
+        for stroke, count in sorted(pattern.items(), key=lambda item: HanziStroke.frequency_rank(item[0])):
+            postings = HanziStroke.objects.filter(stroke=stroke, count__gte=count).values('hanzi_id')
+            query = query.filter(id__in=postings)
+
+        return query
+
+
+class HanziStroke(models.Model):
+    """
+    笔画倒排索引：每个汉字记录的每种笔画一行，记录该笔画出现的次数
+    由 signals 在 Hanzi 保存和删除时维护
+    """
+    hanzi = models.ForeignKey(Hanzi, on_delete=models.CASCADE, related_name='stroke_postings', verbose_name='汉字')
+    stroke = models.CharField('笔画', max_length=20)
+    count = models.PositiveSmallIntegerField('出现次数', default=1)
+
+    class Meta:
+        db_table = 'hanzi_stroke'
+        verbose_name = '笔画索引'
+        verbose_name_plural = verbose_name
+        unique_together = [('hanzi', 'stroke')]
+        indexes = [
+            models.Index(fields=['stroke', 'count', 'hanzi'], name='hanzi_stroke_posting_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.hanzi_id}:{self.stroke}x{self.count}'
+
+    @staticmethod
+    def frequency_rank(stroke):
+        """笔画在 STROKE_TYPES 中的位置越靠后越罕见，倒排列表越短"""
+        try:
+            return -STROKE_TYPES.index(stroke)
+        except ValueError:
+            return -len(STROKE_TYPES)
+
+    @classmethod
+    def build_postings(cls, hanzi):
+        """根据汉字的笔顺生成倒排索引行（未保存）"""
+        return [
+            cls(hanzi_id=hanzi.pk, stroke=stroke, count=min(count, 32767))
+            for stroke, count in stroke_counter(hanzi.stroke_order).items()
+        ]
+
+    @classmethod
+    def reindex(cls, hanzi):
+        """重建单个汉字的倒排索引"""
+        cls.objects.filter(hanzi_id=hanzi.pk).delete()
+        cls.objects.bulk_create(cls.build_postings(hanzi))
+
+
+class HanziPinyin(models.Model):
+    """
+    拼音检索索引：每个汉字的每个读音一行，包括录入的读音和字符字典中的多音字读音
+    拼音去掉声调（ü 记作 v）单独成列并建索引，按音节或音节前缀检索时走索引范围扫描
+    由 signals 在 Hanzi 保存时维护，删除时由外键级联清理
+    """
+    hanzi = models.ForeignKey(Hanzi, on_delete=models.CASCADE, related_name='pinyin_postings', verbose_name='汉字')
+    syllable = models.CharField('拼音', max_length=10)
+    tone = models.PositiveSmallIntegerField('声调', default=0)
+
+    class Meta:
+        db_table = 'hanzi_pinyin'
+        verbose_name = '拼音索引'
+        verbose_name_plural = verbose_name
+        unique_together = [('hanzi', 'syllable', 'tone')]
+        indexes = [
+            models.Index(fields=['syllable', 'tone', 'hanzi'], name='hanzi_pinyin_syllable_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.hanzi_id}:{self.syllable}{self.tone or ""}'
+
+    @classmethod
+    def build_postings(cls, hanzi):
+        """根据汉字的读音生成索引行（未保存）"""
+        return [
+            cls(hanzi_id=hanzi.pk, syllable=syllable[:10], tone=tone)
+            for syllable, tone in hanzi_readings(hanzi.character, hanzi.pinyin)
+        ]
+
+    @classmethod
+    def reindex(cls, hanzi):
+        """重建单个汉字的拼音索引"""
+        cls.objects.filter(hanzi_id=hanzi.pk).delete()
+        cls.objects.bulk_create(cls.build_postings(hanzi))
+
+    @classmethod
+    def matching(cls, syllable, tone=None, prefix=False):
+        """
+        按拼音匹配的索引行
+        前缀匹配用 [前缀, 前缀末字母+1) 的范围条件，不依赖 LIKE 优化，各数据库都能走索引
+        """
+        if prefix:
+            upper = syllable[:-1] + chr(ord(syllable[-1]) + 1)
+            postings = cls.objects.filter(syllable__gte=syllable, syllable__lt=upper)
+        else:
+            postings = cls.objects.filter(syllable=syllable)
+        if tone is not None:
+            postings = postings.filter(tone=tone)
+        return postings
+
+
+class HanziIdSequence(models.Model):
+    """
+    按结构分配编号的序列：编号为结构前缀 + 4 位序号，每个前缀一行记录已分配的最大序号
+    分配时在事务中用一条 UPDATE 原子递增，行锁保证并发分配不会重复；一次可预留一段连续编号
+    """
+    # 结构类型 -> 编号前缀
+    STRUCTURE_PREFIXES = {
+        '未知结构': '0',
+        '左右结构': '1',
+        '上下结构': '2',
+        '包围结构': '3',
+        '独体结构': '4',
+        '品字结构': '5',
+        '穿插结构': '6',
+    }
+    # 序号为 4 位数字
+    MAX_VALUE = 9999
+    # 记录主键的前缀：新记录的主键默认与编号相同，与已有主键冲突时从该序列另行分配，不占用结构编号
+    RECORD_PREFIX = 'R'
+
+    prefix = models.CharField('编号前缀', primary_key=True, max_length=1)
+    last_value = models.PositiveIntegerField('已分配的最大序号', default=0)
+
+    class Meta:
+        db_table = 'hanzi_id_sequence'
+        verbose_name = '编号序列'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return f'{self.prefix}:{self.last_value}'
+
+    @classmethod
+    def prefix_for(cls, structure):
+        return cls.STRUCTURE_PREFIXES.get(structure, '0')
+
+    @staticmethod
+    def split_id(hanzi_id):
+        """拆分编号为 (前缀, 序号)，不是“前缀 + 4 位数字”格式时返回 None"""
+        hanzi_id = str(hanzi_id or '')
+        if len(hanzi_id) != 5 or not hanzi_id.isdigit():
+            return None
+        return hanzi_id[0], int(hanzi_id[1:])
+
+    @classmethod
+    def current_max(cls, prefix):
+        """汉字表中该前缀已使用的最大序号，主键和编号都计入（两者共用同一编号空间）"""
+        current = 0
+        for field in ('id', 'code'):
+            for value in (Hanzi.objects.filter(**{f'{field}__startswith': prefix})
+                          .order_by(f'-{field}').values_list(field, flat=True)):
+                if len(value) == 5 and value[1:].isdigit():
+                    current = max(current, int(value[1:]))
+                    break
+        return current
+
+    @classmethod
+    def _ensure(cls, prefix):
+        """序列行不存在时按汉字表中的最大序号创建（并发创建由主键约束保证只有一行）"""
+        cls.objects.get_or_create(prefix=prefix, defaults={'last_value': cls.current_max(prefix)})
+
+    @classmethod
+    def reserve(cls, structure, count=1):
+        """
+        为结构预留 count 个连续编号
+        :return: 编号列表，如 ['10016', '10017']
+        :raises ValueError: 该前缀的 4 位序号已用完
+        """
+        return cls._reserve(cls.prefix_for(structure), count, f"结构'{structure}'的编号")
+
+    @classmethod
+    def reserve_record_id(cls):
+        """分配一个记录主键（R + 4 位序号），用于编号已被其他记录用作主键的新记录"""
+        return cls._reserve(cls.RECORD_PREFIX, 1, '记录主键')[0]
+
+    @classmethod
+    def _reserve(cls, prefix, count, label):
+        with transaction.atomic():
+            if not cls.objects.filter(prefix=prefix).update(last_value=F('last_value') + count):
+                cls._ensure(prefix)
+                cls.objects.filter(prefix=prefix).update(last_value=F('last_value') + count)
+            # UPDATE 持有行锁直至事务结束，此处读到的是本次递增后的值
+            last_value = cls.objects.filter(prefix=prefix).values_list('last_value', flat=True).get()
+            if last_value > cls.MAX_VALUE:
+                # 抛出异常使递增随事务回滚
+                raise ValueError(f"{label}已用完")
+        return [f'{prefix}{value:04d}' for value in range(last_value - count + 1, last_value + 1)]
+
+    @classmethod
+    def peek(cls, structure):
+        """
+        该结构下一个将分配的编号，只读不占用（用于表单预览，提交时以 reserve 分配的编号为准）
+        :raises ValueError: 该前缀的 4 位序号已用完
+        """
+        prefix = cls.prefix_for(structure)
+        last_value = cls.objects.filter(prefix=prefix).values_list('last_value', flat=True).first()
+        if last_value is None:
+            last_value = cls.current_max(prefix)
+        if last_value >= cls.MAX_VALUE:
+            raise ValueError(f"结构'{structure}'的编号已用完")
+        return f'{prefix}{last_value + 1:04d}'
+
+    @classmethod
+    def advance(cls, hanzi_id):
+        """使用了指定编号（导入、手工录入）后，保证序列不小于该序号，之后分配的编号不会与其冲突"""
+        parsed = cls.split_id(hanzi_id)
+        if not parsed:
+            return
+        prefix, value = parsed
+        if not cls.objects.filter(prefix=prefix).exists():
+            cls._ensure(prefix)
+        cls.objects.filter(prefix=prefix, last_value__lt=value).update(last_value=value)
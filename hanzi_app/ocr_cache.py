@@ -0,0 +1,166 @@
+"""
+汉字识别结果缓存
+
+用户修改等级、评语 JSON 后常常重新上传同一个（或部分重复的）ZIP，每张图片都要再识别一遍。
+识别结果按 (图片内容哈希, 识别引擎版本) 持久缓存，保存汉字、字体类型和可信度；命中时不再加载图片和模型。
+引擎版本包含 easyocr 版本、识别方式和判定阈值（见 recognition.engine_version），任何一项变化旧结果都不再使用。
+只缓存识别成功的结果。
+
+存储由 settings.HANZI_OCR_CACHE 选择：
+    'sqlite'（默认）：本地 SQLite 文件 HANZI_OCR_CACHE_PATH（默认 data/cache/ocr_recognition.sqlite3）
+    'redis'：Django 缓存 HANZI_OCR_CACHE_ALIAS（默认 default，即 Redis），不过期
+    None/False：不缓存
+缓存读写出错时记录警告并按未命中处理，不影响识别。
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# 读取图片计算哈希的块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# SQLite 单条 IN 查询的最大参数个数
+SQLITE_BATCH_SIZE = 500
+
+
+def content_hash(item):
+    """
+    图片内容哈希：路径按文件字节计算，numpy 数组按形状、类型和像素计算
+    文件无法读取时返回 None（由识别时报告加载错误）
+    """
+    digest = hashlib.sha256()
+    if hasattr(item, 'tobytes'):
+        digest.update(f"array:{item.shape}:{item.dtype}:".encode())
+        digest.update(item.tobytes())
+        return digest.hexdigest()
+    try:
+        with open(item, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def cache_key(item, engine):
+    digest = content_hash(item)
+    if digest is None:
+        return None
+    return hashlib.sha256(f"{engine}:{digest}".encode()).hexdigest()
+
+
+class SQLiteRecognitionCache:
+    """本地 SQLite 文件中的识别结果，每个线程使用各自的连接"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            # WAL 模式下读写互不阻塞，多个进程同时导入时也可用
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS recognition ('
+                'key TEXT PRIMARY KEY, character TEXT NOT NULL, variant TEXT NOT NULL, confidence REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, keys):
+        connection = self._connection()
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), SQLITE_BATCH_SIZE):
+            batch = keys[start:start + SQLITE_BATCH_SIZE]
+            rows = connection.execute(
+                f"SELECT key, character, variant, confidence FROM recognition WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            found.update((key, (character, variant, confidence)) for key, character, variant, confidence in rows)
+        return found
+
+    def set_many(self, entries):
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO recognition (key, character, variant, confidence) VALUES (?, ?, ?, ?)',
+                [(key, *value) for key, value in entries.items()],
+            )
+
+
+class DjangoRecognitionCache:
+    """Django 缓存（Redis）中的识别结果，不过期"""
+
+    KEY_PREFIX = 'hanzi:ocr:'
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def get_many(self, keys):
+        found = caches[self.alias].get_many([self.KEY_PREFIX + key for key in keys])
+        return {key[len(self.KEY_PREFIX):]: value for key, value in found.items()}
+
+    def set_many(self, entries):
+        caches[self.alias].set_many({self.KEY_PREFIX + key: value for key, value in entries.items()}, timeout=None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_recognition_cache():
+    """按配置创建的识别结果缓存，未启用时返回 None"""
+    global _cache
+    backend = getattr(settings, 'HANZI_OCR_CACHE', 'sqlite')
+    if not backend:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            if backend == 'redis':
+                _cache = DjangoRecognitionCache(getattr(settings, 'HANZI_OCR_CACHE_ALIAS', 'default'))
+            elif backend == 'sqlite':
+                _cache = SQLiteRecognitionCache(getattr(
+                    settings, 'HANZI_OCR_CACHE_PATH',
+                    os.path.join(settings.BASE_DIR, 'data', 'cache', 'ocr_recognition.sqlite3')))
+            else:
+                raise ValueError(f"不支持的识别缓存: {backend}")
+        return _cache
+
+
+def lookup(items, engine):
+    """
+    查找已缓存的识别结果
+    :return: (与 items 对应的缓存键列表（无法读取的文件为 None）, {下标: (汉字, 字体类型, 可信度)})
+    """
+    recognition_cache = get_recognition_cache()
+    if recognition_cache is None:
+        return [None] * len(items), {}
+    keys = [cache_key(item, engine) for item in items]
+    try:
+        found = recognition_cache.get_many({key for key in keys if key})
+    except Exception as e:
+        logger.warning(f"读取识别缓存失败: {e}")
+        return keys, {}
+    return keys, {index: found[key] for index, key in enumerate(keys) if key in found}
+
+
+def store(entries):
+    """保存识别结果 {缓存键: (汉字, 字体类型, 可信度)}"""
+    recognition_cache = get_recognition_cache()
+    if recognition_cache is None or not entries:
+        return
+    try:
+        recognition_cache.set_many(entries)
+    except Exception as e:
+        logger.warning(f"写入识别缓存失败: {e}")
@@ -0,0 +1,122 @@
+"""
+OCR 识别模型注册表
+
+easyocr 及其依赖的 torch 导入慢、模型常驻内存大，而识别只在 Celery 导入任务中使用。
+原先 recognition 模块导入时就创建两个 Reader，web 进程通过 views -> data_importer -> recognition
+的导入链也会加载全部模型。现在模型按语言在第一次使用时加载，每个进程每种语言最多加载一次，
+并记录加载耗时和常驻内存（RSS）增量。
+
+Celery worker 子进程启动时（worker_process_init）按 settings.HANZI_OCR_PRELOAD 预加载，
+使第一个任务不必等待模型加载；web 进程中一般不会加载，如被调用会记录警告。
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 识别使用的语言模型
+SIMPLIFIED = 'ch_sim'
+TRADITIONAL = 'ch_tra'
+OCR_LANGUAGES = (SIMPLIFIED, TRADITIONAL)
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # 非 Linux 平台退回进程的峰值 RSS（macOS 单位为字节，其他为 KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+class ReaderRegistry:
+    """按语言懒加载 easyocr.Reader，线程安全，每种语言每个进程只加载一次"""
+
+    def __init__(self):
+        self._readers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._language_locks = {}
+        # 由 Celery worker 的进程初始化信号设置
+        self.in_worker = False
+
+    def _language_lock(self, language):
+        with self._lock:
+            return self._language_locks.setdefault(language, threading.Lock())
+
+    def get(self, language):
+        """获取语言对应的 Reader，未加载时加载"""
+        if language in self._readers:
+            return self._readers[language]
+        with self._language_lock(language):
+            if language not in self._readers:
+                self._readers[language] = self._load(language)
+        return self._readers[language]
+
+    def _load(self, language):
+        if not self.in_worker:
+            logger.warning(f"在 Celery worker 之外加载 OCR 模型 {language}（进程 {os.getpid()}）")
+        rss_before = current_rss()
+        start = time.perf_counter()
+        import easyocr
+        reader = easyocr.Reader([language], gpu=getattr(settings, 'HANZI_OCR_GPU', True))
+        seconds = time.perf_counter() - start
+        rss_after = current_rss()
+        rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        self._stats[language] = {
+            'load_seconds': seconds,
+            'rss_bytes': rss_after,
+            'rss_delta_bytes': rss_delta,
+            'pid': os.getpid(),
+        }
+        delta_text = f"{rss_delta / 1024 / 1024:.1f}MB" if rss_delta is not None else '未知'
+        logger.info(f"已加载 OCR 模型 {language}: 耗时 {seconds:.2f}秒，RSS 增加 {delta_text}（进程 {os.getpid()}）")
+        return reader
+
+    def is_loaded(self, language):
+        return language in self._readers
+
+    def preload(self, languages=OCR_LANGUAGES):
+        for language in languages:
+            self.get(language)
+
+    def stats(self):
+        """已加载模型的加载耗时和内存：{语言: {'load_seconds', 'rss_bytes', 'rss_delta_bytes', 'pid'}}"""
+        return {language: dict(stats) for language, stats in self._stats.items()}
+
+
+registry = ReaderRegistry()
+
+
+def get_reader(language):
+    return registry.get(language)
+
+
+def preload_languages():
+    """worker 启动时预加载的语言，settings.HANZI_OCR_PRELOAD 为 False 时不预加载"""
+    preload = getattr(settings, 'HANZI_OCR_PRELOAD', True)
+    if preload is True:
+        return OCR_LANGUAGES
+    return tuple(preload or ())
+
+
+def init_worker_process(**kwargs):
+    """Celery worker 进程启动时调用：标记为 worker 并预加载模型"""
+    registry.in_worker = True
+    languages = preload_languages()
+    try:
+        registry.preload(languages)
+    except Exception as e:
+        # 预加载失败不影响 worker 启动，第一次识别时会再次尝试
+        logger.error(f"预加载 OCR 模型失败: {e}")
@@ -0,0 +1,131 @@
+"""
+多进程汉字识别
+
+Celery 以 solo 方式运行时一个导入任务只使用一个 CPU 核。图片按批切分后可交给进程池并行识别：
+每个子进程启动时初始化一次 Django 和识别模型（各自持有 Reader），并限制 torch/OpenCV 的线程数，
+避免 进程数 × 每进程线程数 远超 CPU 核数。各批按完成顺序返回，调用方按下标合并，结果顺序与输入一致。
+识别缓存（见 ocr_cache）在当前进程中统一读写，命中的图片不会交给子进程。
+
+进程数由 settings.HANZI_OCR_WORKERS 配置（默认 1，即在当前进程中串行识别）；每个子进程的线程数由
+HANZI_OCR_TORCH_THREADS 配置，默认为 CPU 核数平均分配。子进程用 spawn 方式创建（Windows 只支持 spawn，
+且 fork 已加载 torch 的进程容易死锁）。当前进程是守护进程（如 Celery prefork 子进程）时无法创建子进程，退回串行。
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+
+from . import ocr_cache
+from .ocr_models import preload_languages, registry
+from .recognition import Recognition, engine_version, get_batch_size, get_mode, recognize_batch
+
+logger = logging.getLogger(__name__)
+
+
+def get_workers():
+    """识别进程数，1 表示在当前进程中串行识别"""
+    return max(1, int(getattr(settings, 'HANZI_OCR_WORKERS', 1)))
+
+
+def torch_threads(workers):
+    """每个识别进程使用的线程数"""
+    threads = getattr(settings, 'HANZI_OCR_TORCH_THREADS', None)
+    return max(1, int(threads or (os.cpu_count() or 1) // workers))
+
+
+def init_pool_worker(settings_module, languages, threads):
+    """进程池子进程初始化：限制线程数、初始化 Django、加载识别模型"""
+    # 须在导入 torch 之前设置，OpenMP/MKL 线程池按环境变量创建
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[name] = str(threads)
+    if settings_module:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        import cv2
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+    registry.in_worker = True
+    try:
+        registry.preload(languages)
+    except Exception as e:
+        # 预加载失败时第一次识别会再次尝试，错误记入对应图片
+        logger.error(f"识别进程 {os.getpid()} 预加载 OCR 模型失败: {e}")
+
+
+def recognize_chunk(paths, batch_size, mode):
+    """识别一批图片（识别缓存由调用方统一读写）；识别器本身出错时整批记为失败"""
+    try:
+        return recognize_batch(paths, batch_size, mode, use_cache=False)
+    except Exception as e:
+        logger.error(f"批量识别异常: {paths[0]} 等 {len(paths)} 张图片, 错误: {e}")
+        return [Recognition(None, None, None, e)] * len(paths)
+
+
+def iter_recognitions(paths, batch_size=None, mode=None, workers=None):
+    """
+    按批识别图片，每完成一批产出一次
+    先在当前进程中查找识别缓存，命中的图片作为第一批产出，只有未命中的图片交给识别器，识别成功的结果写入缓存
+    :param workers: 进程数，默认 get_workers()；大于 1 时使用进程池
+    :return: 生成器，产出 (该批图片在 paths 中的下标列表, Recognition 列表)；多进程时按完成顺序产出
+    """
+    batch_size = batch_size or get_batch_size()
+    mode = get_mode(mode)
+    workers = get_workers() if workers is None else workers
+
+    keys, cached = ocr_cache.lookup(paths, engine_version(mode))
+    if cached:
+        logger.info(f"识别缓存命中 {len(cached)}/{len(paths)} 张图片")
+        yield list(cached), [Recognition(*value, None) for value in cached.values()]
+
+    pending = [i for i in range(len(paths)) if i not in cached]
+    chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+    for indexes, recognitions in _iter_chunks(paths, chunks, batch_size, mode, workers):
+        ocr_cache.store({keys[i]: result[:3] for i, result in zip(indexes, recognitions)
+                         if keys[i] and not result.error})
+        yield indexes, recognitions
+
+
+def _iter_chunks(paths, chunks, batch_size, mode, workers):
+    workers = min(workers, len(chunks))
+    if workers > 1 and multiprocessing.current_process().daemon:
+        logger.warning('当前进程为守护进程，无法创建识别进程池，改为串行识别')
+        workers = 1
+    if workers <= 1:
+        for indexes in chunks:
+            yield indexes, recognize_chunk([paths[i] for i in indexes], batch_size, mode)
+        return
+
+    threads = torch_threads(workers)
+    logger.info(f"使用 {workers} 个识别进程（每个 {threads} 个线程）识别 {sum(map(len, chunks))} 张图片")
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_pool_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'), preload_languages(), threads),
+    )
+    try:
+        futures = {executor.submit(recognize_chunk, [paths[i] for i in indexes], batch_size, mode): indexes
+                   for indexes in chunks}
+        for future in as_completed(futures):
+            indexes = futures[future]
+            try:
+                yield indexes, future.result()
+            except Exception as e:
+                # 子进程异常退出（BrokenProcessPool）等，该批记为失败
+                logger.error(f"识别进程异常: {paths[indexes[0]]} 等 {len(indexes)} 张图片, 错误: {e}")
+                yield indexes, [Recognition(None, None, None, e)] * len(indexes)
+    finally:
+        # 调用方提前结束迭代时取消尚未开始的批次
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,164 @@
+"""
+基于主键的游标分页（keyset pagination）
+
+上一页/下一页通过 id 游标定位（WHERE id > 游标 ORDER BY id LIMIT n），只读取当前页的行，
+耗时与表大小和页码无关；直接跳转到指定页码时退回 OFFSET 查询。
+按相关度等其他顺序排列的结果（如全文检索）保留原顺序，只使用 OFFSET 分页。
+总数按查询语句和数据版本号缓存，数据未变化时不重复执行 COUNT。
+"""
+import math
+
+from .caching import read_through
+
+# 总数缓存时间（秒），数据变化时版本号递增，旧缓存自然失效
+COUNT_CACHE_TIMEOUT = 60 * 10
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """
+    返回查询结果总数，按 SQL 语句和数据版本号缓存
+    """
+    sql = str(queryset.order_by().query)
+    return read_through('filter_count', ('sql', sql), queryset.count, timeout)
+
+
+class KeysetPage:
+    """一页数据，提供与 django.core.paginator.Page 相近的属性，供模板使用"""
+
+    def __init__(self, object_list, number, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    def previous_page_number(self):
+        return max(self.number - 1, 1)
+
+    def next_page_number(self):
+        return self.number + 1
+
+    @property
+    def start_cursor(self):
+        """本页第一条记录的主键，作为“上一页”的 before 游标"""
+        if not self.paginator.keyset or not self.object_list:
+            return None
+        return self.object_list[0].pk
+
+    @property
+    def end_cursor(self):
+        """本页最后一条记录的主键，作为“下一页”的 after 游标"""
+        if not self.paginator.keyset or not self.object_list:
+            return None
+        return self.object_list[-1].pk
+
+    @property
+    def nearby_pages(self):
+        """当前页前后各两页的页码，避免模板遍历全部页码"""
+        first = max(self.number - 2, 1)
+        last = min(self.number + 2, self.paginator.num_pages)
+        return range(first, last + 1)
+
+
+class KeysetPaginator:
+    """
+    按主键升序的游标分页器
+    :param queryset: 已应用筛选条件的查询集（除 keep_order 外，排序会被替换为按主键排序）
+    :param per_page: 每页条数
+    :param count: 总数，默认使用 cached_count
+    :param keep_order: 保留查询集原有排序（如按相关度），此时不使用游标
+    """
+
+    def __init__(self, queryset, per_page, count=None, keep_order=False):
+        self.keyset = not keep_order
+        self.queryset = queryset if keep_order else queryset.order_by('pk')
+        self.per_page = per_page
+        self._count = count
+
+    @property
+    def count(self):
+        if self._count is None:
+            self._count = cached_count(self.queryset)
+        return self._count
+
+    @property
+    def num_pages(self):
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    @staticmethod
+    def _number(value, default=1):
+        try:
+            return max(int(value), 1)
+        except (TypeError, ValueError):
+            return default
+
+    def page(self, number=1, after=None, before=None):
+        """
+        获取一页数据
+        :param number: 页码，仅用于显示；没有游标时按页码以 OFFSET 定位
+        :param after: 取主键大于该值的下一页
+        :param before: 取主键小于该值的上一页
+        """
+        number = self._number(number)
+        size = self.per_page
+
+        if not self.keyset:
+            after = before = None
+            number = min(number, self.num_pages)
+
+        if after:
+            rows = list(self.queryset.filter(pk__gt=after)[:size + 1])
+            return KeysetPage(rows[:size], number, self, has_previous=True, has_next=len(rows) > size)
+
+        if before:
+            rows = list(self.queryset.filter(pk__lt=before).order_by('-pk')[:size + 1])
+            if len(rows) <= size:
+                # 已到开头（期间可能有记录增删），直接返回完整的第一页
+                return self.page(1)
+            return KeysetPage(rows[:size][::-1], number, self, has_previous=True, has_next=True)
+
+        if self.keyset and number > 1 and number >= self.num_pages:
+            # 最后一页从末尾倒序读取，同样不需要 OFFSET
+            number = self.num_pages
+            last_size = self.count - (number - 1) * size
+            rows = list(self.queryset.order_by('-pk')[:last_size])[::-1]
+            return KeysetPage(rows, number, self, has_previous=number > 1, has_next=False)
+
+        offset = (number - 1) * size
+        rows = list(self.queryset[offset:offset + size + 1])
+        return KeysetPage(rows[:size], number, self, has_previous=number > 1, has_next=len(rows) > size)
+
+    def cached_page(self, key, number=1, after=None, before=None):
+        """
+        与 page 相同，结果按数据版本号缓存
+        :param key: 区分查询条件的键（如规范化的筛选条件），需与 queryset 一一对应
+        """
+        def load():
+            page = self.page(number, after, before)
+            return page.object_list, page.number, page.has_previous(), page.has_next()
+
+        parts = (key, self.keyset, self.per_page, self._number(number), after, before)
+        rows, number, has_previous, has_next = read_through('page', parts, load)
+        return KeysetPage(rows, number, self, has_previous, has_next)
@@ -10,7 +10,7 @@ class ImageGenerationTest(TestCase):
     def setUpTestData(cls):
         # 初始化测试数据（500个不同汉字）
         Hanzi.objects.bulk_create([
-            Hanzi(id=f'1{i:04}', character=chr(0x4e00+i), stroke_count=10) 
+            Hanzi(id=f'1{i:04}', code=f'1{i:04}', character=chr(0x4e00+i), stroke_count=10) 
             for i in range(500)
         ])
 
@@ -40,7 +40,7 @@ class StressTest(TestCase):
         from concurrent.futures import ThreadPoolExecutor
         
         # 创建测试用汉字记录
-        test_chars = [Hanzi(id=f'9{i:04}', character=chr(0x4e00+i), stroke_count=9) 
+        test_chars = [Hanzi(id=f'9{i:04}', code=f'9{i:04}', character=chr(0x4e00+i), stroke_count=9) 
                      for i in range(100)]
         Hanzi.objects.bulk_create(test_chars)
         
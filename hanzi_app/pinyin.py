@@ -0,0 +1,113 @@
+"""
+拼音的规范化与检索词解析
+
+读音统一拆成 (无声调拼音, 声调)：
+- 声调可写作调号（guō）或数字（guo1），轻声或未标注记为 0
+- ü 统一写作 v（lǜ、lu:4、lv4 -> ('lv', 4)），保证检索列只含 ASCII 字母，可按范围扫描索引
+"""
+import functools
+import re
+import unicodedata
+
+from .chardata import get_char_store
+
+# 组合调号 -> 声调
+_TONE_MARKS = {'\u0304': 1, '\u0301': 2, '\u030c': 3, '\u0300': 4}
+# 多个读音之间的分隔符
+_SEPARATORS = re.compile(r'[,，、;；/\s]+')
+# 规范化后的读音：字母 + 可选的数字声调
+_READING = re.compile(r'^([a-z]+)([0-5]?)$')
+
+
+def split_reading(reading):
+    """
+    将单个读音拆为无声调拼音和声调
+    :return: (拼音, 声调)，未标声调时声调为 None；无法识别时返回 None
+    """
+    text = unicodedata.normalize('NFD', reading.strip().lower())
+    tone = None
+    letters = []
+    for ch in text:
+        if ch in _TONE_MARKS:
+            tone = _TONE_MARKS[ch]
+        elif ch == '\u0308':
+            # 分音符：u + ¨ 即 ü
+            if letters and letters[-1] == 'u':
+                letters[-1] = 'v'
+        else:
+            letters.append(ch)
+    plain = ''.join(letters).replace('u:', 'v')
+    match = _READING.match(plain)
+    if not match:
+        return None
+    if match.group(2):
+        tone = int(match.group(2)) % 5
+    return match.group(1), tone
+
+
+def parse_readings(text):
+    """
+    解析拼音文本中的全部读音，去重并保持顺序
+    :param text: 如 "xíng,háng"、"guo2"
+    :return: [(拼音, 声调), ...]
+    """
+    readings = []
+    for token in _SEPARATORS.split(text or ''):
+        parsed = split_reading(token) if token else None
+        if not parsed:
+            continue
+        reading = (parsed[0], parsed[1] or 0)
+        if reading not in readings:
+            readings.append(reading)
+    return readings
+
+
+def hanzi_readings(character, pinyin_text=''):
+    """
+    汉字的全部读音：先取记录中录入的读音，再补充字符字典中的多音字读音
+    :return: [(拼音, 声调), ...]
+    """
+    readings = parse_readings(pinyin_text)
+    if character:
+        for reading in parse_readings(','.join(get_char_store().pinyin(character))):
+            if reading not in readings:
+                readings.append(reading)
+    return readings
+
+
+@functools.lru_cache(maxsize=1)
+def known_syllables():
+    """字符字典中出现过的全部无声调拼音音节"""
+    store = get_char_store()
+    syllables = set()
+    for character in store.characters():
+        for reading in store.pinyin(character):
+            parsed = split_reading(reading)
+            if parsed:
+                syllables.add(parsed[0])
+    return frozenset(syllables)
+
+
+def parse_pinyin_query(term):
+    """
+    解析拼音检索词
+    - "guo"、"guō"、"guo1"：按音节精确匹配，带声调时同时匹配声调（0 或 5 表示轻声）
+    - "gu*"：按音节前缀匹配
+    不是有效音节（或音节前缀）的词返回 None，交给全文检索处理
+    :return: (拼音, 声调或 None, 是否前缀匹配)
+    """
+    prefix = term.endswith('*')
+    text = term.rstrip('*')
+    if not text or '*' in text:
+        return None
+    parsed = split_reading(text)
+    if not parsed:
+        return None
+    syllable, tone = parsed
+    syllables = known_syllables()
+    if prefix:
+        if not any(known.startswith(syllable) for known in syllables):
+            return None
+    elif syllable not in syllables:
+        return None
+    return syllable, tone, prefix
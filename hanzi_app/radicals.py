@@ -0,0 +1,89 @@
+"""
+部首检字索引：按 部首 -> 除部首外的剩余笔画数 -> 汉字 组织的嵌套索引
+部首取自 Strokes.txt 第三列（经 chardata 编译），剩余笔画数 = 总笔画数 - 部首笔画数
+"""
+import logging
+import threading
+from collections import defaultdict
+
+from .chardata import get_char_store
+
+logger = logging.getLogger(__name__)
+
+
+class RadicalIndex:
+    """部首检字索引，构建后只读"""
+
+    def __init__(self, store):
+        index = defaultdict(lambda: defaultdict(list))
+        radical_strokes = {}
+        for character in store.characters():
+            radical = store.radical(character)
+            if not radical:
+                continue
+            if radical not in radical_strokes:
+                radical_strokes[radical] = store.stroke_count(radical)
+            # 两份笔画数数据个别字不一致，剩余笔画数不小于 0
+            residual = max(store.stroke_count(character) - radical_strokes[radical], 0)
+            index[radical][residual].append(character)
+
+        # {部首: {剩余笔画数: [汉字, ...]}}，剩余笔画数升序
+        self._index = {
+            radical: {residual: groups[residual] for residual in sorted(groups)}
+            for radical, groups in index.items()
+        }
+        self._radical_strokes = radical_strokes
+
+    def __contains__(self, radical):
+        return radical in self._index
+
+    def radical_strokes(self, radical):
+        """部首自身的笔画数"""
+        return self._radical_strokes.get(radical, 0)
+
+    def radicals(self):
+        """
+        全部部首，按部首笔画数、码位排序
+        :return: [(部首, 部首笔画数, 收字数), ...]
+        """
+        return sorted(
+            ((radical, self._radical_strokes[radical], sum(len(chars) for chars in groups.values()))
+             for radical, groups in self._index.items()),
+            key=lambda item: (item[1], item[0]),
+        )
+
+    def grouped_radicals(self):
+        """按部首笔画数分组：[(部首笔画数, [部首, ...]), ...]"""
+        groups = defaultdict(list)
+        for radical, strokes, _ in self.radicals():
+            groups[strokes].append(radical)
+        return sorted(groups.items())
+
+    def residual_counts(self, radical):
+        """部首下各剩余笔画数的收字数：{剩余笔画数: 字数}"""
+        return {residual: len(chars) for residual, chars in self._index.get(radical, {}).items()}
+
+    def characters(self, radical, residual=None):
+        """
+        部首检字
+        :param residual: 剩余笔画数，为 None 时返回该部首下全部汉字（按剩余笔画数排列）
+        """
+        groups = self._index.get(radical, {})
+        if residual is not None:
+            return list(groups.get(residual, []))
+        return [character for chars in groups.values() for character in chars]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_radical_index():
+    """获取进程内共享的部首检字索引（部首数据来自字符字典，不随汉字表变化）"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RadicalIndex(get_char_store())
+                logger.info(f"部首索引已构建: {len(_index._index)} 个部首")
+    return _index
@@ -1,10 +1,63 @@
-import easyocr
-from PIL import Image
+import functools
+import importlib.metadata
+from collections import namedtuple
+
+from django.conf import settings
+from PIL import Image, ImageOps
 import numpy as np
 
-# 初始化简体繁体双阅读器
-SIMPLIFIED_READER = easyocr.Reader(['ch_sim'])  # 简体中文识别器
-TRADITIONAL_READER = easyocr.Reader(['ch_tra'])  # 繁体中文识别器
+from . import ocr_cache
+# 简体、繁体识别器由注册表在第一次识别时加载（Celery worker 启动时预加载），导入本模块不加载模型
+from .ocr_models import SIMPLIFIED, TRADITIONAL, get_reader
+
+# 简体可信度低于该值时再用繁体识别器比较；繁体可信度高出简体该值以上时判为繁体
+LOW_CONFIDENCE = 0.35
+TRADITIONAL_MARGIN = 0.35
+
+# 识别方式：detect 先用 CRAFT 检测文字区域再识别；recognize 跳过检测，把整张图作为一个文字框直接识别，
+# 适用于已裁切好的单字图片（导入 ZIP 中的图片都是单个手写字）
+DETECT = 'detect'
+RECOGNIZE_ONLY = 'recognize'
+RECOGNITION_MODES = (DETECT, RECOGNIZE_ONLY)
+
+# 图片预处理和送入识别器的方式变化时递增，使旧的识别缓存失效
+PIPELINE_VERSION = 2
+
+# 识别结果：汉字、字体类型、可信度；识别失败时 error 为异常，其余字段为 None
+Recognition = namedtuple('Recognition', ['character', 'variant', 'confidence', 'error'])
+
+
+def get_batch_size():
+    """每批送入识别器的图片数"""
+    return getattr(settings, 'HANZI_OCR_BATCH_SIZE', 16)
+
+
+def get_image_size():
+    """检测+识别时图片统一缩放到的边长，尺寸相同的图片才能在一批中一起送入识别器"""
+    return getattr(settings, 'HANZI_OCR_IMAGE_SIZE', 224)
+
+
+def get_mode(mode=None):
+    """识别方式，未指定时使用 settings.HANZI_OCR_MODE（默认 detect）"""
+    mode = mode or getattr(settings, 'HANZI_OCR_MODE', DETECT)
+    if mode not in RECOGNITION_MODES:
+        raise ValueError(f"不支持的识别方式: {mode}")
+    return mode
+
+
+@functools.lru_cache(maxsize=None)
+def _easyocr_version():
+    try:
+        return importlib.metadata.version('easyocr')
+    except importlib.metadata.PackageNotFoundError:
+        return ''
+
+
+def engine_version(mode):
+    """识别引擎版本（easyocr 版本、预处理流程、识别方式、判定阈值），作为识别结果缓存键的一部分"""
+    return (f"easyocr={_easyocr_version()};pipeline={PIPELINE_VERSION};mode={mode};size={get_image_size()};"
+            f"low={LOW_CONFIDENCE};margin={TRADITIONAL_MARGIN}")
+
 
 def load_image(image_path):
     """加载并验证图像文件"""
@@ -14,28 +67,117 @@ def load_image(image_path):
     except Exception as e:
         raise ValueError(f"图像加载失败: {str(e)}")
 
-def recognize_hanzi(image_path):
+def normalize_image(image, size):
     """
-    通过可信度比较选择简繁识别结果
-    返回格式: (汉字, 字体类型, 可信度)
+    转为 RGB 并等比缩放、补边为 size×size 的正方形，补边颜色取图片边缘像素的中位数（纸张底色）
+    导入图片是尺寸各异的单字裁切图，统一尺寸后整批图片可以堆叠为一个批次识别
     """
-    # 加载并预处理图像
-    image = load_image(image_path)
-    
-    # 双引擎并行识别
-    sim_results = SIMPLIFIED_READER.readtext(image, detail=1)
-    trad_results = TRADITIONAL_READER.readtext(image, detail=1)
-    
-    # 提取最佳候选（取置信度最高结果）
-    best_sim = max(sim_results, key=lambda x: x[2], default=None)
-    if best_sim[2] < 0.35:
-        best_trad = max(trad_results, key=lambda x: x[2], default=None)
-        if best_trad[2] > best_sim[2]+0.35:
-            return (best_trad[1][0], '繁体')
+    img = Image.fromarray(image).convert('RGB')
+    pixels = np.asarray(img)
+    border = np.concatenate([pixels[0], pixels[-1], pixels[:, 0], pixels[:, -1]])
+    background = tuple(int(v) for v in np.median(border, axis=0))
+    return np.asarray(ImageOps.pad(img, (size, size), color=background))
+
+def _best(results):
+    """取可信度最高的识别结果 (文字, 可信度)，没有结果时返回 None"""
+    best = max(results, key=lambda x: x[2], default=None)
+    return (best[1], best[2]) if best else None
+
+def _read_batched(reader, images, batch_size, mode=DETECT):
+    """
+    批量识别，返回与 images 对应的最佳结果列表
+    图片先统一缩放为 get_image_size() 的正方形，再按 batch_size 切分送入识别器：
+    检测+识别时整批交给 readtext_batched（要求同一批图片尺寸相同）；
+    跳过检测时把一批图片纵向拼接为一张图，每张图片作为一个文字框，一次 recognize 调用识别整批
+    """
+    size = get_image_size()
+    images = [normalize_image(image, size) for image in images]
+    best = []
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        if mode == RECOGNIZE_ONLY:
+            best.extend(_recognize_tiled(reader, chunk, size))
         else:
-            return (best_sim[1][0],'简体')
-    else:
-        return (best_sim[1][0],'简体')
+            outputs = reader.readtext_batched(chunk, batch_size=len(chunk), detail=1)
+            best.extend(_best(results) for results in outputs)
+    return best
+
+def _recognize_tiled(reader, images, size):
+    """纵向拼接的一批图片逐框识别，按文字框的纵坐标把结果对应回各图片"""
+    boxes = [[0, size, i * size, (i + 1) * size] for i in range(len(images))]
+    results = [[] for _ in images]
+    for box, text, confidence in reader.recognize(np.concatenate(images), horizontal_list=boxes, free_list=[],
+                                                  batch_size=len(images), detail=1):
+        results[int(box[0][1]) // size].append((box, text, confidence))
+    return [_best(items) for items in results]
+
+def recognize_batch(paths_or_arrays, batch_size=None, mode=None, use_cache=True):
+    """
+    批量识别汉字图片
+    先按图片内容哈希查找识别缓存（见 ocr_cache），未命中的图片再识别：
+    简体识别器按批处理全部图片，只有简体可信度低于 LOW_CONFIDENCE 的图片再交给繁体识别器
+    :param paths_or_arrays: 图片路径或 numpy 数组的列表
+    :param mode: 识别方式 DETECT 或 RECOGNIZE_ONLY，默认见 get_mode
+    :param use_cache: 是否读写识别缓存
+    :return: 与输入顺序对应的 Recognition 列表，单张图片出错不影响其他图片
+    """
+    batch_size = batch_size or get_batch_size()
+    mode = get_mode(mode)
+    if not use_cache:
+        return _recognize(paths_or_arrays, batch_size, mode)
+
+    keys, cached = ocr_cache.lookup(paths_or_arrays, engine_version(mode))
+    results = [Recognition(*cached[i], None) if i in cached else None for i in range(len(paths_or_arrays))]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        for i, result in zip(pending, _recognize([paths_or_arrays[i] for i in pending], batch_size, mode)):
+            results[i] = result
+        ocr_cache.store({keys[i]: results[i][:3] for i in pending if keys[i] and not results[i].error})
+    return results
+
+def _recognize(paths_or_arrays, batch_size, mode):
+    """识别图片（不使用缓存）"""
+    results = [None] * len(paths_or_arrays)
+    images, positions = [], []
+    for position, item in enumerate(paths_or_arrays):
+        try:
+            images.append(item if isinstance(item, np.ndarray) else load_image(item))
+            positions.append(position)
+        except ValueError as e:
+            results[position] = Recognition(None, None, None, e)
+    if not images:
+        return results
+
+    best_sim = _read_batched(get_reader(SIMPLIFIED), images, batch_size, mode)
+
+    # 只对简体可信度低的图片运行繁体识别器
+    uncertain = [i for i, best in enumerate(best_sim) if best and best[1] < LOW_CONFIDENCE]
+    best_trad = {}
+    if uncertain:
+        trad = _read_batched(get_reader(TRADITIONAL), [images[i] for i in uncertain], batch_size, mode)
+        best_trad = dict(zip(uncertain, trad))
+
+    for i, position in enumerate(positions):
+        sim = best_sim[i]
+        if not sim:
+            results[position] = Recognition(None, None, None, ValueError('未识别到文字'))
+            continue
+        trad = best_trad.get(i)
+        if trad and trad[1] > sim[1] + TRADITIONAL_MARGIN:
+            results[position] = Recognition(trad[0][0], '繁体', trad[1], None)
+        else:
+            results[position] = Recognition(sim[0][0], '简体', sim[1], None)
+    return results
+
+def recognize_hanzi(image_path, mode=None):
+    """
+    通过可信度比较选择简繁识别结果
+    返回格式: (汉字, 字体类型)
+    """
+    result = recognize_batch([image_path], batch_size=1, mode=mode)[0]
+    if result.error:
+        raise result.error
+    return (result.character, result.variant)
 
 # 测试用例
 if __name__ == "__main__":
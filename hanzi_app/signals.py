@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_data_version
+from .fulltext import get_search_backend
+from .models import Hanzi, HanziIdSequence, HanziPinyin, HanziStroke
+
+
+@receiver(post_save, sender=Hanzi, dispatch_uid='hanzi_stroke_index')
+def update_stroke_index(sender, instance, raw=False, **kwargs):
+    """保存汉字后重建其笔画倒排索引，删除时由外键级联清理"""
+    if raw:
+        return
+    HanziStroke.reindex(instance)
+
+
+@receiver(post_save, sender=Hanzi, dispatch_uid='hanzi_pinyin_index')
+def update_pinyin_index(sender, instance, raw=False, **kwargs):
+    """保存汉字后重建其拼音索引，删除时由外键级联清理"""
+    if raw:
+        return
+    HanziPinyin.reindex(instance)
+
+
+@receiver(post_save, sender=Hanzi, dispatch_uid='hanzi_fulltext_save')
+def update_fulltext_index(sender, instance, raw=False, **kwargs):
+    """保存汉字后同步全文索引（MySQL FULLTEXT 由数据库自动维护）"""
+    if raw:
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_save, sender=Hanzi, dispatch_uid='hanzi_id_sequence')
+def advance_id_sequence(sender, instance, created=False, raw=False, **kwargs):
+    """新建汉字使用了序列之外的编号（导入时指定的编号）时推进序列"""
+    if raw or not created:
+        return
+    for value in {instance.pk, instance.code}:
+        HanziIdSequence.advance(value)
+
+
+@receiver(post_delete, sender=Hanzi, dispatch_uid='hanzi_fulltext_delete')
+def remove_fulltext_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Hanzi, dispatch_uid='hanzi_data_version_save')
+@receiver(post_delete, sender=Hanzi, dispatch_uid='hanzi_data_version_delete')
+def update_data_version(sender, **kwargs):
+    """汉字增删改后递增数据版本号，使内存索引和缓存失效"""
+    bump_data_version()
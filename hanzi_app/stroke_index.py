@@ -0,0 +1,466 @@
+"""
+有序笔顺索引：支持按笔顺前缀、连续笔画片段检索汉字，并统计每个候选下一笔能匹配的字数
+
+笔顺先编码为字符串（每个笔画一个字符，见 strokes.encode_strokes），再做两种排序数组：
+- 前缀表：所有汉字的笔顺编码排序后的数组，相当于一棵压平的字典树，
+  任一前缀对应数组中的一个连续区间，用二分查找定位
+- 后缀表：所有笔顺编码的全部后缀排序后的数组（后缀数组），
+  任一连续片段对应以它开头的后缀区间
+另有 StrokeMatrix 以 NumPy 矩阵保存全部笔顺，用于带笔画数条件的检索和模糊检索
+
+笔顺字典部分（StrokeSequenceIndex）构建较慢，只在字符字典变化时重建；汉字表部分（HanziStrokeIndex）
+只保存记录 ID 和与字典不同的录入笔顺，汉字数据变化后重新读取，录入笔顺另建小索引叠加在字典索引上
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+from .caching import get_data_version
+from .chardata import get_char_store
+from .strokes import STROKE_CODES, STROKE_TYPES, encode_strokes, parse_stroke_order
+
+logger = logging.getLogger(__name__)
+
+# 区间上界哨兵：大于任何笔画编码
+_UPPER = chr(len(STROKE_TYPES) + 1)
+
+# 匹配方式
+MATCH_PREFIX = 'prefix'
+MATCH_CONTAINS = 'contains'
+MATCH_FUZZY = 'fuzzy'
+
+
+class StrokeMatrix:
+    """
+    全部笔顺的 NumPy 表示，查询以整表向量运算完成：
+    codes 为补零对齐的笔画编码矩阵（uint8，末尾至少留一列 0），lengths 为笔画数，
+    histograms 为每种笔画的出现次数（第 0 列为补位，恒为 0）
+    """
+
+    def __init__(self, sequences):
+        """
+        :param sequences: 笔顺编码字符串列表，行号与列表下标一致
+        """
+        count = len(sequences)
+        self.lengths = np.fromiter(map(len, sequences), dtype=np.int16, count=count)
+        width = int(self.lengths.max()) + 1 if count else 1
+        self.codes = np.zeros((count, width), dtype=np.uint8)
+        for row, sequence in enumerate(sequences):
+            self.codes[row, :len(sequence)] = np.frombuffer(sequence.encode('latin-1'), dtype=np.uint8)
+
+        kinds = len(STROKE_TYPES) + 1
+        cells = (np.arange(count)[:, None] * kinds + self.codes).ravel()
+        self.histograms = np.bincount(cells, minlength=count * kinds).reshape(count, kinds).astype(np.int16)
+        self.histograms[:, 0] = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @staticmethod
+    def as_query(pattern):
+        """笔顺编码字符串转换为 uint8 数组"""
+        return np.frombuffer(pattern.encode('latin-1'), dtype=np.uint8)
+
+    def _windows(self, query, rows):
+        """
+        连续匹配：返回 (行数, 起始位置数) 的布尔矩阵，标记 query 在指定行的每个起点是否匹配
+        最后一列恒为补位 0，不可能作为匹配的一部分，因此起点最多到 width - 1 - len(query)
+        """
+        m = len(query)
+        starts = self.codes.shape[1] - m
+        codes = self.codes[rows]
+        matched = codes[:, :starts] == query[0]
+        for j in range(1, m):
+            matched &= codes[:, j:starts + j] == query[j]
+        return matched
+
+    def _match(self, query, match, stroke_count):
+        """
+        :return: (匹配的行号数组, 连续匹配时各行的起点矩阵)
+        """
+        m = len(query)
+        if stroke_count is None:
+            rows = np.arange(len(self))
+        else:
+            rows = np.flatnonzero(self.lengths == stroke_count)
+        if not m:
+            return rows, None
+        if m >= self.codes.shape[1]:
+            return rows[:0], None
+        if match == MATCH_CONTAINS:
+            windows = self._windows(query, rows)
+            hit = windows.any(axis=1)
+            return rows[hit], windows[hit]
+        return rows[(self.codes[rows, :m] == query).all(axis=1)], None
+
+    def select(self, pattern, match=MATCH_PREFIX, stroke_count=None):
+        """
+        :param pattern: 笔顺编码字符串，可为空
+        :param match: prefix 笔顺以 pattern 开头；contains 笔顺中包含 pattern 这段连续笔画
+        :param stroke_count: 笔画数，为 None 时不限
+        :return: 匹配的行号数组（升序）
+        """
+        rows, _ = self._match(self.as_query(pattern), match, stroke_count)
+        return rows
+
+    def next_counts(self, pattern, match=MATCH_PREFIX, stroke_count=None):
+        """
+        统计 select 的结果中，pattern 之后紧接每种笔画的汉字数
+        :return: 长度为笔画类型数 + 1 的数组，下标为笔画编码
+        """
+        query = self.as_query(pattern)
+        m = len(query)
+        kinds = len(STROKE_TYPES) + 1
+        rows, windows = self._match(query, match, stroke_count)
+        if match != MATCH_CONTAINS:
+            if m >= self.codes.shape[1]:
+                return np.zeros(kinds, dtype=np.int64)
+            counts = np.bincount(self.codes[rows, m], minlength=kinds)
+        elif not m:
+            counts = (self.histograms[rows] > 0).sum(axis=0)
+        else:
+            # 同一汉字可能多处匹配，按 (行, 下一笔) 去重后计数
+            hit_rows, starts = np.nonzero(windows)
+            flags = np.zeros((len(rows), kinds), dtype=bool)
+            flags[hit_rows, self.codes[rows[hit_rows], starts + m]] = True
+            counts = flags.sum(axis=0)
+        counts[0] = 0
+        return counts
+
+    def lower_bounds(self, query):
+        """
+        编辑距离下界：多出的笔画至少要删除或替换，缺少的笔画至少要插入或替换
+        :param query: uint8 数组
+        """
+        diff = self.histograms - np.bincount(query, minlength=self.histograms.shape[1]).astype(np.int16)
+        return np.maximum(np.clip(diff, 0, None).sum(axis=1), np.clip(-diff, 0, None).sum(axis=1))
+
+    def edit_distances(self, query, rows):
+        """
+        计算 query 与指定行的编辑距离，对所有行同时推进动态规划
+        每处理一笔，新行先由上一行得到替换和删除的代价，插入代价沿行方向的传递
+        new[j] = min(t[j], new[j-1] + 1) 等价于对 t[j] - j 求前缀最小值，用 minimum.accumulate 一次完成
+        """
+        codes, lengths = self.codes[rows], self.lengths[rows]
+        m = len(query)
+        offsets = np.arange(m + 1, dtype=np.int16)
+        prev = np.broadcast_to(offsets, (len(rows), m + 1))
+        result = np.zeros(len(rows), dtype=np.int16)
+        for i in range(int(lengths.max()) if len(rows) else 0):
+            cost = (codes[:, i, None] != query[None, :]).astype(np.int16)
+            current = np.empty((len(rows), m + 1), dtype=np.int16)
+            current[:, 0] = i + 1
+            np.minimum(prev[:, 1:] + 1, prev[:, :-1] + cost, out=current[:, 1:])
+            current = np.minimum.accumulate(current - offsets, axis=1) + offsets
+            done = lengths == i + 1
+            result[done] = current[done, m]
+            prev = current
+        return result
+
+
+class StrokeSequenceIndex:
+    """
+    汉字笔顺的有序索引，构建后只读，可在多个线程间共享，每个汉字一个笔顺
+    """
+
+    def __init__(self, sequences):
+        """
+        :param sequences: {汉字: 笔顺编码字符串}
+        """
+        self.sequences = {character: code for character, code in sequences.items() if code}
+
+        encoded = sorted((code, character) for character, code in self.sequences.items())
+        self._prefix_keys = [code for code, _ in encoded]
+        self._prefix_chars = [character for _, character in encoded]
+
+        suffix_keys = []
+        suffix_owners = []
+        for owner, code in enumerate(self._prefix_keys):
+            for i in range(len(code)):
+                suffix_keys.append(code[i:])
+                suffix_owners.append(owner)
+        order = sorted(range(len(suffix_keys)), key=suffix_keys.__getitem__)
+        self._suffix_keys = [suffix_keys[i] for i in order]
+        self._suffix_chars = [self._prefix_chars[suffix_owners[i]] for i in order]
+
+        # 连续匹配时，短片段对应的后缀区间很大，预先统计空片段和单笔片段的下一笔字数
+        self._contains_next = self._count_contains_next()
+        self._matrix = None
+
+    def __len__(self):
+        return len(self._prefix_keys)
+
+    @property
+    def matrix(self):
+        """与前缀表行号一致的 StrokeMatrix，首次使用时构建"""
+        if self._matrix is None:
+            self._matrix = StrokeMatrix(self._prefix_keys)
+        return self._matrix
+
+    @staticmethod
+    def _range(keys, pattern):
+        """返回以 pattern 开头的键在排序数组中的区间 [lo, hi)"""
+        lo = bisect_left(keys, pattern)
+        hi = bisect_left(keys, pattern + _UPPER, lo)
+        return lo, hi
+
+    def _tables(self, match):
+        if match == MATCH_CONTAINS:
+            return self._suffix_keys, self._suffix_chars
+        return self._prefix_keys, self._prefix_chars
+
+    def characters(self, strokes, match=MATCH_PREFIX, stroke_count=None):
+        """
+        查找笔顺匹配的汉字
+        :param strokes: 笔画名称列表
+        :param match: prefix 按笔顺开头匹配；contains 笔顺中包含这段连续笔画
+        :param stroke_count: 限定笔画数，为 None 时不限
+        :return: 汉字列表（已去重）
+        """
+        pattern = encode_strokes(strokes)
+        if pattern is None:
+            return []
+        if stroke_count is not None:
+            return [self._prefix_chars[row] for row in self.matrix.select(pattern, match, stroke_count)]
+        keys, chars = self._tables(match)
+        lo, hi = self._range(keys, pattern)
+        if match == MATCH_CONTAINS:
+            return list(dict.fromkeys(chars[lo:hi]))
+        return chars[lo:hi]
+
+    def next_strokes(self, strokes, match=MATCH_PREFIX, stroke_count=None):
+        """
+        统计在已选笔画后再追加每一种笔画时能匹配的汉字数
+        :param stroke_count: 限定笔画数，为 None 时不限
+        :return: {笔画名称: 汉字数}，只包含数量大于 0 的笔画，按笔画类型顺序排列
+        """
+        pattern = encode_strokes(strokes)
+        if pattern is None:
+            return {}
+        if stroke_count is not None:
+            counts = self.matrix.next_counts(pattern, match, stroke_count)
+            return {STROKE_TYPES[code - 1]: int(counts[code]) for code in np.flatnonzero(counts)}
+
+        keys, chars = self._tables(match)
+        if match != MATCH_CONTAINS:
+            # 前缀表中每个汉字只出现一次，区间长度即为汉字数，每种笔画只需两次二分
+            counts = {}
+            for stroke, code in STROKE_CODES.items():
+                lo, hi = self._range(keys, pattern + chr(code))
+                if hi > lo:
+                    counts[stroke] = hi - lo
+            return counts
+
+        if pattern in self._contains_next:
+            return dict(self._contains_next[pattern])
+
+        # 后缀表中同一汉字可能多次出现，扫描一遍区间按下一笔去重计数
+        lo, hi = self._range(keys, pattern)
+        depth = len(pattern)
+        seen = defaultdict(set)
+        for i in range(lo, hi):
+            key = keys[i]
+            if len(key) > depth:
+                seen[key[depth]].add(chars[i])
+        return self._named_counts({code: len(characters) for code, characters in seen.items()})
+
+    def _count_contains_next(self):
+        """统计每种单笔、每种两笔连续组合出现在多少个汉字中"""
+        singles = defaultdict(int)
+        pairs = defaultdict(int)
+        for code in self._prefix_keys:
+            for stroke in set(code):
+                singles[stroke] += 1
+            for pair in {code[i:i + 2] for i in range(len(code) - 1)}:
+                pairs[pair] += 1
+
+        result = {'': self._named_counts(singles)}
+        by_first = defaultdict(dict)
+        for pair, count in pairs.items():
+            by_first[pair[0]][pair[1]] = count
+        for first in singles:
+            result[first] = self._named_counts(by_first.get(first, {}))
+        return result
+
+    @staticmethod
+    def _named_counts(counts):
+        """{笔画编码字符: 字数} 转换为按笔画类型顺序排列的 {笔画名称: 字数}"""
+        return {STROKE_TYPES[ord(code) - 1]: counts[code] for code in sorted(counts)}
+
+    def nearest(self, strokes, k=10, max_distance=None):
+        """
+        按笔画编辑距离（插入、删除、替换一笔各记 1）查找最接近的 k 个汉字
+        先用笔画类型直方图算出每个汉字编辑距离的下界（向量化，一次覆盖全部汉字），
+        只对下界可能进入前 k 名的候选计算精确距离
+        :param strokes: 笔画名称列表
+        :param k: 返回的汉字数
+        :param max_distance: 最大编辑距离，默认不限
+        :return: [(编辑距离, 汉字), ...]，按距离升序，距离相同时按笔顺排序
+        """
+        pattern = encode_strokes(strokes)
+        if not pattern or k <= 0 or not self._prefix_keys:
+            return []
+        matrix = self.matrix
+        query = matrix.as_query(pattern)
+
+        lower = matrix.lower_bounds(query)
+        order = np.argsort(lower, kind='stable')
+        if max_distance is not None:
+            order = order[lower[order] <= max_distance]
+        if not len(order):
+            return []
+
+        # 第一批：下界最小的 k 个（含并列）；第 k 名的精确距离确定后，
+        # 下界不超过该距离的汉字才可能进入前 k 名，补算这些候选
+        first = order[lower[order] <= lower[order[min(k, len(order)) - 1]]]
+        distances = matrix.edit_distances(query, first)
+        candidates = first
+        if len(first) >= k:
+            kth = np.partition(distances, k - 1)[k - 1]
+            rest = order[len(first):]
+            rest = rest[lower[rest] <= kth]
+            if len(rest):
+                candidates = np.concatenate([first, rest])
+                distances = np.concatenate([distances, matrix.edit_distances(query, rest)])
+
+        if max_distance is not None:
+            keep = distances <= max_distance
+            candidates, distances = candidates[keep], distances[keep]
+        ranked = np.lexsort((candidates, distances))[:k]
+        return [(int(distances[i]), self._prefix_chars[candidates[i]]) for i in ranked]
+
+
+class HanziStrokeIndex:
+    """
+    笔顺检索使用的索引：字典索引叠加汉字表
+    汉字表中录入的笔顺优先于笔顺字典：与字典不同的录入笔顺建为小索引 added，被覆盖的字典笔顺建为 removed，
+    查询结果为 字典 - removed + added；汉字数较少，汉字数据变化后重新构建的开销很小
+    """
+
+    def __init__(self, base, hanzi_ids=None, sequences=None):
+        """
+        :param base: 笔顺字典的 StrokeSequenceIndex
+        :param hanzi_ids: {汉字: [汉字表中的记录 ID, ...]}
+        :param sequences: {汉字: 汉字表中录入的笔顺编码字符串}
+        """
+        self.base = base
+        self.hanzi_ids = hanzi_ids or {}
+        self.overrides = {character: code for character, code in (sequences or {}).items()
+                          if code and base.sequences.get(character) != code}
+        self.added = StrokeSequenceIndex(self.overrides)
+        self.removed = StrokeSequenceIndex({character: base.sequences[character]
+                                            for character in self.overrides if character in base.sequences})
+
+    def __len__(self):
+        return len(self.base) - len(self.removed) + len(self.added)
+
+    def _code(self, character):
+        return self.overrides.get(character) or self.base.sequences[character]
+
+    def characters(self, strokes, match=MATCH_PREFIX, stroke_count=None):
+        """参数与结果同 StrokeSequenceIndex.characters"""
+        found = self.base.characters(strokes, match, stroke_count)
+        if not self.overrides:
+            return found
+        found = [character for character in found if character not in self.overrides]
+        added = self.added.characters(strokes, match, stroke_count)
+        if match == MATCH_CONTAINS:
+            return found + added
+        # 前缀匹配的结果按笔顺排列，合并后保持该顺序
+        return list(heapq.merge(found, added, key=self._code))
+
+    def next_strokes(self, strokes, match=MATCH_PREFIX, stroke_count=None):
+        """参数与结果同 StrokeSequenceIndex.next_strokes"""
+        counts = self.base.next_strokes(strokes, match, stroke_count)
+        if not self.overrides:
+            return counts
+        counts = dict(counts)
+        for stroke, count in self.removed.next_strokes(strokes, match, stroke_count).items():
+            counts[stroke] -= count
+        for stroke, count in self.added.next_strokes(strokes, match, stroke_count).items():
+            counts[stroke] = counts.get(stroke, 0) + count
+        return {stroke: counts[stroke] for stroke in STROKE_TYPES if counts.get(stroke)}
+
+    def nearest(self, strokes, k=10, max_distance=None):
+        """参数与结果同 StrokeSequenceIndex.nearest"""
+        if not self.overrides:
+            return self.base.nearest(strokes, k, max_distance)
+        # 字典中多取被覆盖的字数，去掉被覆盖的字后仍不少于 k 个
+        found = [(distance, character) for distance, character
+                 in self.base.nearest(strokes, k + len(self.removed), max_distance)
+                 if character not in self.overrides]
+        found += self.added.nearest(strokes, k, max_distance)
+        found.sort(key=lambda item: (item[0], self._code(item[1])))
+        return found[:k]
+
+    def hanzi_ids_for(self, characters):
+        """将汉字列表展开为汉字表中的记录 ID 列表（按 ID 排序）"""
+        ids = []
+        for character in characters:
+            ids.extend(self.hanzi_ids.get(character, ()))
+        ids.sort()
+        return ids
+
+
+def build_stroke_sequence_index():
+    """从笔顺字典构建有序笔顺索引"""
+    store = get_char_store()
+    sequences = {}
+    for character in store.characters():
+        code = encode_strokes(parse_stroke_order(store.stroke_order(character)))
+        if code:
+            sequences[character] = code
+    return StrokeSequenceIndex(sequences)
+
+
+def build_hanzi_stroke_index(base):
+    """读取汉字表的记录 ID 和录入笔顺，叠加到字典索引上"""
+    from .models import Hanzi
+
+    # 汉字表直接读取打包好的笔画编码，无需再解析笔顺文本
+    hanzi_ids = defaultdict(list)
+    sequences = {}
+    for hanzi_id, character, stroke_codes in Hanzi.objects.order_by('id').values_list('id', 'character', 'stroke_codes').iterator():
+        hanzi_ids[character].append(hanzi_id)
+        if stroke_codes:
+            sequences[character] = bytes(stroke_codes).decode('latin-1')
+    return HanziStrokeIndex(base, dict(hanzi_ids), sequences)
+
+
+_base = None
+_base_fingerprint = None
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_stroke_sequence_index():
+    """
+    获取进程内共享的笔顺检索索引（HanziStrokeIndex）
+    字典部分只在字符字典指纹变化时重建；汉字数据版本号变化后（见 caching.bump_data_version），
+    下次访问时只重新读取汉字表部分
+    """
+    global _base, _base_fingerprint, _index, _index_version
+    fingerprint = get_char_store().fingerprint
+    version = (fingerprint, get_data_version())
+    if _index is not None and _index_version == version:
+        return _index
+
+    with _index_lock:
+        if _base is None or _base_fingerprint != fingerprint:
+            start = time.time()
+            _base = build_stroke_sequence_index()
+            _base_fingerprint = fingerprint
+            logger.info(f"笔顺字典索引已构建: {len(_base)} 个汉字, 耗时 {time.time() - start:.2f}秒")
+        if _index is None or _index_version != version:
+            start = time.time()
+            _index = build_hanzi_stroke_index(_base)
+            _index_version = version
+            logger.info(f"笔顺索引已更新: 汉字表 {len(_index.hanzi_ids)} 个汉字, "
+                        f"录入笔顺 {len(_index.overrides)} 个, 耗时 {time.time() - start:.3f}秒")
+    return _index
@@ -0,0 +1,92 @@
+"""
+笔画类型与笔顺文本的解析
+"""
+import re
+from collections import Counter
+
+# 笔顺字典中出现的全部笔画类型，按使用频率排列，也用于笔顺搜索页的快速选择
+STROKE_TYPES = ['横', '竖', '点', '撇', '横折',
+                '捺', '横撇/横钩', '提', '横折钩', '撇折',
+                '竖钩', '竖弯钩', '竖折/竖弯', '竖提', '斜钩',
+                '撇点', '竖折折钩', '横折弯钩/横斜钩', '横折折折钩/横撇弯钩', '横折折撇',
+                '弯钩', '横折折/横折弯', '横折提', '竖折撇/竖折折', '横折折折']
+
+# 笔顺文本的分隔符：逗号（含全角）、顿号和空白
+_SEPARATORS = re.compile(r'[,，、\s]+')
+
+
+def parse_stroke_order(stroke_order):
+    """
+    将笔顺文本解析为笔画列表
+    兼容 "横,竖" 以及早期以 Python 列表形式保存的 "['横', '竖']"
+    :param stroke_order: 笔顺文本
+    :return: 笔画名称列表
+    """
+    if not stroke_order:
+        return []
+    text = stroke_order.strip().strip('[]')
+    return [token.strip('\'"') for token in _SEPARATORS.split(text) if token.strip('\'"')]
+
+
+def parse_stroke_pattern(stroke_pattern):
+    """
+    解析笔顺搜索页提交的笔画组合（空格或逗号分隔）
+    :return: 笔画名称列表
+    """
+    return parse_stroke_order(stroke_pattern)
+
+
+def stroke_counter(stroke_order):
+    """
+    统计笔顺中各笔画出现的次数
+    :return: {笔画: 次数}
+    """
+    return Counter(parse_stroke_order(stroke_order))
+
+
+# 笔画编码：按 STROKE_TYPES 的顺序从 1 开始编号，0 保留作补位，便于紧凑存储和有序比较
+STROKE_CODES = {name: code for code, name in enumerate(STROKE_TYPES, start=1)}
+
+
+def pack_strokes(strokes):
+    """
+    将笔画列表打包为字节串，每个笔画一个字节，取值为笔画编码
+    :param strokes: 笔画名称列表
+    :return: 字节串；包含未知笔画时返回 None
+    """
+    try:
+        return bytes(STROKE_CODES[stroke] for stroke in strokes)
+    except KeyError:
+        return None
+
+
+def unpack_strokes(packed):
+    """将 pack_strokes 的结果还原为笔画名称列表"""
+    return [STROKE_TYPES[code - 1] for code in bytes(packed)]
+
+
+def encode_strokes(strokes):
+    """
+    将笔画列表编码为字符串，每个笔画对应一个码位为笔画编码的字符（即打包字节串按 latin-1 解码）
+    编码后的字符串保持笔画顺序，可直接做前缀比较和排序
+    :param strokes: 笔画名称列表
+    :return: 编码字符串；包含未知笔画时返回 None
+    """
+    packed = pack_strokes(strokes)
+    return None if packed is None else packed.decode('latin-1')
+
+
+def decode_strokes(encoded):
+    """将 encode_strokes 的结果还原为笔画名称列表"""
+    return [STROKE_TYPES[ord(code) - 1] for code in encoded]
+
+
+def normalize_stroke_order(stroke_order):
+    """
+    将笔顺文本规范为 "横,竖,撇" 形式
+    包含未知笔画的文本原样返回，避免丢失人工录入的内容
+    """
+    strokes = parse_stroke_order(stroke_order)
+    if not strokes or pack_strokes(strokes) is None:
+        return stroke_order
+    return ','.join(strokes)
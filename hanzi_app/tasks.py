@@ -6,13 +6,25 @@ import traceback
 import shutil
 from hanzi_project.celery import app
 from .data_importer import import_hanzi_data, extract_zip_to_temp
+from .bulk import remove_files
+from .ocr_models import init_worker_process, registry as ocr_registry
 from django.conf import settings
 import redis
 from hanzi_project.celery import app as celery_app
 import datetime
+from celery.signals import worker_init, worker_process_init
 
 logger = logging.getLogger(__name__)
 
+# OCR 模型只在 worker 中加载：prefork 子进程启动时预加载，solo/threads 池第一次识别时加载
+worker_process_init.connect(init_worker_process, dispatch_uid='hanzi_ocr_preload')
+
+
+@worker_init.connect(dispatch_uid='hanzi_ocr_worker')
+def mark_ocr_worker(**kwargs):
+    ocr_registry.in_worker = True
+
+
 def ensure_media_directories():
     """确保所有必要的媒体目录都存在且可写"""
     dirs_to_check = [
@@ -35,8 +47,8 @@ def ensure_media_directories():
 
 @app.task(bind=True, max_retries=3, default_retry_delay=5, soft_time_limit=1800, time_limit=3600)
 def process_import_data_task(self, image_zip_path, json_level_path=None, json_comment_path=None, 
-                            output_dir=None, test_mode=False):
-    """异步处理汉字数据导入的Celery任务"""
+                            output_dir=None, test_mode=False, ocr_mode=None):
+    """异步处理汉字数据导入的Celery任务，ocr_mode 为识别方式（见 recognition.RECOGNITION_MODES）"""
     # 确保媒体目录存在
     ensure_media_directories()
     
@@ -134,7 +146,7 @@ def process_import_data_task(self, image_zip_path, json_level_path=None, json_co
             log_progress(30, "开始处理汉字数据", "processing")
             result_data = import_hanzi_data(
                 image_folder, json_level_path, json_comment_path,
-                output_dir, test_mode, update_status
+                output_dir, test_mode, update_status, ocr_mode
             )
             
             # 更新返回结果
@@ -222,4 +234,17 @@ def process_import_data_task(self, image_zip_path, json_level_path=None, json_co
             except Exception as e:
                 logger.error(f"处理临时目录失败: {str(e)}")
     
-    return result 
\ No newline at end of file
+    return result 
+
+@app.task(ignore_result=True)
+def remove_files_task(paths):
+    """后台删除批量删除汉字后留下的图片文件"""
+    removed = remove_files(paths)
+    logger.info(f"已删除 {removed}/{len(paths)} 个图片文件")
+    return removed
+
+
+@app.task
+def ocr_model_stats_task():
+    """返回执行该任务的 worker 进程中已加载 OCR 模型的加载耗时和内存"""
+    return ocr_registry.stats()
@@ -10,4 +10,9 @@ def split(value, arg):
 @register.filter
 def strip(value):
     """移除字符串两端的空白字符"""
-    return value.strip() 
\ No newline at end of file
+    return value.strip() 
+
+@register.filter
+def get_item(mapping, key):
+    """按键取字典中的值，不存在时返回 None"""
+    return mapping.get(key) if mapping else None
@@ -0,0 +1,135 @@
+from django.test import TestCase
+
+from hanzi_app.bulk import bulk_delete, bulk_edit
+from hanzi_app.fulltext import get_search_backend
+from hanzi_app.models import Hanzi, HanziIdSequence, HanziPinyin, HanziStroke
+
+
+def create_hanzi(character, structure='左右结构', **fields):
+    """按结构分配编号并插入一条汉字记录"""
+    return Hanzi(code=HanziIdSequence.reserve(structure)[0], character=character, stroke_count=1,
+                 structure=structure, **fields).insert()
+
+
+def search_ids(text):
+    return set(get_search_backend().search(Hanzi.objects.all(), text).values_list('pk', flat=True))
+
+
+class HanziIdSequenceTest(TestCase):
+    """编号序列：预留的编号连续且不重复，预览不占用编号"""
+
+    def test_reserve_returns_contiguous_blocks(self):
+        first = HanziIdSequence.reserve('左右结构', 3)
+        second = HanziIdSequence.reserve('左右结构', 2)
+        self.assertEqual(first, ['10001', '10002', '10003'])
+        self.assertEqual(second, ['10004', '10005'])
+
+    def test_structures_use_separate_prefixes(self):
+        self.assertEqual(HanziIdSequence.reserve('左右结构', 2), ['10001', '10002'])
+        self.assertEqual(HanziIdSequence.reserve('上下结构', 2), ['20001', '20002'])
+        self.assertEqual(HanziIdSequence.reserve('左右结构'), ['10003'])
+
+    def test_peek_does_not_consume(self):
+        self.assertEqual(HanziIdSequence.peek('左右结构'), '10001')
+        self.assertEqual(HanziIdSequence.peek('左右结构'), '10001')
+        self.assertEqual(HanziIdSequence.reserve('左右结构'), ['10001'])
+        self.assertEqual(HanziIdSequence.peek('左右结构'), '10002')
+
+    def test_saved_code_advances_sequence(self):
+        Hanzi(id='10007', character='好', stroke_count=6, structure='左右结构').save()
+        self.assertEqual(HanziIdSequence.peek('左右结构'), '10008')
+        self.assertEqual(HanziIdSequence.reserve('左右结构', 2), ['10008', '10009'])
+
+    def test_exhausted_prefix_raises_and_rolls_back(self):
+        HanziIdSequence.objects.filter(prefix='1').update(last_value=HanziIdSequence.MAX_VALUE - 1)
+        with self.assertRaises(ValueError):
+            HanziIdSequence.reserve('左右结构', 2)
+        self.assertEqual(HanziIdSequence.objects.get(prefix='1').last_value, HanziIdSequence.MAX_VALUE - 1)
+        self.assertEqual(HanziIdSequence.reserve('左右结构'), ['19999'])
+
+    def test_insert_uses_record_sequence_when_pk_is_taken(self):
+        hanzi = Hanzi(code=HanziIdSequence.reserve('左右结构')[0], character='好', stroke_count=6, structure='左右结构')
+        hanzi.insert()
+        hanzi.change_structure('上下结构')
+        hanzi.save()
+        self.assertEqual((hanzi.pk, hanzi.code), ('10001', '20001'))
+
+        # 旧编号 10001 仍是上一条记录的主键，新记录改用记录主键序列，不占用结构编号
+        imported = Hanzi(code='10001', character='人', stroke_count=2, structure='左右结构').insert()
+        self.assertEqual((imported.pk, imported.code), ('R0001', '10001'))
+        self.assertEqual(HanziIdSequence.reserve('左右结构'), ['10002'])
+
+
+class BulkEditTest(TestCase):
+    """批量修改：结构变化时按新结构一次预留编号，主键不变，全文索引随编号更新"""
+
+    def setUp(self):
+        self.rows = [create_hanzi(character) for character in '好人大']
+        self.rows.append(create_hanzi('品', structure='上下结构'))
+
+    def test_structure_change_recodes_rows(self):
+        pks = [hanzi.pk for hanzi in self.rows]
+        results = bulk_edit(pks, {'structure': '上下结构', 'level': 'B'})
+
+        by_pk = {result['id']: result for result in results}
+        self.assertEqual([by_pk[pk]['old_code'] for pk in pks[:3]], ['10001', '10002', '10003'])
+        self.assertEqual([by_pk[pk]['code'] for pk in pks[:3]], ['20002', '20003', '20004'])
+        # 结构未变的记录保留原编号
+        self.assertEqual(by_pk[pks[3]]['code'], '20001')
+        self.assertEqual(by_pk[pks[3]]['changed'], ['level'])
+
+        rows = Hanzi.objects.in_bulk(pks)
+        self.assertEqual(sorted(rows), sorted(pks))
+        self.assertEqual([rows[pk].code for pk in pks], ['20002', '20003', '20004', '20001'])
+        self.assertTrue(all(rows[pk].structure == '上下结构' and rows[pk].level == 'B' for pk in pks))
+        self.assertEqual(HanziIdSequence.objects.get(prefix='2').last_value, 4)
+        self.assertEqual(HanziIdSequence.reserve('上下结构'), ['20005'])
+
+        self.assertEqual(search_ids('20003'), {pks[1]})
+        self.assertEqual(search_ids('10003'), set())
+
+    def test_unchanged_rows_keep_codes(self):
+        results = bulk_edit([self.rows[3].pk], {'structure': '上下结构'})
+        self.assertEqual(results[0]['status'], 'unchanged')
+        self.assertEqual(HanziIdSequence.objects.get(prefix='2').last_value, 1)
+
+
+class BulkDeleteTest(TestCase):
+    """批量删除：笔画索引、拼音索引和全文索引随记录一并删除，仍被引用的标准图片保留"""
+
+    def setUp(self):
+        self.rows = [
+            create_hanzi(character, stroke_order='横,竖', pinyin='hao3', image_path=f'{character}.png',
+                         standard_image='standard/hao.png')
+            for character in '好人大'
+        ]
+
+    def test_removes_index_rows(self):
+        pks = [hanzi.pk for hanzi in self.rows]
+        self.assertEqual(HanziStroke.objects.filter(hanzi_id__in=pks).count(), 6)
+        # 拼音索引还包含字典中的多音字读音，只记录保留的那条记录的行数
+        kept_readings = HanziPinyin.objects.filter(hanzi_id=pks[2]).count()
+        self.assertGreater(kept_readings, 0)
+        self.assertEqual(search_ids('10001'), {pks[0]})
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            deleted, file_count = bulk_delete(pks[:2])
+        self.assertEqual(deleted, 2)
+        # 两张上传图片；标准图片仍被第三条记录引用，不删除
+        self.assertEqual(file_count, 2)
+        self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(list(Hanzi.objects.values_list('pk', flat=True)), [pks[2]])
+        self.assertFalse(HanziStroke.objects.filter(hanzi_id__in=pks[:2]).exists())
+        self.assertFalse(HanziPinyin.objects.filter(hanzi_id__in=pks[:2]).exists())
+        self.assertEqual(HanziStroke.objects.filter(hanzi_id=pks[2]).count(), 2)
+        self.assertEqual(HanziPinyin.objects.filter(hanzi_id=pks[2]).count(), kept_readings)
+        self.assertEqual(search_ids('10001'), set())
+        self.assertEqual(search_ids('10003'), {pks[2]})
+
+    def test_last_reference_schedules_standard_image(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            deleted, file_count = bulk_delete([hanzi.pk for hanzi in self.rows])
+        self.assertEqual((deleted, file_count), (3, 4))
+        self.assertFalse(HanziStroke.objects.exists())
+        self.assertFalse(HanziPinyin.objects.exists())
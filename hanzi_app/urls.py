@@ -20,7 +20,15 @@ urlpatterns = [
     path('download/<str:filename>/', views.download_file, name='download_file'),
     path('clear-selected/', views.clear_selected, name='clear_selected'),
     path('get_stroke_order/<str:char>/', views.get_stroke_order_api, name='get_stroke_order_api'),
+    path('api/chars/', views.get_chars_metadata, name='get_chars_metadata'),
+    path('api/radicals/', views.radical_lookup, name='radical_lookup'),
+    path('api/hanzi/', views.hanzi_list_api, name='hanzi_list_api'),
+    path('api/hanzi/bulk-edit/', views.bulk_edit_hanzi, name='bulk_edit_hanzi'),
+    path('api/hanzi/bulk-delete/', views.bulk_delete_hanzi, name='bulk_delete_hanzi'),
+    path('api/facets/', views.hanzi_facets, name='hanzi_facets'),
+    path('api/cache-stats/', views.cache_statistics, name='cache_statistics'),
     path('stroke-search/', views.stroke_search, name='stroke_search'),
+    path('api/stroke-suggest/', views.stroke_suggest, name='stroke_suggest'),
     path('cleanup_exports/', views.cleanup_exports, name='cleanup_exports'),
     path('delete_export_file/<str:filename>/', views.delete_export_file, name='delete_export_file'),
     path('api/logs/', views.capture_frontend_logs, name='capture_frontend_logs'),
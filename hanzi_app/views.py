@@ -1,25 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
 from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 from django.db import transaction
-from django.core.cache import cache
-from django.db.models import Q, Count, Prefetch
+from django.db.models import Count, Prefetch
 from django.db.models import Value, F  
 from django.db.models import IntegerField  
 import json
 import os
 import shutil
 import zipfile
-from .models import Hanzi
+from collections import Counter, deque
+from .models import Hanzi, HanziIdSequence
 from .forms import HanziForm
 import time
 from django.views.decorators.cache import cache_page
 from .generate import generate_hanzi_image, get_stroke_order,get_pinyin
+from .bulk import bulk_delete, bulk_edit, clean_changes, resolve_selection
+from .caching import cache_stats, get_data_version, read_through
+from .chardata import get_char_store
+from .strokes import STROKE_TYPES, parse_stroke_pattern
+from .filters import count_hanzi, facet_counts, filter_hanzi, normalize_filters
+from .pagination import KeysetPaginator
+from .radicals import get_radical_index
+from .stroke_index import MATCH_CONTAINS, MATCH_FUZZY, MATCH_PREFIX, get_stroke_sequence_index
 import pandas as pd
 from io import BytesIO
 import logging
@@ -37,6 +46,7 @@ import openpyxl
 import uuid
 from django.core.files.storage import FileSystemStorage
 from hanzi_app.data_importer import import_hanzi_data, clean_import_results_folder, extract_zip_to_temp
+from hanzi_app.recognition import RECOGNITION_MODES, get_mode as get_ocr_mode
 from concurrent.futures import ThreadPoolExecutor
 import glob
 from celery.result import AsyncResult
@@ -65,17 +75,6 @@ class HanziSerializer(ModelSerializer):
         filename = os.path.basename(obj.image_path)
         return os.path.splitext(filename)[0]  # 不含后缀的文件名
 
-# 预加载笔画数据
-stroke_dict = {}
-stoke_file_path = os.path.join(settings.BASE_DIR, 'data\\ch_match\\stoke.txt')
-try:
-    with open(stoke_file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            parts = line.strip().split('|')
-            stroke_dict[parts[1]] = parts[2]
-except FileNotFoundError:
-    print(f"文件未找到: {stoke_file_path}")
-
 # 定义上传文件夹路径
 UPLOAD_FOLDER = os.path.join(settings.MEDIA_ROOT, 'uploads')  # 直接使用media根目录
 if not os.path.exists(UPLOAD_FOLDER):
@@ -307,17 +306,19 @@ def index(request):
     level = request.GET.get('level', '')
     variant = request.GET.get('variant', '')
     stroke_count = request.GET.get('stroke_count', '')
+    radical = request.GET.get('radical', '')
     page_number = request.GET.get('page', 1)
     
     # 如果是从详情页返回，且没有筛选参数，尝试从会话中恢复
     is_returning = request.GET.get('returning', '0') == '1'
-    if is_returning and not any([search, structure, level, variant, stroke_count]) and 'last_filter' in request.session:
+    if is_returning and not any([search, structure, level, variant, stroke_count, radical]) and 'last_filter' in request.session:
         last_filter = request.session['last_filter']
         search = last_filter.get('search', '')
         structure = last_filter.get('structure', '')
         level = last_filter.get('level', '')
         variant = last_filter.get('variant', '')
         stroke_count = last_filter.get('stroke_count', '')
+        radical = last_filter.get('radical', '')
         page_number = last_filter.get('page', 1)
     
     # 保存当前筛选条件到会话
@@ -327,40 +328,40 @@ def index(request):
         'level': level,
         'variant': variant,
         'stroke_count': stroke_count,
+        'radical': radical,
         'page': page_number
     }
     
-    # 移除缓存相关代码，直接查询数据库
-    hanzi_list = Hanzi.objects.all().order_by('id')
-    
-    # 应用筛选条件
-    if search:
-        hanzi_list = hanzi_list.filter(
-            Q(character__contains=search) | 
-            Q(pinyin__contains=search) |
-            Q(id__contains=search)
-        )
-    
-    if structure and structure != '所有':
-        hanzi_list = hanzi_list.filter(structure=structure)
-    
-    if level and level != '所有':
-        hanzi_list = hanzi_list.filter(level=level)
-        
-    if variant and variant != '所有':
-        hanzi_list = hanzi_list.filter(variant=variant)
-    
-    if stroke_count and stroke_count != '所有':
-        hanzi_list = hanzi_list.filter(stroke_count=int(stroke_count))
-    
-    # 为每个汉字添加动画延迟
-    for i, hanzi in enumerate(hanzi_list):
-        page_i = i % 20
-        hanzi.animation_delay = page_i * 50  
-    
-    # 分页处理
-    paginator = Paginator(hanzi_list, 20)  # 每页显示20条
-    page_obj = paginator.get_page(page_number)
+    # 应用筛选条件（有搜索词时结果按相关度排序）
+    filters = normalize_filters(search, structure, level, variant, stroke_count, radical=radical)
+    hanzi_list = filter_hanzi(filters)
+    
+    # 分面统计与总数一次聚合取得并缓存，供筛选下拉框显示各选项的数量
+    facets = facet_counts(filters)
+    
+    # 按主键游标分页，只读取当前页；有搜索词时保留相关度顺序
+    paginator = KeysetPaginator(hanzi_list, 20, count=facets['total'], keep_order=bool(search))  # 每页显示20条
+    # 当前页的数据按筛选条件和游标缓存，键中带数据版本号，数据变化后自动失效
+    page_obj = paginator.cached_page(
+        filters,
+        page_number,
+        after=request.GET.get('after') if not is_returning else None,
+        before=request.GET.get('before') if not is_returning else None,
+    )
+    
+    # 只为当前页的汉字添加动画延迟
+    for i, hanzi in enumerate(page_obj.object_list):
+        hanzi.animation_delay = i * 50
+    
+    # 分页链接中需要保留的筛选参数
+    filter_params = urlencode({key: value for key, value in [
+        ('search', search),
+        ('structure', structure),
+        ('level', level),
+        ('variant', variant),
+        ('stroke_count', stroke_count),
+        ('radical', radical),
+    ] if value})
     
     # 准备上下文数据
     context = {
@@ -373,65 +374,38 @@ def index(request):
         'selected_level': level,
         'selected_variant': variant,
         'selected_stroke': stroke_count,
+        'radical': radical,
+        'selected_radical': radical,
+        'radical_groups': get_radical_index().grouped_radicals(),
         'structure_choices': Hanzi.STRUCTURE_CHOICES,
         'level_choices': Hanzi.LEVEL_CHOICES,
         'variant_choices': Hanzi.VARIANT_CHOICES,
         'stroke_count_options': list(range(1, 21)),  # 1-20的笔画范围
-        'total_count': hanzi_list.count(),
-        'hanzi_list': hanzi_list,
+        'facets': facets,
+        'total_count': paginator.count,
+        'filter_params': filter_params,
     }
     
     return render(request, 'hanzi_app/index.html', context)
 
 @cache_page(60 * 15)  # 缓存15分钟
 def get_stroke_count(request, char):
-    # 使用缓存键
-    cache_key = f'stroke_count_{char}'
-    stroke_count = cache.get(cache_key)
-    
-    if stroke_count is None:
-        # 缓存未命中，从数据库或文件获取
-        stroke_count = stroke_dict.get(char, '0')
-        # 存入缓存，有效期1天
-        cache.set(cache_key, stroke_count, 60*60*24)
-    
-    return JsonResponse({'stroke_count': stroke_count})
+    # 直接从预编译的字符数据中按码位查询
+    stroke_count = get_char_store().stroke_count(char)
+    return JsonResponse({'stroke_count': str(stroke_count)})
 
 @csrf_exempt
 @require_http_methods(['POST'])
 def generate_id(request):
-    structure_map = {
-        "未知结构": "0",
-        "左右结构": "1",  # 结构类型映射前缀
-        "上下结构": "2",
-        "包围结构": "3",
-        "独体结构": "4",
-        "品字结构": "5",
-        "穿插结构": "6"
-    }
-    
     try:
         # 从前端请求的JSON body中获取结构类型
         data = json.loads(request.body)
         structure = data.get('structure')
         # 验证结构数据有效性
-        if structure not in structure_map:
+        if structure not in HanziIdSequence.STRUCTURE_PREFIXES:
             return JsonResponse({"error": "无效结构类型"}, status=400)
-        # 获取该结构类型的最新ID
-        prefix = structure_map[structure]
-        last_entry = Hanzi.objects.filter(id__startswith=prefix).order_by('-id').first()
-        
-        # 核心逻辑：自增编号
-        if last_entry:
-            # 示例：最后ID是"10015" → 提取"0015" → 转换为15 → +1=16
-            last_num = int(last_entry.id[1:]) 
-            new_num = last_num + 1
-        else:
-            # 该结构首次使用时从1开始
-            new_num = 1
-        
-        # 生成新ID（前缀+4位数字）
-        new_id = f"{prefix}{new_num:04d}"
+        # 仅预览该结构下一个编号（前缀+4位数字），不占用序列；提交表单时再原子地分配
+        new_id = HanziIdSequence.peek(structure)
         return JsonResponse({"id": new_id})
     
     except Exception as e:
@@ -457,16 +431,12 @@ def add_hanzi(request):
     if request.method == 'POST':
         try:
             character = request.POST.get('character')
-            generated_id = request.POST.get('generated_id')
+            structure = request.POST.get('structure', '未知结构')
             
             # 验证汉字字符
             if not character or len(character) != 1:
                 return JsonResponse({'error': '请输入单个汉字字符'}, status=400)
             
-            # 验证ID
-            if not generated_id:
-                return JsonResponse({'error': '请生成有效的ID'}, status=400)
-            
             # 处理用户上传的图片
             image_file = request.FILES.get('image_file')
             if not image_file:
@@ -476,13 +446,11 @@ def add_hanzi(request):
             if not allowed_file(image_file.name):
                 return JsonResponse({'error': '不支持的图片格式'}, status=400)
             
-            # 保存用户图片
-            filename = generate_filename(generated_id, image_file.name)
-            file_path = os.path.join(UPLOAD_FOLDER, filename)
-            
-            with open(file_path, 'wb+') as destination:
-                for chunk in image_file.chunks():
-                    destination.write(chunk)
+            # 表单中的编号只是预览，提交时才从编号序列中分配，放弃填写的表单不占用编号
+            try:
+                generated_id = generate_new_id(structure)
+            except ValueError as e:
+                return JsonResponse({'error': str(e)}, status=400)
             
             # 自动获取笔顺
             stroke_order = request.POST.get('stroke_order', '')
@@ -492,20 +460,28 @@ def add_hanzi(request):
                 if stroke_orders and stroke_orders[0]:
                     stroke_order = stroke_orders[0]
             
-            # 创建汉字对象
+            # 创建汉字对象（主键默认与编号相同，见 Hanzi.insert）
             hanzi = Hanzi(
-                id=generated_id,
+                code=generated_id,
                 character=character,
                 stroke_count=int(request.POST.get('stroke_count', 0)),
-                structure=request.POST.get('structure', '未知结构'),
+                structure=structure,
                 pinyin=request.POST.get('pinyin', ''),
                 level=request.POST.get('level', 'D'),
                 variant=request.POST.get('variant', '简体'),
                 comment=request.POST.get('comment', ''),
-                image_path=f"uploads/{filename}",
                 stroke_order=stroke_order
             )
-            hanzi.save()
+            # 先插入记录确定主键，再保存以主键命名的用户图片，不会覆盖其他记录的图片；图片保存失败时记录随事务回滚
+            with transaction.atomic():
+                hanzi.insert()
+                filename = generate_filename(hanzi.pk, image_file.name)
+                file_path = os.path.join(UPLOAD_FOLDER, filename)
+                with open(file_path, 'wb+') as destination:
+                    for chunk in image_file.chunks():
+                        destination.write(chunk)
+                hanzi.image_path = f"uploads/{filename}"
+                Hanzi.objects.filter(id=hanzi.id).update(image_path=hanzi.image_path)
             
             # 自动生成标准图片并更新数据库
             standard_path = generate_hanzi_image(hanzi.character)
@@ -522,7 +498,8 @@ def add_hanzi(request):
     return render(request, 'hanzi_app/add.html')
 
 def hanzi_detail(request, hanzi_id):
-    hanzi = get_object_or_404(Hanzi, id=hanzi_id)
+    # 详情数据按数据版本号缓存，返回链接与请求参数有关，每次单独构建
+    detail = read_through('detail', (hanzi_id,), lambda: load_hanzi_detail(hanzi_id), DETAIL_CACHE_TIMEOUT)
     
     # 构建返回URL，添加返回标记并保留所有筛选条件
     url_params = {
@@ -539,6 +516,18 @@ def hanzi_detail(request, hanzi_id):
     # 构建完整的返回URL
     back_url = reverse('hanzi_app:index') + '?' + urlencode(url_params)
     
+    context = dict(detail, back_url=back_url)
+    return render(request, 'hanzi_app/detail.html', context)
+
+
+# 详情数据缓存时间（秒）
+DETAIL_CACHE_TIMEOUT = 60 * 30
+
+
+def load_hanzi_detail(hanzi_id):
+    """详情页的数据：汉字记录、笔顺和拼音（未录入时自动生成）"""
+    hanzi = get_object_or_404(Hanzi, id=hanzi_id)
+    
     # 获取汉字的笔画顺序
     if hanzi.stroke_order:
         stroke_order = hanzi.stroke_order
@@ -548,13 +537,11 @@ def hanzi_detail(request, hanzi_id):
     # 获取拼音
     pinyin = hanzi.pinyin if hanzi.pinyin else get_pinyin(hanzi.character)
     
-    context = {
+    return {
         'hanzi': hanzi,
         'stroke_order': stroke_order,
         'pinyin': pinyin,
-        'back_url': back_url
     }
-    return render(request, 'hanzi_app/detail.html', context)
 
 def delete_hanzi(request, hanzi_id):
     try:
@@ -615,6 +602,8 @@ def edit_hanzi(request, hanzi_id):
     back_url = reverse('hanzi_app:index') + '?' + urlencode(url_params)
     
     if request.method == 'POST' and not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        # 表单校验时会把提交的值写入 hanzi，先保存原始结构
+        original_structure = hanzi.structure
         form = HanziForm(request.POST, request.FILES, instance=hanzi)
         if form.is_valid():
             try:
@@ -622,17 +611,10 @@ def edit_hanzi(request, hanzi_id):
                 with transaction.atomic():
                     hanzi_instance = form.save(commit=False)
                     
-                    # 检查结构是否发生变化
-                    original_structure = hanzi.structure
-                    new_structure = hanzi_instance.structure
-                    if new_structure != original_structure:
-                        # 结构变化，生成新ID
-                        old_id = hanzi_instance.id
-                        new_id = generate_new_id(new_structure)
-                        logger.info(f"汉字'{hanzi_instance.character}'结构从'{original_structure}'变为'{new_structure}'，ID从'{old_id}'更新为'{new_id}'")
-                        
-                        # 更新ID
-                        hanzi_instance.id = new_id
+                    # 结构变化只重新分配编号，主键、图片文件和索引行都不变
+                    old_code = hanzi_instance.code
+                    if hanzi_instance.change_structure(hanzi_instance.structure, previous=original_structure):
+                        logger.info(f"汉字'{hanzi_instance.character}'结构从'{original_structure}'变为'{hanzi_instance.structure}'，编号从'{old_code}'更新为'{hanzi_instance.code}'")
                     
                     # 处理图片上传 - 用户图片
                     if 'new_image_file' in request.FILES:
@@ -652,25 +634,7 @@ def edit_hanzi(request, hanzi_id):
                         
                         # 更新图片路径
                         hanzi_instance.image_path = f"uploads/{filename}"
-                    elif new_structure != original_structure and hanzi.image_path:
-                        # 结构变化但没有上传新图片，需要更新现有图片文件名
-                        old_image_path = os.path.join(UPLOAD_FOLDER, os.path.basename(hanzi.image_path))
-                        if os.path.exists(old_image_path):
-                            # 获取文件扩展名
-                            filename_parts = os.path.basename(hanzi.image_path).split('.')
-                            if len(filename_parts) > 1:
-                                ext = filename_parts[-1]
-                                # 新文件名使用新ID
-                                new_filename = f"{hanzi_instance.id}.{ext}"
-                                new_image_path = os.path.join(UPLOAD_FOLDER, new_filename)
-                                # 复制文件
-                                shutil.copy2(old_image_path, new_image_path)
-                                # 删除旧文件
-                                os.remove(old_image_path)
-                                logger.info(f"已重命名图片文件: {os.path.basename(old_image_path)} -> {new_filename}")
-                                # 更新数据库中的图片路径
-                                hanzi_instance.image_path = f"uploads/{new_filename}"
-                    
+
                     # 处理标准图片上传
                     if 'new_standard_file' in request.FILES:
                         # 标准图片处理逻辑
@@ -685,34 +649,9 @@ def edit_hanzi(request, hanzi_id):
                         # 更新标准图片路径字段，如果模型中有的话
                         if hasattr(hanzi_instance, 'standard_image_path'):
                             hanzi_instance.standard_image_path = f"uploads/{standard_filename}"
-                    elif new_structure != original_structure and hasattr(hanzi, 'standard_image_path') and hanzi.standard_image_path:
-                        # 处理标准图片路径更新
-                        old_standard_path = os.path.join(UPLOAD_FOLDER, os.path.basename(hanzi.standard_image_path))
-                        if os.path.exists(old_standard_path):
-                            # 获取文件扩展名
-                            filename_parts = os.path.basename(hanzi.standard_image_path).split('.')
-                            if len(filename_parts) > 1:
-                                ext = filename_parts[-1]
-                                # 新文件名使用新ID
-                                new_standard_filename = f"{hanzi_instance.id}_standard.{ext}"
-                                new_standard_path = os.path.join(UPLOAD_FOLDER, new_standard_filename)
-                                # 复制文件
-                                shutil.copy2(old_standard_path, new_standard_path)
-                                # 删除旧文件
-                                os.remove(old_standard_path)
-                                logger.info(f"已重命名标准图片文件: {os.path.basename(old_standard_path)} -> {new_standard_filename}")
-                                # 更新数据库中的标准图片路径
-                                hanzi_instance.standard_image_path = f"uploads/{new_standard_filename}"
-                    
-                    # 如果结构变化导致ID变化，需要删除旧记录并创建新记录
-                    if new_structure != original_structure:
-                        # 删除旧记录
-                        Hanzi.objects.filter(id=hanzi_id).delete()
-                        # 重新创建新记录
-                        hanzi_instance.save()
-                    else:
-                        # 正常保存
-                        hanzi_instance.save()
+
+                    # 结构变化时也只是单行更新
+                    hanzi_instance.save()
                     
                     # 重定向到详情页，保留返回参数
                     return redirect(back_url)
@@ -770,16 +709,10 @@ def update_hanzi(request, hanzi_id):
                     with transaction.atomic():
                         hanzi_instance = form.save(commit=False)
                         
-                        # 检查结构是否发生变化
-                        new_structure = hanzi_instance.structure
-                        if new_structure != original_structure:
-                            # 结构变化，生成新ID
-                            old_id = hanzi_instance.id
-                            new_id = generate_new_id(new_structure)
-                            logger.info(f"汉字'{hanzi_instance.character}'结构从'{original_structure}'变为'{new_structure}'，ID从'{old_id}'更新为'{new_id}'")
-                            
-                            # 更新ID
-                            hanzi_instance.id = new_id
+                        # 结构变化只重新分配编号，主键、图片文件和索引行都不变
+                        old_code = hanzi_instance.code
+                        if hanzi_instance.change_structure(hanzi_instance.structure, previous=original_structure):
+                            logger.info(f"汉字'{hanzi_instance.character}'结构从'{original_structure}'变为'{hanzi_instance.structure}'，编号从'{old_code}'更新为'{hanzi_instance.code}'")
                         
                         # 处理图片上传 - 用户图片
                         if 'new_image_file' in request.FILES:
@@ -799,25 +732,7 @@ def update_hanzi(request, hanzi_id):
                             
                             # 更新图片路径
                             hanzi_instance.image_path = f"uploads/{filename}"
-                        elif new_structure != original_structure and hanzi.image_path:
-                            # 结构变化但没有上传新图片，需要更新现有图片文件名
-                            old_image_path = os.path.join(UPLOAD_FOLDER, os.path.basename(hanzi.image_path))
-                            if os.path.exists(old_image_path):
-                                # 获取文件扩展名
-                                filename_parts = os.path.basename(hanzi.image_path).split('.')
-                                if len(filename_parts) > 1:
-                                    ext = filename_parts[-1]
-                                    # 新文件名使用新ID
-                                    new_filename = f"{hanzi_instance.id}.{ext}"
-                                    new_image_path = os.path.join(UPLOAD_FOLDER, new_filename)
-                                    # 复制文件
-                                    shutil.copy2(old_image_path, new_image_path)
-                                    # 删除旧文件
-                                    os.remove(old_image_path)
-                                    logger.info(f"已重命名图片文件: {os.path.basename(old_image_path)} -> {new_filename}")
-                                    # 更新数据库中的图片路径
-                                    hanzi_instance.image_path = f"uploads/{new_filename}"
-                        
+
                         # 处理标准图片上传
                         if 'new_standard_file' in request.FILES:
                             # 标准图片处理逻辑
@@ -832,40 +747,16 @@ def update_hanzi(request, hanzi_id):
                             # 更新标准图片路径字段，如果模型中有的话
                             if hasattr(hanzi_instance, 'standard_image_path'):
                                 hanzi_instance.standard_image_path = f"uploads/{standard_filename}"
-                        elif new_structure != original_structure and hasattr(hanzi, 'standard_image_path') and hanzi.standard_image_path:
-                            # 处理标准图片路径更新
-                            old_standard_path = os.path.join(UPLOAD_FOLDER, os.path.basename(hanzi.standard_image_path))
-                            if os.path.exists(old_standard_path):
-                                # 获取文件扩展名
-                                filename_parts = os.path.basename(hanzi.standard_image_path).split('.')
-                                if len(filename_parts) > 1:
-                                    ext = filename_parts[-1]
-                                    # 新文件名使用新ID
-                                    new_standard_filename = f"{hanzi_instance.id}_standard.{ext}"
-                                    new_standard_path = os.path.join(UPLOAD_FOLDER, new_standard_filename)
-                                    # 复制文件
-                                    shutil.copy2(old_standard_path, new_standard_path)
-                                    # 删除旧文件
-                                    os.remove(old_standard_path)
-                                    logger.info(f"已重命名标准图片文件: {os.path.basename(old_standard_path)} -> {new_standard_filename}")
-                                    # 更新数据库中的标准图片路径
-                                    hanzi_instance.standard_image_path = f"uploads/{new_standard_filename}"
-                        
-                        # 如果结构变化导致ID变化，需要删除旧记录并创建新记录
-                        if new_structure != original_structure:
-                            # 删除旧记录
-                            Hanzi.objects.filter(id=hanzi_id).delete()
-                            # 重新创建新记录
-                            hanzi_instance.save()
-                        else:
-                            # 正常保存
-                            hanzi_instance.save()
+
+                        # 结构变化时也只是单行更新
+                        hanzi_instance.save()
                         
                         # 返回JSON响应
                         return JsonResponse({
                             'success': True,
                             'message': '汉字更新成功',
                             'id': hanzi_instance.id,
+                            'code': hanzi_instance.code,
                             'back_url': back_url
                         })
                         
@@ -963,12 +854,9 @@ def get_auto_stroke_order(character):
     if not character:
         return ""
         
-    stroke_orders = get_stroke_order(character)
-    if stroke_orders and stroke_orders[0]:
-        return stroke_orders[0]
-    return ""
+    return get_char_store().stroke_order(character)
 
-def process_hanzi_data(data_item, image_dir=None, zip_file=None, is_json=True):
+def process_hanzi_data(data_item, image_dir=None, zip_file=None, is_json=True, reserved_ids=None):
     """处理单个汉字数据项，用于导入
     
     Args:
@@ -976,6 +864,7 @@ def process_hanzi_data(data_item, image_dir=None, zip_file=None, is_json=True):
         image_dir: 解压的临时目录
         zip_file: 上传的ZIP文件
         is_json: 是否是JSON格式(True)或Excel格式(False)
+        reserved_ids: reserve_import_ids 预留的编号，未提供ID的记录优先从中取用
         
     Returns:
         tuple: (成功标志, 汉字对象或错误消息)
@@ -1053,111 +942,67 @@ def process_hanzi_data(data_item, image_dir=None, zip_file=None, is_json=True):
             if pd.isna(structure):
                 structure = '未知结构'
         
-        # 检查ID是否存在
+        # 检查编号是否存在（文件中的 id 为显示编号）
         existing_hanzi = None
         is_update = False
         
         if hanzi_id:
-            try:
-                # 尝试匹配ID
-                existing_hanzi = Hanzi.objects.get(id=hanzi_id)
+            existing_hanzi = Hanzi.objects.filter(code=hanzi_id).first()
+            if existing_hanzi:
                 is_update = True
-                logger.info(f"找到ID为 {hanzi_id} 的现有记录，将进行更新")
-                
-                # 检查结构是否变化
-                if existing_hanzi.structure != structure:
-                    logger.info(f"汉字'{char}'的结构由'{existing_hanzi.structure}'变为'{structure}'，需要更新ID")
-                    # 结构变化，生成新ID
-                    old_id = hanzi_id
-                    hanzi_id = generate_new_id(structure)
-                    logger.info(f"为汉字'{char}'生成新ID: {hanzi_id}")
-                    
-                    # 如果有图片，处理图片文件
-                    if existing_hanzi.image_path:
-                        old_image_path = os.path.join(UPLOAD_FOLDER, os.path.basename(existing_hanzi.image_path))
-                        if os.path.exists(old_image_path):
-                            # 获取文件扩展名
-                            filename_parts = os.path.basename(existing_hanzi.image_path).split('.')
-                            if len(filename_parts) > 1:
-                                ext = filename_parts[-1]
-                                # 新文件名使用新ID
-                                new_filename = f"{hanzi_id}.{ext}"
-                                new_image_path = os.path.join(UPLOAD_FOLDER, new_filename)
-                                # 复制文件
-                                shutil.copy2(old_image_path, new_image_path)
-                                # 删除旧文件
-                                os.remove(old_image_path)
-                                logger.info(f"已重命名图片文件: {os.path.basename(old_image_path)} -> {new_filename}")
-                                # 更新数据库中的图片路径
-                                image_path = f"uploads/{new_filename}"
-                    
-                    # 如果有标准图片，处理标准图片文件
-                    if hasattr(existing_hanzi, 'standard_image_path') and existing_hanzi.standard_image_path:
-                        old_standard_path = os.path.join(UPLOAD_FOLDER, os.path.basename(existing_hanzi.standard_image_path))
-                        if os.path.exists(old_standard_path):
-                            # 获取文件扩展名
-                            filename_parts = os.path.basename(existing_hanzi.standard_image_path).split('.')
-                            if len(filename_parts) > 1:
-                                ext = filename_parts[-1]
-                                # 新文件名使用新ID
-                                new_standard_filename = f"{hanzi_id}_standard.{ext}"
-                                new_standard_path = os.path.join(UPLOAD_FOLDER, new_standard_filename)
-                                # 复制文件
-                                shutil.copy2(old_standard_path, new_standard_path)
-                                # 删除旧文件
-                                os.remove(old_standard_path)
-                                logger.info(f"已重命名标准图片文件: {os.path.basename(old_standard_path)} -> {new_standard_filename}")
-                    
-                    # 将更新模式设为False，因为我们将删除旧记录并创建新记录
-                    is_update = False
-                    
-                    # 删除旧记录
-                    existing_hanzi.delete()
-                    logger.info(f"已删除原ID为{old_id}的记录")
-                    existing_hanzi = None
+                logger.info(f"找到编号为 {hanzi_id} 的现有记录，将进行更新")
                 
-            except Hanzi.DoesNotExist:
-                if not existing_hanzi:
-                    # 如果没有找到匹配的ID，则创建新记录
-                    logger.info(f"未找到ID为 {hanzi_id} 的记录，将创建新记录")
+                # 结构变化只重新分配编号，记录本身和图片文件不变
+                original_structure = existing_hanzi.structure
+                if existing_hanzi.change_structure(structure):
+                    hanzi_id = existing_hanzi.code
+                    logger.info(f"汉字'{char}'的结构由'{original_structure}'变为'{structure}'，编号更新为{hanzi_id}")
+            else:
+                # 如果没有找到匹配的编号，则创建新记录
+                logger.info(f"未找到编号为 {hanzi_id} 的记录，将创建新记录")
         else:
-            # 没有提供ID，生成新ID
-            hanzi_id = generate_new_id(structure)
+            # 没有提供ID，优先使用预留的编号，否则生成新ID
+            pool = (reserved_ids or {}).get(structure)
+            hanzi_id = pool.popleft() if pool else generate_new_id(structure)
             logger.info(f"未提供ID，生成新ID: {hanzi_id}")
-          
-        
-        # 处理图片文件
-        image_path = ""
-        if zip_file:
-            if is_json and 'image_path' in data_item and data_item['image_path']:
-                image_path = process_import_image(data_item['image_path'], image_dir, hanzi_id)
-            elif not is_json:
-                # 处理Excel中的image_path
-                if 'image_path' in data_item and not pd.isna(data_item['image_path']):
-                    image_filename = str(data_item['image_path'])
-                    image_path = process_import_image(image_filename, image_dir, hanzi_id)
-                # 如果未找到，尝试查找格式为A开头的值作为图片路径
-                else:
-                    for key, value in data_item.items():
-                        if pd.isna(value):
-                            continue
-                        str_value = str(value).strip()
-                        if str_value.startswith('A') and str_value[1:].isdigit():
-                            image_path = process_import_image(str_value, image_dir, hanzi_id)
-                            break
+        
+        def import_image(record_pk):
+            """按记录主键保存导入的图片，返回相对路径，未找到图片时为空"""
+            if not zip_file:
+                return ""
+            if is_json:
+                if 'image_path' in data_item and data_item['image_path']:
+                    return process_import_image(data_item['image_path'], image_dir, record_pk)
+                return ""
+            # 处理Excel中的image_path
+            if 'image_path' in data_item and not pd.isna(data_item['image_path']):
+                return process_import_image(str(data_item['image_path']), image_dir, record_pk)
+            # 如果未找到，尝试查找格式为A开头的值作为图片路径
+            for key, value in data_item.items():
+                if pd.isna(value):
+                    continue
+                str_value = str(value).strip()
+                if str_value.startswith('A') and str_value[1:].isdigit():
+                    return process_import_image(str_value, image_dir, record_pk)
+            return ""
+        
+        # 处理图片文件：更新时沿用原主键；新记录的主键在插入时确定（见 Hanzi.insert），插入后再保存图片
+        image_path = import_image(existing_hanzi.pk) if is_update else ""
         
         # 如果检验发现是更新汉字，尝试使用现有图片路径（is_update=True）
         if is_update and not image_path and existing_hanzi.image_path:
             image_path = existing_hanzi.image_path
             
-        # 生成笔顺
-        stroke_order = get_auto_stroke_order(char)
-            
-        # 生成拼音
-        pinyin = get_pinyin(char)[0] if get_pinyin(char) else ''
-            
-        # 生成笔画数
-        stroke_count = stroke_dict.get(char, 0)
+        # 从字符数据中一次取出笔顺、拼音和笔画数
+        char_info = get_char_store().lookup(char)
+        if char_info:
+            stroke_order = char_info.stroke_order
+            pinyin = char_info.pinyin[0] if char_info.pinyin else ''
+            stroke_count = char_info.stroke_count
+        else:
+            stroke_order = ''
+            pinyin = get_pinyin(char)[0] if get_pinyin(char) else ''
+            stroke_count = 0
         
         # 获取其他字段
         if is_json:
@@ -1179,7 +1024,7 @@ def process_hanzi_data(data_item, image_dir=None, zip_file=None, is_json=True):
                 
         # 准备汉字数据
         hanzi_data = {
-            'id': hanzi_id,
+            'code': hanzi_id,
             'character': char,
             'stroke_count': stroke_count,
             'structure': structure,
@@ -1204,14 +1049,22 @@ def process_hanzi_data(data_item, image_dir=None, zip_file=None, is_json=True):
             logger.info(f"创建新汉字记录: ID={hanzi_id}, 字符={char}")
             
         # 保存到数据库
-        hanzi_obj.save()
+        if is_update:
+            hanzi_obj.save()
+        else:
+            with transaction.atomic():
+                hanzi_obj.insert()
+                image_path = import_image(hanzi_obj.pk)
+                if image_path:
+                    hanzi_obj.image_path = image_path
+                    Hanzi.objects.filter(id=hanzi_obj.pk).update(image_path=image_path)
         
         # 自动生成标准图片并
         standard_path = generate_hanzi_image(char)
         if standard_path:
             # 提取相对路径并更新数据库
             rel_path = os.path.join("standard_images", f"{char}.jpg")
-            Hanzi.objects.filter(id=hanzi_id).update(standard_image=rel_path)
+            Hanzi.objects.filter(id=hanzi_obj.pk).update(standard_image=rel_path)
             
         return True, hanzi_obj
         
@@ -1272,8 +1125,11 @@ def handle_import_file(file_obj, zip_file=None, is_json=True):
             success_count = 0
             errors = []
             
+            # 未提供编号的记录按结构批量预留编号，避免逐条查询最大编号
+            reserved_ids = reserve_import_ids(data, is_json)
+            
             for item in data:
-                success, result = process_hanzi_data(item, image_dir, zip_file, is_json)
+                success, result = process_hanzi_data(item, image_dir, zip_file, is_json, reserved_ids)
                 
                 if success:
                     success_count += 1
@@ -1364,17 +1220,10 @@ def export_hanzi(request):
         # 从会话获取筛选参数
         export_filters = request.session.get('export_filters', {})
         
-        # 获取筛选后的汉字列表
-        filtered_hanzi = get_filtered_hanzi_list(
-            export_filters.get('search', ''),
-            export_filters.get('structure', ''),
-            export_filters.get('level', ''),
-            export_filters.get('variant', ''),
-            export_filters.get('stroke_count', ''),
-            export_filters.get('ids', ''),
-            export_filters.get('stroke_count_min', ''),
-            export_filters.get('stroke_count_max', '')
-        )
+        # 获取筛选后的汉字列表，记录数按筛选条件缓存
+        filters = normalize_filters(**export_filters)
+        filtered_hanzi = filter_hanzi(filters)
+        filtered_count = count_hanzi(filters)
         
         # 生成导出文件
         export_files = generate_export_files(
@@ -1382,9 +1231,10 @@ def export_hanzi(request):
             include_images,
             include_standard_images,
             selected_fields,
-            embed_images_in_excel
+            embed_images_in_excel,
+            count=filtered_count
         )
-        export_files['count'] = filtered_hanzi.count()  # 添加记录数量
+        export_files['count'] = filtered_count  # 添加记录数量
         
         # 保存导出文件信息到会话
         request.session['export_files'] = export_files
@@ -1414,13 +1264,12 @@ def export_hanzi(request):
         stroke_count = request.GET.get('stroke_count', '')
         stroke_count_min = request.GET.get('stroke_count_min', '')
         stroke_count_max = request.GET.get('stroke_count_max', '')
+        radical = request.GET.get('radical', '')
         return_url = request.GET.get('return_url', reverse('hanzi_app:index'))
         
-        # 获取筛选后的汉字列表
-        filtered_hanzi = get_filtered_hanzi_list(
-            search, structure, level, variant, stroke_count, 
-            ids, stroke_count_min, stroke_count_max
-        )
+        # 筛选结果只用于显示记录数，计数按筛选条件缓存
+        filters = normalize_filters(search, structure, level, variant, stroke_count,
+                                    ids, stroke_count_min, stroke_count_max, radical)
         
         # 保存筛选参数到会话，供后续使用
         request.session['export_filters'] = {
@@ -1431,7 +1280,8 @@ def export_hanzi(request):
             'variant': variant,
             'stroke_count': stroke_count,
             'stroke_count_min': stroke_count_min,
-            'stroke_count_max': stroke_count_max
+            'stroke_count_max': stroke_count_max,
+            'radical': radical
         }
         
         # 构建筛选信息对象，用于显示在前端
@@ -1440,6 +1290,7 @@ def export_hanzi(request):
             'variant': variant if variant and variant != '所有' else None,
             'level': level if level and level != '所有' else None,
             'search_term': search if search else None,
+            'radical': radical if radical and radical != '所有' else None,
             'stroke_count': stroke_count if stroke_count and stroke_count != '所有' else None,
         }
         
@@ -1466,7 +1317,7 @@ def export_hanzi(request):
         context = {
             'available_fields': available_fields,
             'image_options': image_options,
-            'filtered_hanzi_count': filtered_hanzi.count(),
+            'filtered_hanzi_count': count_hanzi(filters),
             'filter_info': filter_info,
             'return_url': return_url
         }
@@ -1549,53 +1400,8 @@ def delete_export_file(request, filename):
         logger.error(f"删除文件失败: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
 
-def get_filtered_hanzi_list(search, structure, level, variant, stroke_count, ids, stroke_count_min, stroke_count_max):
-    """根据筛选条件获取汉字列表"""
-    queryset = Hanzi.objects.all()
-    
-    # 如果指定了ID列表，则使用ID列表筛选
-    if ids:
-        id_list = ids.split(',')
-        queryset = queryset.filter(id__in=id_list)
-        return queryset
-    
-    # 否则使用其他筛选条件
-    if search:
-        queryset = queryset.filter(
-            Q(id__icontains=search) | 
-            Q(character__icontains=search) | 
-            Q(pinyin__icontains=search) | 
-            Q(comment__icontains=search)
-        )
-    
-    if structure and structure != '所有':
-        queryset = queryset.filter(structure=structure)
-    
-    if level and level != '所有':
-        queryset = queryset.filter(level=level)
-    
-    if variant and variant != '所有':
-        queryset = queryset.filter(variant=variant)
-    
-    if stroke_count and stroke_count != '所有':
-        try:
-            stroke_count_int = int(stroke_count)
-            queryset = queryset.filter(stroke_count=stroke_count_int)
-        except ValueError:
-            pass
-    
-    if stroke_count_min and stroke_count_max:
-        try:
-            stroke_count_min_int = int(stroke_count_min)
-            stroke_count_max_int = int(stroke_count_max)
-            queryset = queryset.filter(stroke_count__range=(stroke_count_min_int, stroke_count_max_int))
-        except ValueError:
-            pass
-    
-    return queryset
-
-def generate_export_files(filtered_hanzi, include_images=False, include_standard_images=False, selected_fields=[], embed_images_in_excel=False):
-    """生成导出文件"""
+def generate_export_files(filtered_hanzi, include_images=False, include_standard_images=False, selected_fields=[], embed_images_in_excel=False, count=None):
+    """生成导出文件，count 为已知的记录数（避免重复计数）"""
     try:
         # 创建导出目录
         export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
@@ -1610,13 +1416,16 @@ def generate_export_files(filtered_hanzi, include_images=False, include_standard
         if 'character' not in selected_fields:
             selected_fields.append('character')
         
-        # 构建返回结果
+        if count is None:
+            count = filtered_hanzi.count()
+        
+        # 构建返回结果，总数走计数缓存
         result = {
             'timestamp': timestamp,
-            'count': filtered_hanzi.count(),
+            'count': count,
             'filter_info': {
-                'total_hanzi': Hanzi.objects.count(),
-                'filtered_hanzi': filtered_hanzi.count()
+                'total_hanzi': count_hanzi(()),
+                'filtered_hanzi': count
             },
             'selected_fields': selected_fields
         }
@@ -1690,6 +1499,9 @@ def custom_serialize_hanzi(queryset, fields):
                 # 处理图片路径，只返回文件名部分（不含后缀）
                 filename = os.path.basename(hanzi.image_path)
                 item[field] = os.path.splitext(filename)[0]
+            elif field == 'id':
+                # 导出的编号为显示编号，导入时按编号匹配
+                item[field] = hanzi.code
             else:
                 # 获取其他字段值
                 value = getattr(hanzi, field, '')
@@ -1714,6 +1526,9 @@ def export_to_excel(filtered_hanzi, excel_file_path, selected_fields, embed_imag
                     # 处理标准图片路径
                     filename = os.path.basename(hanzi.standard_image)
                     item[field] = os.path.splitext(filename)[0]  # 不含后缀的文件名
+                elif field == 'id':
+                    # 导出的编号为显示编号，导入时按编号匹配
+                    item[field] = hanzi.code
                 else:
                     # 获取其他字段值
                     value = getattr(hanzi, field, '')
@@ -1910,94 +1725,418 @@ def clear_selected(request):
     return JsonResponse({'success': True})
 
 def generate_new_id(structure):
-    """根据结构生成新的汉字ID"""
-    structure_map = {
-        "未知结构": "0",
-        "左右结构": "1",
-        "上下结构": "2",
-        "包围结构": "3",
-        "独体结构": "4",
-        "品字结构": "5",
-        "穿插结构": "6"
-    }
-    
-    prefix = structure_map.get(structure, "0")
-    
-    # 找到该结构的最大ID
-    max_id_obj = Hanzi.objects.filter(id__startswith=prefix).order_by('-id').first()
-    
-    if max_id_obj:
-        # 从现有ID中提取数字部分并递增
+    """根据结构分配新的汉字ID（编号序列原子递增）"""
+    return HanziIdSequence.reserve(structure)[0]
+
+
+def reserve_import_ids(data, is_json=True):
+    """
+    为导入数据中未提供编号的记录按结构一次性预留编号
+    :return: {结构: deque([编号, ...])}，每个结构只需一次数据库往返
+    """
+    counts = Counter()
+    for item in data:
+        hanzi_id = item.get('id')
+        structure = item.get('structure', '未知结构')
+        if not is_json:
+            hanzi_id = None if pd.isna(hanzi_id) else hanzi_id
+            structure = '未知结构' if pd.isna(structure) else structure
+        if not str(hanzi_id if hanzi_id is not None else '').strip():
+            counts[structure] += 1
+    reserved = {}
+    for structure, count in counts.items():
         try:
-            current_num = int(max_id_obj.id[1:])
-            new_num = current_num + 1
-            new_id = f"{prefix}{new_num:04d}"
-        except ValueError:
-            # 如果现有ID不符合预期格式，则生成新的
-            new_id = f"{prefix}0001"
-    else:
-        # 如果没有该结构的汉字，从1开始
-        new_id = f"{prefix}0001"
-    
-    return new_id
+            reserved[structure] = deque(HanziIdSequence.reserve(structure, count))
+        except ValueError as e:
+            # 编号不足时不预留，由逐条分配报告具体失败的记录
+            logger.warning(f"预留导入编号失败: {e}")
+    return reserved
 
 @cache_page(60 * 15)  # 缓存15分钟
 def get_stroke_order_api(request, char):
-    # 使用缓存键
-    cache_key = f'stroke_order_{char}'
-    stroke_order = cache.get(cache_key)
-    
-    if stroke_order is None:
-        # 缓存未命中，从数据库或文件获取
-        from .generate import get_stroke_order
-        stroke_orders = get_stroke_order(char)
-        if stroke_orders and stroke_orders[0]:
-            # 去除中括号和引号
-            stroke_order = stroke_orders[0].strip("[]'")
-        else:
-            stroke_order = ''
-        # 存入缓存，有效期1天
-        cache.set(cache_key, stroke_order, 60*60*24)
-    
+    # 直接从预编译的字符数据中按码位查询，去除中括号和引号
+    stroke_order = get_char_store().stroke_order(char).strip("[]'")
     return JsonResponse({'stroke_order': stroke_order})
 
+# 批量查询字符信息时单次最多处理的字符数
+CHAR_BATCH_LIMIT = 2000
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def get_chars_metadata(request):
+    """
+    批量查询字符信息：笔画数、笔顺、拼音读音以及汉字表中是否已有样本
+    GET 参数 chars 为字符串；POST 请求体为 {"characters": "字符串" 或 ["字", ...]}
+    字符信息全部来自内存中的字符数据，样本统计只查询一次数据库
+    """
+    if request.method == 'POST':
+        try:
+            characters = json.loads(request.body or b'{}').get('characters', '')
+        except (ValueError, AttributeError):
+            return JsonResponse({'status': 'error', 'message': '请求体必须是 JSON 对象'}, status=400)
+    else:
+        characters = request.GET.get('chars', '')
+    if isinstance(characters, str):
+        characters = list(characters)
+    elif not isinstance(characters, list) or not all(isinstance(c, str) for c in characters):
+        return JsonResponse({'status': 'error', 'message': 'characters 必须是字符串或字符列表'}, status=400)
+
+    # 按出现顺序去重，忽略空白
+    characters = list(dict.fromkeys(c for c in ''.join(characters) if not c.isspace()))
+    if len(characters) > CHAR_BATCH_LIMIT:
+        return JsonResponse({'status': 'error', 'message': f'单次最多查询 {CHAR_BATCH_LIMIT} 个字符'}, status=400)
+
+    sample_counts = dict(
+        Hanzi.objects.filter(character__in=characters)
+        .values_list('character')
+        .annotate(count=Count('id'))
+        .order_by()
+    ) if characters else {}
+
+    store = get_char_store()
+    results = []
+    for char in characters:
+        info = store.lookup(char)
+        results.append({
+            'character': char,
+            'known': info is not None,
+            'stroke_count': info.stroke_count if info else 0,
+            'stroke_order': info.stroke_order if info else '',
+            'pinyin': list(info.pinyin) if info else [],
+            'has_samples': char in sample_counts,
+            'sample_count': sample_counts.get(char, 0),
+        })
+
+    return JsonResponse({'status': 'success', 'count': len(results), 'characters': results})
+
+@require_http_methods(["GET"])
+def radical_lookup(request):
+    """
+    部首检字接口
+    不带参数：返回全部部首及其笔画数、收字数
+    radical：返回该部首下各剩余笔画数的收字数
+    radical + residual：返回该部首、剩余笔画数下的汉字，并标注汉字表中是否已有样本
+    """
+    radical_index = get_radical_index()
+    radical = request.GET.get('radical', '')
+    if not radical:
+        return JsonResponse({
+            'status': 'success',
+            'radicals': [
+                {'radical': r, 'strokes': strokes, 'count': count}
+                for r, strokes, count in radical_index.radicals()
+            ],
+        })
+    if radical not in radical_index:
+        return JsonResponse({'status': 'error', 'message': f'未收录的部首: {radical}'}, status=404)
+
+    data = {
+        'status': 'success',
+        'radical': radical,
+        'strokes': radical_index.radical_strokes(radical),
+        'residuals': radical_index.residual_counts(radical),
+    }
+    residual = request.GET.get('residual', '')
+    if residual.isdigit():
+        characters = radical_index.characters(radical, int(residual))
+        sampled = set(
+            Hanzi.objects.filter(radical=radical, character__in=characters)
+            .values_list('character', flat=True)
+        )
+        data['residual'] = int(residual)
+        data['characters'] = [{'character': c, 'has_samples': c in sampled} for c in characters]
+    return JsonResponse(data)
+
+@require_http_methods(["GET"])
+def hanzi_facets(request):
+    """
+    筛选分面统计接口：参数与列表页/导出页的筛选参数相同
+    返回总数以及结构、等级、简繁体、笔画数各取值的记录数（结果随数据版本号缓存）
+    """
+    filters = normalize_filters(**{
+        name: request.GET.get(name, '')
+        for name in ('search', 'structure', 'level', 'variant', 'stroke_count',
+                     'ids', 'stroke_count_min', 'stroke_count_max', 'radical')
+    })
+    facets = facet_counts(filters)
+    return JsonResponse({
+        'status': 'success',
+        'total': facets['total'],
+        'facets': {
+            name: [{'value': value, 'count': count} for value, count in facets[name].items()]
+            for name in ('structure', 'level', 'variant', 'stroke_count')
+        },
+    })
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_edit_hanzi(request):
+    """
+    批量修改接口，请求体为 JSON：
+    {"ids": ["10001", ...]} 或 {"filters": {"structure": "左右结构", ...}}，
+    "changes": {"structure": ..., "level": ..., "variant": ..., "comment": ...}
+    在一个事务中写入，返回每条记录的结果；需要登录，请求须带 X-CSRFToken 头
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({'status': 'error', 'message': '请求体必须是 JSON 对象'}, status=400)
+
+    try:
+        pks, missing = resolve_selection(data.get('ids'), data.get('filters'))
+        results = bulk_edit(pks, clean_changes(data.get('changes')))
+    except ValueError as e:
+        # 包括选择无效和新结构的编号不足
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"批量修改失败: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+    results += [{'id': pk, 'status': 'not_found'} for pk in missing]
+    return JsonResponse({
+        'status': 'success',
+        'updated': sum(1 for result in results if result['status'] == 'updated'),
+        'unchanged': sum(1 for result in results if result['status'] == 'unchanged'),
+        'not_found': len(missing),
+        'results': results,
+    }, json_dumps_params={'ensure_ascii': False})
+
+@login_required
+@require_http_methods(["POST"])
+def bulk_delete_hanzi(request):
+    """
+    批量删除接口，请求体为 JSON：{"ids": ["10001", ...]} 或 {"filters": {...}}
+    数据库记录在一个事务中删除，图片文件由后台任务删除，接口不等待文件删除完成；需要登录，请求须带 X-CSRFToken 头
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({'status': 'error', 'message': '请求体必须是 JSON 对象'}, status=400)
+
+    try:
+        pks, missing = resolve_selection(data.get('ids'), data.get('filters'))
+        deleted, file_count = bulk_delete(pks)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"批量删除失败: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+    return JsonResponse({
+        'status': 'success',
+        'deleted': deleted,
+        'not_found': missing,
+        'files_scheduled': file_count,
+    }, json_dumps_params={'ensure_ascii': False})
+
+# 列表接口可选择的字段（笔顺编码为二进制，不对外提供）
+HANZI_API_FIELDS = ['id', 'code', 'character', 'pinyin', 'stroke_count', 'structure', 'stroke_order', 'radical',
+                    'level', 'variant', 'comment', 'image_path', 'standard_image', 'crt_time', 'upd_time']
+HANZI_API_DEFAULT_FIELDS = ['id', 'code', 'character', 'pinyin', 'stroke_count', 'structure', 'level', 'variant']
+# 每页默认条数和上限
+HANZI_API_PAGE_SIZE = 100
+HANZI_API_MAX_PAGE_SIZE = 1000
+# 流式输出时每次从数据库读取的条数
+HANZI_API_STREAM_CHUNK = 2000
+
+
+def hanzi_api_rows(queryset, fields, after=None, limit=None):
+    """
+    按主键游标分批读取 values() 字典，不实例化模型
+    :param after: 从主键大于该值的记录开始
+    :param limit: 最多读取的条数，None 表示读完
+    """
+    queryset = queryset.order_by('pk').values(*fields)
+    while limit is None or limit > 0:
+        size = HANZI_API_STREAM_CHUNK if limit is None else min(limit, HANZI_API_STREAM_CHUNK)
+        chunk = list(queryset.filter(pk__gt=after)[:size] if after else queryset[:size])
+        yield from chunk
+        if len(chunk) < size:
+            return
+        after = chunk[-1]['id']
+        if limit is not None:
+            limit -= len(chunk)
+
+
+@require_http_methods(["GET"])
+def hanzi_list_api(request):
+    """
+    汉字只读列表接口
+    筛选参数与列表页/导出页相同；结果按主键 id（记录 ID，不是编号 code）升序，
+    用 after 游标翻页，游标取值为上一页最后一条的 id（有搜索词时同样按主键排序）
+    fields：逗号分隔的字段，只查询这些列；limit：每页条数；count=1：同时返回总数（走计数缓存）
+    format=ndjson：以每行一个 JSON 对象的形式流式输出 after 之后的全部记录，适合大批量读取
+    """
+    fields = [f.strip() for f in request.GET.get('fields', '').split(',') if f.strip()] or HANZI_API_DEFAULT_FIELDS
+    unknown = [f for f in fields if f not in HANZI_API_FIELDS]
+    if unknown:
+        return JsonResponse({
+            'status': 'error',
+            'message': f"不支持的字段: {', '.join(unknown)}",
+            'fields': HANZI_API_FIELDS,
+        }, status=400)
+    # 游标为主键 id，始终查询 id
+    if 'id' not in fields:
+        fields = ['id'] + fields
+
+    filters = normalize_filters(**{
+        name: request.GET.get(name, '')
+        for name in ('search', 'structure', 'level', 'variant', 'stroke_count',
+                     'ids', 'stroke_count_min', 'stroke_count_max', 'radical')
+    })
+    queryset = filter_hanzi(filters)
+    after = request.GET.get('after') or None
+
+    if request.GET.get('format') == 'ndjson':
+        lines = (json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+                 for row in hanzi_api_rows(queryset, fields, after))
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson; charset=utf-8')
+
+    try:
+        limit = min(max(int(request.GET.get('limit', HANZI_API_PAGE_SIZE)), 1), HANZI_API_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'limit 必须是整数'}, status=400)
+
+    # 多取一条判断是否还有下一页
+    rows = list(hanzi_api_rows(queryset, fields, after, limit + 1))
+    data = {
+        'status': 'success',
+        'results': rows[:limit],
+        'next_cursor': rows[limit - 1]['id'] if len(rows) > limit else None,
+        'cursor_field': 'id',
+    }
+    if request.GET.get('count') == '1':
+        data['count'] = count_hanzi(filters)
+    return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+@login_required
+@require_http_methods(["GET"])
+def cache_statistics(request):
+    """读穿缓存的命中统计（列表页、详情页、计数、分面）"""
+    return JsonResponse({'status': 'success', 'data_version': get_data_version(), 'stats': cache_stats()})
+
 # 添加笔顺搜索视图
+# 笔顺搜索的匹配方式
+STROKE_MATCH_MODES = [
+    (MATCH_PREFIX, '按顺序开头'),
+    (MATCH_CONTAINS, '按顺序连续'),
+    (MATCH_FUZZY, '相近笔顺'),
+    ('any', '包含（不计顺序）'),
+]
+
+# 相近笔顺检索最多返回的汉字数
+FUZZY_RESULT_LIMIT = 240
+
+
 def stroke_search(request):
     """笔顺搜索页面"""
     stroke_pattern = request.GET.get('stroke_pattern', '')
-    results = []
+    match = request.GET.get('match', MATCH_PREFIX)
+    if match not in dict(STROKE_MATCH_MODES):
+        match = MATCH_PREFIX
+    results_count = 0
     
     # 常用笔画列表，用于快速选择
-    common_strokes = ['横','竖','点','撇','横折',
-                      '捺','横撇/横钩','提','横折钩','撇折',
-                      '竖钩','竖弯钩','竖折/竖弯','竖提','斜钩',
-                      '撇点','竖折折钩','横折弯钩/横斜钩','横折折折钩/横撇弯钩','横折折撇',
-                      '弯钩','横折折/横折弯','横折提','竖折撇/竖折折','横折折折']
+    common_strokes = STROKE_TYPES
+    strokes = parse_stroke_pattern(stroke_pattern)
+    next_strokes = {}
+    # 可选的笔画数条件，仅用于有序匹配
+    stroke_count = request.GET.get('stroke_count', '')
+    stroke_count_value = int(stroke_count) if stroke_count.isdigit() else None
 
     if stroke_pattern:
         # 执行搜索
-        results = Hanzi.search_by_stroke_order(stroke_pattern)
+        if match == 'any':
+            results = Hanzi.search_by_stroke_order(stroke_pattern).order_by('id')
+        elif match == MATCH_FUZZY:
+            # 按笔画编辑距离排序的字典汉字，已录入的汉字附带记录 ID
+            stroke_index = get_stroke_sequence_index()
+            store = get_char_store()
+            results = [{
+                'character': character,
+                'distance': distance,
+                'stroke_order': store.stroke_order(character),
+                'stroke_count': store.stroke_count(character),
+                'pinyin': '/'.join(store.pinyin(character)),
+                'hanzi_ids': stroke_index.hanzi_ids.get(character, []),
+            } for distance, character in stroke_index.nearest(strokes, FUZZY_RESULT_LIMIT)]
+        else:
+            # 有序匹配走内存笔顺索引，得到记录 ID 后只查询当前页
+            stroke_index = get_stroke_sequence_index()
+            results = stroke_index.hanzi_ids_for(stroke_index.characters(strokes, match, stroke_count_value))
+            next_strokes = stroke_index.next_strokes(strokes, match, stroke_count_value)
         
         # 分页处理
         paginator = Paginator(results, 24)  # 每页显示25条
         page_number = request.GET.get('page', 1)
         page_obj = paginator.get_page(page_number)
+        results_count = paginator.count
+        if match in (MATCH_PREFIX, MATCH_CONTAINS):
+            page_rows = Hanzi.objects.in_bulk(page_obj.object_list)
+            page_obj.object_list = [page_rows[hanzi_id] for hanzi_id in page_obj.object_list if hanzi_id in page_rows]
         
         # 为每个汉字添加动画延迟值
         for i, hanzi in enumerate(page_obj.object_list):
-            hanzi.animation_delay = (i + 8) * 50
+            if match == MATCH_FUZZY:
+                hanzi['animation_delay'] = (i + 8) * 50
+            else:
+                hanzi.animation_delay = (i + 8) * 50
     else:
         page_obj = None
+        if match in (MATCH_PREFIX, MATCH_CONTAINS):
+            next_strokes = get_stroke_sequence_index().next_strokes([], match, stroke_count_value)
     
     context = {
         'stroke_pattern': stroke_pattern,
-        'common_strokes': common_strokes,
+        'match': match,
+        'match_modes': STROKE_MATCH_MODES,
+        'stroke_count': stroke_count_value if stroke_count_value is not None else '',
+        'common_strokes': [(stroke, next_strokes.get(stroke, 0)) for stroke in common_strokes],
+        'show_next_counts': match in (MATCH_PREFIX, MATCH_CONTAINS),
         'page_obj': page_obj,
-        'results_count': len(results) if results else 0
+        'results_count': results_count,
+        'current_params': urlencode({
+            'stroke_pattern': stroke_pattern,
+            'match': match,
+            'stroke_count': stroke_count_value if stroke_count_value is not None else '',
+        }),
     }
     
     return render(request, 'hanzi_app/stroke_search.html', context)
 
+
+@require_http_methods(["GET"])
+def stroke_suggest(request):
+    """
+    有序笔顺检索接口：返回当前笔画序列匹配的汉字数、部分汉字以及各候选下一笔的匹配数
+    供笔顺搜索页在每次点选笔画时即时刷新
+    """
+    strokes = parse_stroke_pattern(request.GET.get('strokes', ''))
+    match = request.GET.get('match', MATCH_PREFIX)
+    if match not in (MATCH_PREFIX, MATCH_CONTAINS):
+        return JsonResponse({'status': 'error', 'message': '不支持的匹配方式'}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 500))
+    except ValueError:
+        limit = 50
+    stroke_count = request.GET.get('stroke_count', '')
+    stroke_count = int(stroke_count) if stroke_count.isdigit() else None
+
+    stroke_index = get_stroke_sequence_index()
+    characters = stroke_index.characters(strokes, match, stroke_count) if strokes or stroke_count is not None else []
+    return JsonResponse({
+        'status': 'success',
+        'strokes': strokes,
+        'count': len(characters),
+        'characters': characters[:limit],
+        'next_strokes': stroke_index.next_strokes(strokes, match, stroke_count),
+    })
+
 def import_view(request):
     """导入数据页面入口"""
     return render(request, 'hanzi_app/import.html', {
@@ -2182,6 +2321,11 @@ def import_data_view(request):
         
         # 获取输出格式
         output_format = request.POST.get('output_format', 'excel')
+
+        # 识别方式：为空时使用默认配置
+        ocr_mode = request.POST.get('ocr_mode') or None
+        if ocr_mode and ocr_mode not in RECOGNITION_MODES:
+            return JsonResponse({'status': 'error', 'message': f'不支持的识别方式: {ocr_mode}'})
         
         
         # 打印调试信息
@@ -2269,6 +2413,7 @@ def import_data_view(request):
                 json_level_path,
                 json_comment_path,
                 output_dir,
+                ocr_mode=ocr_mode,
             )
             
             print(f"Celery任务已提交，任务ID: {task.id}")
@@ -2296,7 +2441,8 @@ def import_data_view(request):
     
     # GET请求返回导入页面
     return render(request, 'hanzi_app/import_data.html', {
-        'title': '导入汉字数据'
+        'title': '导入汉字数据',
+        'default_ocr_mode': get_ocr_mode(),
     })
 
 # 新增任务状态检查API
@@ -161,10 +161,15 @@ SECURE_HSTS_INCLUDE_SUBDOMAINS = True
 SECURE_HSTS_PRELOAD = True
 
 # 缓存设置
+# 进程内 LRU + Redis 两级缓存，Redis 与 Celery broker 为同一实例（使用 1 号库）；Redis 不可用时只使用进程内缓存
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'hanzi_app.cache_backends.TwoTierCache',
+        'LOCATION': os.environ.get('HANZI_CACHE_REDIS_URL', 'redis://localhost:6379/1'),
+        'OPTIONS': {
+            'LOCAL_MAX_ENTRIES': 1000,  # 每个进程最多保留的条目数
+            'LOCAL_TIMEOUT': 60,        # 本地副本最长保留秒数
+        },
     }
 }
 